@@ -1,26 +1,43 @@
 # File: api_service.py
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Header, Depends, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 import os
 import shutil
 import json
 import uuid
-import jwt
 import io
 import csv
 import mimetypes
 from dotenv import load_dotenv
 from supabase import create_client
 from typing import Optional
-
-from process_resumes import process_all_resumes
+from functools import partial
+
+from process_resumes import process_all_resumes, count_zip_resumes
+from offline_scoring import SCORING_MODES
+from sharded_job import run_sharded_job, should_shard
+from multi_jd_job import process_multi_jd, MULTI_JD_MAX_JOBS
+import search_index
+import skill_index
+import artifact_store
+import job_analytics
+import clustering
+import leaderboard
+import job_control
+from job_scheduler import scheduler
+import metrics
+from auth import get_current_user
+from storage_utils import job_owner
+import tracing
 from rank_candidates import compute_relative_ranking
 from routes.comparison import router as comparison_router
 from routes.collaboration import router as collaboration_router
 from routes.search_analytics import router as search_router
+from routes.chunked_upload import router as chunked_upload_router, finalize_upload, EarlyTexts
 
 # ─── Load & init ─────────────────────────────────────────
 load_dotenv()
@@ -42,9 +59,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics.install(app)
+tracing.setup()
+tracing.install(app)
+
 app.include_router(comparison_router)
 app.include_router(collaboration_router)
 app.include_router(search_router)
+app.include_router(chunked_upload_router)
+
+# job queue, cancel tokens, leaderboards and the LLM budget are shared
+# through processed_data/*.db: every serve.py worker also runs queued jobs
+@app.on_event("startup")
+def start_job_workers():
+    scheduler.start()
 
 # ─── Paths ───────────────────────────────────────────────
 RESUME_FOLDER         = "resumes"
@@ -53,18 +81,6 @@ PROCESSED_DATA_FOLDER = "processed_data"
 for d in (RESUME_FOLDER, UPLOAD_FOLDER, PROCESSED_DATA_FOLDER):
     os.makedirs(d, exist_ok=True)
 
-# ─── Auth helper ─────────────────────────────────────────
-def get_current_user(authorization: str = Header(...)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    try:
-        token = authorization.split(" ")[1]
-        decoded = jwt.decode(token, options={"verify_signature": False})
-        user_id = decoded.get("sub")
-        return {"user_id": user_id, "role": "recruiter"}
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
 # ─── Job status ──────────────────────────────────────────
 def insert_job_status(job_id: str):
     try:
@@ -72,11 +88,11 @@ def insert_job_status(job_id: str):
     except Exception as e:
         print("⚠️ insert_job_status:", e)
 
-def update_job_status(job_id: str):
+def update_job_status(job_id: str, status: str = "complete"):
     try:
-        print(f"🌀 Attempting to update job status to COMPLETE for {job_id}")
-        supabase.table("job_status").update({"status": "complete"}).eq("job_id", job_id).execute()
-        print(f"✅ Job status marked COMPLETE → {job_id}")
+        print(f"🌀 Attempting to update job status to {status.upper()} for {job_id}")
+        supabase.table("job_status").update({"status": status}).eq("job_id", job_id).execute()
+        print(f"✅ Job status marked {status.upper()} → {job_id}")
     except Exception as e:
         print("⚠️ update_job_status:", e)
 
@@ -145,23 +161,24 @@ def upload_resume_info_to_db(file_name: str, file_path: str, job_id: str, user_i
 
     return resume_id
 
-def upload_analysis_to_db(resume_id_map, job_id: str):
+def upload_analysis_to_db(resume_id_map, job_id: str, user_id: str = None, results: list = None):
     """
-    Reads the local {job_id}_analysis.json and inserts EVERY analysis entry
-    into resume_analysis, regardless of zero scores.
+    Inserts EVERY analysis entry into resume_analysis, regardless of zero
+    scores. Uses the results handed over by the pipeline, or the job's
+    artifact store when called on its own. Uploaded entries are also added
+    to the recruiter's skill index.
     """
-    fn = os.path.join(PROCESSED_DATA_FOLDER, f"{job_id}_analysis.json")
-    if not os.path.exists(fn):
-        print("⚠️ Analysis file missing:", fn)
+    if results is None:
+        results = artifact_store.load_results(job_id)
+    if not results:
+        print(f"⚠️ No analysis results for job {job_id}")
         return
 
-    with open(fn) as f:
-        results = json.load(f)
-
     print("\n📦 Available keys in resume_id_map:")
     print(list(resume_id_map.keys()))
     print("📖 Uploading all analysis entries:")
 
+    indexed = []
     for entry in results:
         raw_filename = entry.get("filename", "")
         lookup_name  = raw_filename.strip().lower()
@@ -187,100 +204,385 @@ def upload_analysis_to_db(resume_id_map, job_id: str):
 
         try:
             # Remove any old row, then insert fresh
-            supabase.table("resume_analysis").delete().eq("resume_id", resume_id).execute()
-            supabase.table("resume_analysis").insert(payload).execute()
+            with metrics.db_call("resume_analysis", "delete"):
+                supabase.table("resume_analysis").delete().eq("resume_id", resume_id).execute()
+            with metrics.db_call("resume_analysis", "insert"):
+                supabase.table("resume_analysis").insert(payload).execute()
             print(f"✅ Uploaded analysis for: {lookup_name}")
+            indexed.append((resume_id, analysis))
         except Exception as e:
             print(f"🚨 upload_analysis_to_db error ({lookup_name}): {e}")
 
+    try:
+        skill_index.index_analyses(user_id, job_id, indexed)
+    except Exception as e:
+        print(f"🚨 Skill indexing failed for job {job_id}: {e}")
+
 # ─── Background work ─────────────────────────────────────
-def background_process(zip_path, job_description, weightages, out_folder, job_id, user_id):
+@scheduler.task
+def discard_cancelled_job(job_ids, zip_path, out_folder):
+    """Temp files and partial artifacts of a cancelled job; its job_status rows → cancelled."""
+    shutil.rmtree(out_folder, ignore_errors=True)
+    try:
+        os.remove(zip_path)
+    except FileNotFoundError:
+        pass
+    for job_id in job_ids:
+        artifact_store.delete(job_id)
+        clustering.delete(job_id)
+        job_analytics.delete(job_id)
+        leaderboard.discard(job_id)
+        update_job_status(job_id, "cancelled")
+
+@scheduler.task
+def background_process(zip_path, job_description, weightages, out_folder, job_id, user_id,
+                       scoring_mode="llm", upload_id=None):
+    """upload_id: chunked upload whose texts were already read (routes/chunked_upload.EarlyTexts)."""
+    prefetched = EarlyTexts(upload_id) if upload_id else None
+    running = metrics.QUEUE_DEPTH.labels("jobs_running")
+    running.inc()
+    cancelled = failed = False
+    token = None
     try:
+        with tracing.span("screening_job", job_id=job_id, user_id=user_id, scoring_mode=scoring_mode), \
+                job_control.running(job_id) as token:
+            _run_job(zip_path, job_description, weightages, out_folder, job_id, user_id,
+                     scoring_mode, prefetched)
+    except job_control.JobCancelled as e:
+        cancelled = True
+        print(f"🛑 Job {job_id} stopped: {e}")
+        discard_cancelled_job([job_id], zip_path, out_folder)
+    except Exception as e:
+        failed = True
+        print("🚨 Background processing error:", e)
+    finally:
+        running.dec()
+        if not cancelled:
+            leaderboard.finish(job_id, failed=failed)
+            # partial: some resumes were lost (sharded job), the rest is ranked
+            status = "failed" if failed else "partial" if token and token.partial else "complete"
+            try:
+                update_job_status(job_id, status)
+            except Exception as e:
+                print("⚠️ update_job_status failed:", e)
+
+def _run_job(zip_path, job_description, weightages, out_folder, job_id, user_id,
+             scoring_mode="llm", prefetched=None):
+    if should_shard(count_zip_resumes(zip_path)):
+        results, resume_id_map = run_sharded_job(
+            zip_path, job_description, weightages, out_folder, job_id, user_id, scoring_mode
+        )
+    else:
         results, resume_id_map = process_all_resumes(
-            zip_path, job_description, weightages, out_folder, job_id, user_id
+            zip_path, job_description, weightages, out_folder, job_id, user_id, scoring_mode,
+            prefetched
         )
-        print("📦 Passing keys to upload_analysis_to_db:", list(resume_id_map.keys()))
-        upload_analysis_to_db(resume_id_map, job_id)
-        compute_relative_ranking(job_id)
+    print("📦 Passing keys to upload_analysis_to_db:", list(resume_id_map.keys()))
+    with metrics.job_context(len(results)):
+        with metrics.stage("analysis_upload"):
+            upload_analysis_to_db(resume_id_map, job_id, user_id, results)
+        with metrics.stage("ranking"):
+            compute_relative_ranking(job_id, results, user_id)
+
+@scheduler.task
+def background_process_multi(zip_path, jobs, out_folder, user_id, scoring_mode="llm"):
+    """One pool, several JDs: one upload per resume, one ranking per job_id."""
+    running = metrics.QUEUE_DEPTH.labels("jobs_running")
+    running.inc()
+    job_ids = [job["job_id"] for job in jobs]
+    cancelled = failed = False
+    try:
+        with tracing.span("screening_job_multi", job_id=job_ids[0], job_ids=",".join(job_ids),
+                          user_id=user_id, scoring_mode=scoring_mode), \
+                job_control.running(*job_ids):
+            by_job = process_multi_jd(zip_path, jobs, out_folder, user_id, scoring_mode)
+        for job in jobs:
+            results, resume_id_map = by_job[job["job_id"]]
+            with metrics.job_context(len(results)), tracing.span("job_finalize", job_id=job["job_id"]):
+                # every job has its own resume_ids, hence its own resume_analysis rows
+                with metrics.stage("analysis_upload"):
+                    upload_analysis_to_db(resume_id_map, job["job_id"], user_id, results)
+                with metrics.stage("ranking"):
+                    compute_relative_ranking(job["job_id"], results, user_id, resume_id_map)
+    except job_control.JobCancelled as e:
+        cancelled = True
+        print(f"🛑 Multi-JD jobs {job_ids} stopped: {e}")
+        discard_cancelled_job(job_ids, zip_path, out_folder)
     except Exception as e:
-        print("🚨 Background processing error:", e)
+        failed = True
+        print("🚨 Multi-JD background processing error:", e)
     finally:
-        try:
-            update_job_status(job_id)
-            print(f"✅ Job status marked complete → {job_id}")
-        except Exception as e:
-            print("⚠️ update_job_status failed:", e)
+        running.dec()
+        if not cancelled:
+            for job_id in job_ids:
+                leaderboard.finish(job_id, failed=failed)
+                update_job_status(job_id, "failed" if failed else "complete")
 
 # ─── API endpoints ───────────────────────────────────────
 @app.post("/upload-resumes/")
 async def upload_resumes(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     job_description: str = Form(...),
     job_title: str       = Form(...),
     weight_experience: int = Form(...),
     weight_projects:    int = Form(...),
+    scoring_mode:       str = Form("llm"),
     user=Depends(get_current_user)
 ):
     if user["role"] != "recruiter":
         raise HTTPException(403, "Only recruiters can upload.")
+    if scoring_mode not in SCORING_MODES:
+        raise HTTPException(400, f"scoring_mode must be one of {', '.join(SCORING_MODES)}.")
 
-    job_id     = str(uuid.uuid4())
-    user_id    = user["user_id"]
-    zip_path   = os.path.join(UPLOAD_FOLDER, f"{job_id}.zip")
-    out_folder = os.path.join(RESUME_FOLDER, job_id)
+    job_id   = str(uuid.uuid4())
+    zip_path = os.path.join(UPLOAD_FOLDER, f"{job_id}.zip")
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+    def _save():
+        with open(zip_path, "wb") as buf:
+            shutil.copyfileobj(file.file, buf)
+    await run_in_threadpool(_save)
+    if os.path.getsize(zip_path) == 0:
+        raise HTTPException(400, "Uploaded file is empty.")
+
+    return start_job(job_id, user["user_id"], zip_path, job_title, job_description,
+                     weight_experience, weight_projects, scoring_mode)
+
+@app.post("/upload-resumes-multi/")
+async def upload_resumes_multi(
+    file: UploadFile = File(...),
+    jobs: str = Form(...),
+    scoring_mode: str = Form("llm"),
+    user=Depends(get_current_user)
+):
+    """
+    jobs: JSON list of {job_title, job_description, weight_experience,
+    weight_projects}. Creates one job per entry over the same resumes.
+    """
+    if user["role"] != "recruiter":
+        raise HTTPException(403, "Only recruiters can upload.")
+    if scoring_mode not in SCORING_MODES:
+        raise HTTPException(400, f"scoring_mode must be one of {', '.join(SCORING_MODES)}.")
+    try:
+        specs = json.loads(jobs)
+        specs = [{
+            "job_title":         str(j["job_title"]),
+            "job_description":   str(j["job_description"]),
+            "weight_experience": int(j["weight_experience"]),
+            "weight_projects":   int(j["weight_projects"]),
+        } for j in specs]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(400, "jobs must be a JSON list of {job_title, job_description, "
+                                 "weight_experience, weight_projects}.")
+    if not 1 <= len(specs) <= MULTI_JD_MAX_JOBS:
+        raise HTTPException(400, f"Between 1 and {MULTI_JD_MAX_JOBS} job descriptions per upload.")
+
+    user_id = user["user_id"]
+    job_ids = [str(uuid.uuid4()) for _ in specs]
+    zip_path = os.path.join(UPLOAD_FOLDER, f"{job_ids[0]}.zip")
+    out_folder = os.path.join(RESUME_FOLDER, job_ids[0])
     os.makedirs(out_folder, exist_ok=True)
 
-    with open(zip_path, "wb") as buf:
-        shutil.copyfileobj(file.file, buf)
+    def _save():
+        with open(zip_path, "wb") as buf:
+            shutil.copyfileobj(file.file, buf)
+    await run_in_threadpool(_save)
     if os.path.getsize(zip_path) == 0:
         raise HTTPException(400, "Uploaded file is empty.")
 
+    tracing.set_attributes(job_id=job_ids[0], job_ids=",".join(job_ids), user_id=user_id)
+    run_jobs = []
+    for job_id, spec in zip(job_ids, specs):
+        upload_job_description_to_db(job_id, spec["job_title"], spec["job_description"],
+                                     spec["weight_experience"], spec["weight_projects"], user_id)
+        insert_job_status(job_id)
+        run_jobs.append({
+            "job_id": job_id,
+            "job_description": spec["job_description"],
+            "weights": {"experience": spec["weight_experience"], "projects": spec["weight_projects"]},
+        })
+
+    lane = scheduler.submit(
+        job_ids[0], user_id, count_zip_resumes(zip_path), background_process_multi,
+        zip_path, run_jobs, out_folder, user_id, scoring_mode,
+        on_cancel=partial(discard_cancelled_job, job_ids, zip_path, out_folder)
+    )
+    return {"job_ids": job_ids, "lane": lane}
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_chunked_upload(
+    upload_id: str,
+    job_description: str = Form(...),
+    job_title: str       = Form(...),
+    weight_experience: int = Form(...),
+    weight_projects:    int = Form(...),
+    scoring_mode:       str = Form("llm"),
+    sha256: Optional[str]   = Form(None),
+    user=Depends(get_current_user)
+):
+    """Last step of the chunked upload protocol (routes/chunked_upload.py); upload_id becomes the job_id."""
+    if user["role"] != "recruiter":
+        raise HTTPException(403, "Only recruiters can upload.")
+    if scoring_mode not in SCORING_MODES:
+        raise HTTPException(400, f"scoring_mode must be one of {', '.join(SCORING_MODES)}.")
+
+    zip_path, _ = await run_in_threadpool(finalize_upload, upload_id, user["user_id"], sha256)
+    return start_job(upload_id, user["user_id"], zip_path, job_title, job_description,
+                     weight_experience, weight_projects, scoring_mode, prefetched_upload=upload_id)
+
+def start_job(job_id, user_id, zip_path, job_title, job_description,
+              weight_experience, weight_projects, scoring_mode, prefetched_upload=None):
+    tracing.set_attributes(job_id=job_id, user_id=user_id)
+    out_folder = os.path.join(RESUME_FOLDER, job_id)
+    os.makedirs(out_folder, exist_ok=True)
+
     upload_job_description_to_db(job_id, job_title, job_description,
                                  weight_experience, weight_projects, user_id)
     insert_job_status(job_id)
 
     weight_map = {"experience": weight_experience, "projects": weight_projects}
-    background_tasks.add_task(
-        background_process, zip_path, job_description,
-        weight_map, out_folder, job_id, user_id
+    lane = scheduler.submit(
+        job_id, user_id, count_zip_resumes(zip_path), background_process,
+        zip_path, job_description, weight_map, out_folder, job_id, user_id, scoring_mode, prefetched_upload,
+        on_cancel=partial(discard_cancelled_job, [job_id], zip_path, out_folder)
     )
 
-    return {"job_id": job_id}
+    return {"job_id": job_id, "lane": lane}
 
 @app.get("/status")
 async def get_status(job_id: str):
     resp = supabase.table("job_status").select("status").eq("job_id", job_id).limit(1).execute()
     if not resp.data:
         raise HTTPException(404, "Job ID not found.")
-    return {"status": resp.data[0]["status"]}
+    return {
+        "status": resp.data[0]["status"],
+        "queue": scheduler.job_info(job_id),
+        "control": job_control.info(job_id),
+    }
+
+@app.post("/cancel-job/")
+async def cancel_job(job_id: str = Form(...), user=Depends(get_current_user)):
+    """
+    Queued: dropped at once. Running: stops at its next checkpoint (between
+    stages and resume groups), then its temp files are removed and the
+    status becomes "cancelled". A multi-JD upload is cancelled by its first job_id.
+    """
+    if user["role"] != "recruiter":
+        raise HTTPException(403, "Only recruiters can cancel jobs.")
+    state = await run_in_threadpool(scheduler.cancel, job_id, user["user_id"])
+    if state == "cancelled":
+        return {"job_id": job_id, "status": "cancelled"}
+    if state == "running" and job_control.cancel(job_id):
+        return {"job_id": job_id, "status": "cancelling"}
+    raise HTTPException(404, "No queued or running job with this ID.")
+
+@app.get("/leaderboard")
+async def get_leaderboard(job_id: str, top_k: int = 50, user=Depends(get_current_user)):
+    """Provisional top-K while the job runs; final=True once it has ended."""
+    top_k = max(1, min(top_k, leaderboard.LEADERBOARD_SIZE))
+    board = leaderboard.get(job_id)
+    if board:
+        if board.user_id and board.user_id != user["user_id"]:
+            raise HTTPException(404, "Job ID not found.")
+        return board.snapshot(top_k)
+
+    # finished more than LEADERBOARD_TTL ago: the stored final ranking
+    if await run_in_threadpool(job_owner, job_id) != user["user_id"]:
+        raise HTTPException(404, "Job ID not found.")
+    ranked = artifact_store.load_results(job_id, ranked=True)
+    if not ranked:
+        raise HTTPException(404, "No results yet for this job.")
+    return {
+        "job_id": job_id,
+        "final": True,
+        "failed": False,
+        "analysed": len(ranked),
+        "total": len(ranked),
+        "ranking": [
+            {
+                "filename": r["filename"],
+                "candidate_name": r.get("candidate_name"),
+                "final_score": r["analysis"].get("Final Score"),
+                "overall_match_score": r["analysis"].get("Overall Match Score"),
+                "rank": rank,
+                "relative_score": r["analysis"].get("Relative Ranking Score"),
+            }
+            for rank, r in enumerate(ranked[:top_k], start=1)
+        ],
+    }
+
+# resume_analysis column → analysis key, for jobs exported from Supabase
+ANALYSIS_COLUMNS = {
+    "key_skills":                 "Key Skills",
+    "overall_analysis":           "Overall Analysis",
+    "certifications_courses":     "Certifications & Courses",
+    "relevant_projects":          "Relevant Projects",
+    "soft_skills":                "Soft Skills",
+    "overall_match_score":        "Overall Match Score",
+    "projects_relevance_score":   "Projects Relevance Score",
+    "experience_relevance_score": "Experience Relevance Score",
+}
+
+def export_from_supabase(job_id: str) -> list:
+    """
+    Ranked entries of a job that has no artifact store (screened before it
+    existed, or its processed_data is gone), rebuilt from resume_rankings,
+    resume_analysis and resume_uploads in the artifact store's shape.
+    """
+    rankings = supabase.table("resume_rankings").select("*").eq("job_id", job_id).order("rank").execute().data
+    ids = [r["resume_id"] for r in rankings]
+    if not ids:
+        return []
+    analyses = {a["resume_id"]: a for a in
+                supabase.table("resume_analysis").select("*").in_("resume_id", ids).execute().data}
+    uploads = {u["resume_id"]: u for u in
+               supabase.table("resume_uploads").select("resume_id, file_name").in_("resume_id", ids).execute().data}
+    results = []
+    for rank in rankings:
+        row = analyses.get(rank["resume_id"], {})
+        analysis = {key: row.get(column) for column, key in ANALYSIS_COLUMNS.items()}
+        analysis["Relative Ranking Score"] = rank.get("total_score")
+        results.append({
+            "filename": uploads.get(rank["resume_id"], {}).get("file_name"),
+            "candidate_name": rank.get("candidate_name"),
+            "resume_id": rank["resume_id"],
+            "analysis": analysis,
+        })
+    return results
 
 @app.get("/export")
-async def export_results(job_id: str, format: str = "json"):
-    jrank = os.path.join(PROCESSED_DATA_FOLDER, f"{job_id}_ranked_candidates.json")
-    janal = os.path.join(PROCESSED_DATA_FOLDER, f"{job_id}_analysis.json")
-    file_path = jrank if os.path.exists(jrank) else janal
-
-    if not file_path:
-        raise HTTPException(500, "No results to export.")
+async def export_results(job_id: str, format: str = "json", filename: Optional[str] = None):
+    """From the job's artifact store; jobs without one fall back to the Supabase tables."""
+    if filename:
+        entry = artifact_store.get_candidate(job_id, filename)
+        if entry is None and not artifact_store.exists(job_id):
+            entry = next((r for r in await run_in_threadpool(export_from_supabase, job_id)
+                          if r["filename"] == filename), None)
+        if not entry:
+            raise HTTPException(404, "Candidate not found.")
+        return JSONResponse(content=entry)
+
+    results = artifact_store.load_results(job_id, ranked=True) or \
+        await run_in_threadpool(export_from_supabase, job_id)
+    results = [r for r in results if r.get("filename") and r.get("analysis")]
+    if not results:
+        raise HTTPException(404, "No results to export.")
 
     if format.lower() == "json":
-        data = [r for r in json.load(open(file_path)) if r.get("filename") and r.get("analysis")]
-        return JSONResponse(content=data)
+        return JSONResponse(content=results)
 
     if format.lower() == "csv":
-        arr = json.load(open(file_path))
         stream = io.StringIO()
         writer = None
-        for item in arr:
+        for item in results:
             row = {"filename": item["filename"], **item["analysis"]}
             if writer is None:
-                writer = csv.DictWriter(stream, fieldnames=row.keys())
+                writer = csv.DictWriter(stream, fieldnames=row.keys(), extrasaction="ignore")
                 writer.writeheader()
             writer.writerow(row)
         stream.seek(0)
-        return StreamingResponse(stream, media_type="text/csv")
+        headers = {"Content-Disposition": f"attachment; filename=screening_{job_id}.csv"}
+        return StreamingResponse(stream, media_type="text/csv", headers=headers)
 
     raise HTTPException(400, "Unsupported format.")
 
@@ -305,11 +607,17 @@ async def update_resume_status(
             .eq("job_id", job_id) \
             .eq("resume_id", resume_id) \
             .execute()
-        return {"message": f"Status updated to {status}"}
+        search_index.update_status(user["user_id"], job_id, resume_id, status)
     except Exception as e:
         print("🚨 Error in /update-status/:", e)
         raise HTTPException(status_code=500, detail="Could not update resume status")
 
+    try:
+        job_analytics.record_status(job_id, resume_id, status)
+    except Exception as e:
+        print(f"⚠️ Analytics funnel not updated for job {job_id}: {e}")
+    return {"message": f"Status updated to {status}"}
+
 @app.post("/add-note/")
 async def add_recruiter_note(
     job_id: str = Form(...),
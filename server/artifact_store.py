@@ -0,0 +1,167 @@
+# File: artifact_store.py
+# --------------------------------------------------------------------------
+# One compact, indexed artifact per screening job:
+#   processed_data/<job_id>.db
+#     candidates → pos, filename (indexed), candidate_name, resume_id,
+#                  final_score, relative_score, rank,
+#                  zlib(compact JSON analysis)
+#     meta       → key / value (job-level facts, e.g. ranked_at)
+# Stages hand results to each other in memory; this store is the single
+# persisted copy. Ranking only updates the score/rank columns, and a single
+# candidate is read by its filename without touching the others.
+# Jobs created before the store existed still have <job_id>_analysis.json;
+# load_results() falls back to it.
+# --------------------------------------------------------------------------
+
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+PROCESSED_DATA_FOLDER = "processed_data"
+
+os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    pos            INTEGER PRIMARY KEY,
+    filename       TEXT,
+    candidate_name TEXT,
+    resume_id      TEXT,
+    final_score    REAL,
+    relative_score REAL,
+    rank           INTEGER,
+    analysis       BLOB
+);
+CREATE INDEX IF NOT EXISTS candidates_filename ON candidates (filename);
+CREATE INDEX IF NOT EXISTS candidates_rank ON candidates (rank);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _path(job_id: str) -> str:
+    return os.path.join(PROCESSED_DATA_FOLDER, f"{job_id}.db")
+
+
+def _connect(job_id: str):
+    db = sqlite3.connect(_path(job_id))
+    db.executescript(_SCHEMA)
+    return closing(db)
+
+
+def _pack(analysis: dict) -> bytes:
+    return zlib.compress(json.dumps(analysis, separators=(",", ":")).encode("utf-8"))
+
+
+def _entry(row) -> dict:
+    filename, candidate_name, analysis = row
+    return {
+        "filename": filename,
+        "candidate_name": candidate_name,
+        "analysis": json.loads(zlib.decompress(analysis)),
+    }
+
+
+def _clean(filename: str) -> str:
+    return os.path.basename(filename).strip().lower()
+
+
+# ─── public API ────────────────────────────────────────────────────────
+def exists(job_id: str) -> bool:
+    return os.path.exists(_path(job_id))
+
+
+def save_results(job_id: str, results: list, resume_id_map: dict = None) -> str:
+    """Persists a job's analysis results (replacing any earlier run of the job)."""
+    resume_id_map = resume_id_map or {}
+    with _connect(job_id) as db:
+        db.execute("DELETE FROM candidates")
+        db.executemany(
+            "INSERT INTO candidates "
+            "(pos, filename, candidate_name, resume_id, final_score, analysis) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (pos, r["filename"], r.get("candidate_name"), resume_id_map.get(_clean(r["filename"])),
+                 r["analysis"].get("Final Score", 0.0) or 0.0, _pack(r["analysis"]))
+                for pos, r in enumerate(results)
+            ],
+        )
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('saved_at', ?)", (str(time.time()),))
+        db.commit()
+    return _path(job_id)
+
+
+def save_ranking(job_id: str, relative_scores: list) -> None:
+    """
+    Writes relative score + rank for an already saved job; relative_scores
+    is aligned with the saved analysis order. Analysis blobs stay untouched.
+    """
+    order = sorted(range(len(relative_scores)), key=lambda i: relative_scores[i], reverse=True)
+    rank_of = {pos: rank for rank, pos in enumerate(order, start=1)}
+    with _connect(job_id) as db:
+        db.executemany(
+            "UPDATE candidates SET relative_score = ?, rank = ? WHERE pos = ?",
+            [(score, rank_of[pos], pos) for pos, score in enumerate(relative_scores)],
+        )
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('ranked_at', ?)", (str(time.time()),))
+        db.commit()
+
+
+def load_results(job_id: str, ranked: bool = False) -> list:
+    """
+    All entries in analysis order, or rank order when ranked=True (falls
+    back to analysis order for an unranked job). Relative Ranking Score is
+    merged into each analysis when present. [] when the job is unknown.
+    """
+    if not exists(job_id):
+        return _load_legacy(job_id, ranked)
+    order = "rank IS NULL, rank, pos" if ranked else "pos"
+    with _connect(job_id) as db:
+        rows = db.execute(
+            f"SELECT filename, candidate_name, analysis, relative_score FROM candidates ORDER BY {order}"
+        ).fetchall()
+    out = []
+    for *row, relative in rows:
+        entry = _entry(row)
+        if relative is not None:
+            entry["analysis"]["Relative Ranking Score"] = relative
+        out.append(entry)
+    return out
+
+
+def get_candidate(job_id: str, filename: str):
+    """One entry by filename (index lookup), or None. Lookup is case-sensitive."""
+    if not exists(job_id):
+        return None
+    with _connect(job_id) as db:
+        row = db.execute(
+            "SELECT filename, candidate_name, analysis, relative_score, rank FROM candidates WHERE filename = ?",
+            (filename,),
+        ).fetchone()
+    if not row:
+        return None
+    entry = _entry(row[:3])
+    if row[3] is not None:
+        entry["analysis"]["Relative Ranking Score"] = row[3]
+        entry["rank"] = row[4]
+    return entry
+
+
+def delete(job_id: str) -> None:
+    """Removes the job's store and any legacy JSON/CSV artifacts."""
+    legacy = ("_analysis.json", "_ranked.json", "_ranked.csv")
+    for path in [_path(job_id)] + [os.path.join(PROCESSED_DATA_FOLDER, job_id + s) for s in legacy]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _load_legacy(job_id: str, ranked: bool) -> list:
+    names = ([f"{job_id}_ranked.json"] if ranked else []) + [f"{job_id}_analysis.json"]
+    for name in names:
+        path = os.path.join(PROCESSED_DATA_FOLDER, name)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+    return []
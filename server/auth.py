@@ -0,0 +1,29 @@
+# File: auth.py
+# --------------------------------------------------------------------------
+# Request authentication shared by api_service and the routers in routes/.
+#   get_current_user → {"user_id", "role"} from the Bearer token
+#   current_user_id  → just the user_id, for routes scoped to one recruiter
+# user_id is the token's sub, a Supabase user UUID; it names the
+# recruiter's index folder (index_paths), so a token without one is 401.
+# --------------------------------------------------------------------------
+
+import uuid
+
+import jwt
+from fastapi import Depends, Header, HTTPException
+
+
+def get_current_user(authorization: str = Header(...)):
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        token = authorization.split(" ")[1]
+        decoded = jwt.decode(token, options={"verify_signature": False})
+        user_id = str(uuid.UUID(decoded["sub"]))
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return {"user_id": user_id, "role": "recruiter"}
+
+
+def current_user_id(user=Depends(get_current_user)) -> str:
+    return user["user_id"]
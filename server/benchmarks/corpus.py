@@ -0,0 +1,319 @@
+# File: benchmarks/corpus.py
+# --------------------------------------------------------------------------
+# Deterministic synthetic resumes for benchmarks and offline testing. No
+# document library is needed: PDFs are written by hand (one Helvetica text
+# stream per page) and DOCX files as bare WordprocessingML packages.
+#
+#   build_zip(path, n)      n clean one-to-two page PDFs (pipeline benchmark)
+#   build_corpus(path, n)   realistic mix: PDF / DOCX, short to 5-page
+#                           resumes, skill tables, folder and nested-ZIP
+#                           layouts, plus corrupt, empty, text-less and
+#                           non-resume files
+#
+#   cd server
+#   python -m benchmarks.corpus --n 1000 --seed 42 --out corpus_1k.zip
+#
+# Same (n, seed, options) → byte-identical ZIP and manifest.
+# --------------------------------------------------------------------------
+
+import argparse
+import io
+import json
+import random
+import zipfile
+from collections import Counter
+from xml.sax.saxutils import escape as xml_escape
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+FIRST = ["Aarav", "Priya", "Jordan", "Mei", "Carlos", "Fatima", "Liam", "Ananya", "Noah", "Sara"]
+LAST = ["Sharma", "Chen", "Garcia", "Okafor", "Smith", "Iyer", "Novak", "Haddad", "Kim", "Reddy"]
+SKILLS = [
+    "Python", "Java", "Go", "TypeScript", "React", "Node.js", "SQL", "PostgreSQL", "MongoDB",
+    "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Kafka", "Spark", "TensorFlow", "PyTorch",
+    "scikit-learn", "Terraform", "CI/CD", "REST", "GraphQL", "Redis", "Linux",
+]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Tech"]
+ROLES = ["Software Engineer", "Data Analyst", "ML Engineer", "Backend Developer", "Frontend Developer"]
+VERBS = ["Built", "Designed", "Led", "Optimised", "Migrated", "Automated", "Shipped", "Maintained"]
+LEVELS = ["Beginner", "Intermediate", "Advanced", "Expert"]
+LAYOUTS = ("flat", "folders", "nested_zip", "mixed")
+DEPARTMENTS = ["engineering", "data", "campus_drive", "referrals", "agency"]
+INNER_ZIP_SIZE = 50             # resumes per nested ZIP in the nested_zip layout
+
+# kind → share of the corpus; the rest are plain PDFs
+DEFAULT_MIX = {
+    "docx": 0.25,               # DOCX, paragraphs only
+    "docx_table": 0.05,         # DOCX with a skills table (python-docx paragraphs skip it)
+    "pdf_table": 0.05,          # PDF with a column-aligned skills table
+    "pdf_long": 0.08,           # 3-5 pages
+    "pdf_corrupt": 0.01,        # truncated PDF
+    "docx_corrupt": 0.005,      # truncated DOCX package
+    "garbage": 0.005,           # random bytes with a .pdf name
+    "empty": 0.01,              # 0-byte .pdf / .docx
+    "pdf_blank": 0.005,         # valid PDF without any text
+    "other": 0.01,              # .txt / .png / .doc next to the resumes
+}
+# kinds that read_resumes should turn into a resume
+READABLE = {"pdf", "pdf_long", "pdf_table", "docx", "docx_table"}
+
+
+def resume_lines(rng: random.Random, min_jobs: int = 1, max_jobs: int = 4) -> list:
+    name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+    skills = rng.sample(SKILLS, rng.randint(4, 10))
+    lines = [name, f"{name.split()[0].lower()}@example.com | +91 98765 {rng.randint(10000, 99999)}", ""]
+    lines += ["SUMMARY", f"{rng.choice(ROLES)} with {rng.randint(1, 12)} years of experience.", ""]
+    lines += ["EXPERIENCE"]
+    for _ in range(rng.randint(min_jobs, max_jobs)):
+        lines.append(f"{rng.choice(ROLES)} - {rng.choice(COMPANIES)} ({rng.randint(2012, 2024)})")
+        for _ in range(rng.randint(2, 5)):
+            lines.append(f"  - {rng.choice(VERBS)} {rng.choice(skills)} services handling "
+                         f"{rng.randint(1, 900)}k requests/day")
+    lines += ["", "PROJECTS"]
+    for _ in range(rng.randint(1, 3)):
+        lines.append(f"  - {rng.choice(VERBS)} a {rng.choice(skills)} + {rng.choice(skills)} project")
+    lines += ["", "SKILLS", ", ".join(skills), "", "EDUCATION", "B.Tech Computer Science"]
+    return lines
+
+
+def _skill_table(rng: random.Random, n_rows: int = None) -> list:
+    rows = [["Skill", "Level", "Years", "Last used"]]
+    for skill in rng.sample(SKILLS, n_rows or rng.randint(4, 9)):
+        rows.append([skill, rng.choice(LEVELS), str(rng.randint(1, 10)), str(rng.randint(2016, 2024))])
+    return rows
+
+
+def _table_lines(rows: list) -> list:
+    """Fixed-width text rows, as a PDF table ends up after text extraction."""
+    widths = [max(len(r[c]) for r in rows) + 3 for c in range(len(rows[0]))]
+    return ["".join(cell.ljust(w) for cell, w in zip(row, widths)).rstrip() for row in rows]
+
+
+# ─── PDF ───────────────────────────────────────────────────────────────
+def _escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines: list, lines_per_page: int = 48) -> bytes:
+    pages = [lines[i : i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objs = []                                    # 1-based object bodies
+    objs.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objs.append(b"")                             # Pages, filled in below
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for page in pages:
+        text = ["BT /F1 10 Tf 12 TL 50 790 Td"]
+        text += [f"({_escape(line)}) Tj T*" for line in page]
+        text.append("ET")
+        stream = "\n".join(text).encode("latin-1", "replace")
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objs)
+        objs.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objs))
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref))
+    return out.getvalue()
+
+
+# ─── DOCX ──────────────────────────────────────────────────────────────
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType='
+    '"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+    'officeDocument" Target="word/document.xml"/></Relationships>'
+)
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _w_paragraph(text: str, bold: bool = False) -> str:
+    props = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    return f'<w:p><w:r>{props}<w:t xml:space="preserve">{xml_escape(text)}</w:t></w:r></w:p>'
+
+
+def make_docx(lines: list, table: list = None) -> bytes:
+    """Minimal .docx; headings (upper-case lines) are bold, table goes after SKILLS."""
+    body = []
+    for line in lines:
+        body.append(_w_paragraph(line, bold=line.isupper() and len(line) > 2))
+        if table and line == "SKILLS":
+            cells = "".join(
+                "<w:tr>" + "".join(f"<w:tc>{_w_paragraph(c)}</w:tc>" for c in row) + "</w:tr>"
+                for row in table
+            )
+            body.append(f"<w:tbl><w:tblPr><w:tblW w:w=\"0\" w:type=\"auto\"/></w:tblPr>{cells}</w:tbl>")
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{_W}">'
+        f'<w:body>{"".join(body)}<w:sectPr/></w:body></w:document>'
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in (("[Content_Types].xml", _DOCX_CONTENT_TYPES), ("_rels/.rels", _DOCX_RELS),
+                           ("word/document.xml", document)):
+            # fixed timestamps keep the corpus byte-identical between runs
+            zf.writestr(zipfile.ZipInfo(name, (2024, 1, 1, 0, 0, 0)), data)
+    return out.getvalue()
+
+
+# ─── corpus ────────────────────────────────────────────────────────────
+def build_zip(path: str, n: int, seed: int = 42) -> str:
+    """Writes n one-to-two page PDF resumes into a ZIP at path."""
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(n):
+            zf.writestr(f"resumes/resume_{i:06d}.pdf", make_pdf(resume_lines(rng)))
+    return path
+
+
+def _pick_kind(rng: random.Random, mix: dict) -> str:
+    x, acc = rng.random(), 0.0
+    for kind, share in mix.items():
+        acc += share
+        if x < acc:
+            return kind
+    return "pdf"
+
+
+def make_member(rng: random.Random, kind: str, i: int):
+    """(filename, bytes) of one corpus file of the given kind."""
+    stem = f"resume_{i:06d}"
+    if kind == "pdf":
+        return f"{stem}.pdf", make_pdf(resume_lines(rng))
+    if kind == "pdf_long":
+        return f"{stem}.pdf", make_pdf(resume_lines(rng, 12, 22))
+    if kind == "pdf_table":
+        lines = resume_lines(rng)
+        at = lines.index("SKILLS") + 1
+        return f"{stem}.pdf", make_pdf(lines[:at] + _table_lines(_skill_table(rng)) + lines[at:])
+    if kind == "pdf_blank":
+        return f"{stem}.pdf", make_pdf([])
+    if kind == "pdf_corrupt":
+        data = make_pdf(resume_lines(rng))
+        return f"{stem}.pdf", data[: rng.randint(20, len(data) // 2)]
+    if kind == "docx":
+        return f"{stem}.docx", make_docx(resume_lines(rng))
+    if kind == "docx_table":
+        return f"{stem}.docx", make_docx(resume_lines(rng), _skill_table(rng))
+    if kind == "docx_corrupt":
+        data = make_docx(resume_lines(rng))
+        return f"{stem}.docx", data[: rng.randint(30, len(data) // 2)]
+    if kind == "garbage":
+        return f"{stem}.pdf", bytes(rng.getrandbits(8) for _ in range(rng.randint(200, 4000)))
+    if kind == "empty":
+        return f"{stem}.{rng.choice(['pdf', 'docx'])}", b""
+    # other: files recruiters' ZIPs also contain
+    ext = rng.choice(["txt", "png", "doc"])
+    data = "\n".join(resume_lines(rng)).encode() if ext == "txt" else bytes(rng.getrandbits(8) for _ in range(512))
+    return f"{stem}.{ext}", data
+
+
+def _folder(rng: random.Random, layout: str) -> str:
+    if layout == "flat":
+        return ""
+    return f"{rng.choice(DEPARTMENTS)}/batch_{rng.randint(1, 8):02d}/"
+
+
+def _write(zf: zipfile.ZipFile, name: str, data: bytes) -> None:
+    info = zipfile.ZipInfo(name, (2024, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    zf.writestr(info, data)
+
+
+def _inner_zip(members: list) -> bytes:
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as zf:
+        for name, data in members:
+            _write(zf, name, data)
+    return out.getvalue()
+
+
+def build_corpus(path: str, n: int, seed: int = 42, layout: str = "mixed", mix: dict = None) -> dict:
+    """
+    Writes n files (resumes, broken files and noise, per mix) into a ZIP at
+    path. layout: flat | folders | nested_zip (groups of INNER_ZIP_SIZE in
+    inner ZIPs, one level deeper every other group) | mixed (per file).
+    Returns the manifest: counts per kind and how many resumes should load.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {', '.join(LAYOUTS)}")
+    mix = DEFAULT_MIX if mix is None else mix
+    rng = random.Random(seed)
+    kinds = Counter()
+    inner, inner_zips, group = [], 0, 0
+
+    def _flush(zf):
+        nonlocal inner, inner_zips, group
+        if not inner:
+            return
+        data = _inner_zip(inner)
+        if group % 2:
+            # two levels: outer.zip → part.zip → resumes
+            data = _inner_zip([(f"part_{group:04d}_inner.zip", data)])
+            inner_zips += 1
+        _write(zf, f"uploads/part_{group:04d}.zip", data)
+        inner_zips += 1
+        inner, group = [], group + 1
+
+    with zipfile.ZipFile(path, "w") as zf:
+        for i in range(n):
+            kind = _pick_kind(rng, mix)
+            kinds[kind] += 1
+            name, data = make_member(rng, kind, i)
+            where = layout if layout != "mixed" else rng.choice(("flat", "folders", "folders", "nested_zip"))
+            if where == "nested_zip":
+                inner.append((name, data))
+                if len(inner) >= INNER_ZIP_SIZE:
+                    _flush(zf)
+            else:
+                _write(zf, _folder(rng, where) + name, data)
+        _flush(zf)
+
+    return {
+        "path": path,
+        "n": n,
+        "seed": seed,
+        "layout": layout,
+        "kinds": dict(sorted(kinds.items())),
+        "inner_zips": inner_zips,
+        "expected_resumes": sum(c for k, c in kinds.items() if k in READABLE),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Deterministic synthetic resume corpus")
+    p.add_argument("--n", type=int, required=True)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--layout", choices=LAYOUTS, default="mixed")
+    p.add_argument("--out", required=True, help="ZIP to write; the manifest goes next to it (.json)")
+    args = p.parse_args(argv)
+    manifest = build_corpus(args.out, args.n, args.seed, args.layout)
+    with open(args.out + ".json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
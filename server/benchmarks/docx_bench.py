@@ -0,0 +1,145 @@
+# File: benchmarks/docx_bench.py
+# --------------------------------------------------------------------------
+# DOCX text extraction: python-docx (paragraphs only, what read_resumes
+# used) vs docx_stream (iterparse, tables / text boxes / headers too).
+#
+#   cd server
+#   python -m benchmarks.docx_bench --files 500 --output docx.json
+#
+# Per extractor: p50 / p99 ms per file on synthetic resumes (plain, with a
+# skills table, long), time and peak RSS growth on one very large document
+# (fresh child process each, since lxml allocations are invisible to
+# tracemalloc), and how many of the table cells each one returns.
+# --------------------------------------------------------------------------
+
+import argparse
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import docx
+import numpy as np
+
+import docx_stream
+from benchmarks.corpus import _skill_table, make_docx, resume_lines
+from benchmarks.run_pipeline import SERVER_DIR, _peak_rss_mb
+
+
+def _python_docx(data: bytes) -> str:
+    return "\n".join(p.text for p in docx.Document(io.BytesIO(data)).paragraphs)
+
+
+EXTRACTORS = {"python-docx": _python_docx, "docx_stream": docx_stream.extract_text}
+
+
+def build_files(n: int, seed: int) -> list:
+    """[(kind, bytes, table cell texts)] — a third each plain / table / long."""
+    rng = random.Random(seed)
+    files = []
+    for i in range(n):
+        kind = ("plain", "table", "long")[i % 3]
+        table = _skill_table(rng) if kind == "table" else None
+        lines = resume_lines(rng, 12, 22) if kind == "long" else resume_lines(rng)
+        cells = [c for row in table for c in row] if table else []
+        files.append((kind, make_docx(lines, table), cells))
+    return files
+
+
+def measure_child(name: str, path: str) -> dict:
+    """Runs in a fresh process: one extraction of path, peak RSS growth."""
+    with open(path, "rb") as f:
+        data = f.read()
+    before = _peak_rss_mb()
+    t0 = time.perf_counter()
+    text = EXTRACTORS[name](data)
+    return {
+        "large_doc_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "rss_growth_mb_large_doc": round(_peak_rss_mb() - before, 1),
+        "large_doc_chars": len(text),
+    }
+
+
+def _measure_large(name: str, path: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.docx_bench", "--child", name, "--large-path", path],
+        cwd=SERVER_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(n: int, seed: int, large_pages: int) -> dict:
+    files = build_files(n, seed)
+    rng = random.Random(seed + 1)
+    big_lines = [ln for _ in range(large_pages) for ln in resume_lines(rng, 6, 6)]
+    big = make_docx(big_lines, _skill_table(rng, 12))
+
+    with tempfile.NamedTemporaryFile(suffix=".docx", delete=False) as f:
+        f.write(big)
+    report = {"files": n, "large_doc_kb": round(len(big) / 1024, 1), "extractors": {}}
+    for name, fn in EXTRACTORS.items():
+        times, found, total = [], 0, 0
+        for _, data, cells in files:
+            t0 = time.perf_counter()
+            text = fn(data)
+            times.append(time.perf_counter() - t0)
+            found += sum(c in text for c in cells)
+            total += len(cells)
+        ms = np.asarray(times) * 1000
+        report["extractors"][name] = {
+            "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p99_ms": round(float(np.percentile(ms, 99)), 3),
+            "total_s": round(float(ms.sum()) / 1000, 3),
+            "table_cells_found": f"{found}/{total}",
+            **_measure_large(name, f.name),
+        }
+    os.remove(f.name)
+    return report
+
+
+def _print_report(r: dict, baseline: dict = None) -> None:
+    print(f"\n📊 {r['files']} DOCX resumes + one {r['large_doc_kb']} KB document")
+    print(f"   {'extractor':<14}{'p50 ms':>9}{'p99 ms':>9}{'total s':>9}{'cells':>12}"
+          f"{'large ms':>10}{'large +RSS MB':>15}{'large chars':>13}")
+    for name, s in r["extractors"].items():
+        print(f"   {name:<14}{s['p50_ms']:>9}{s['p99_ms']:>9}{s['total_s']:>9}{s['table_cells_found']:>12}"
+              f"{s['large_doc_ms']:>10}{s['rss_growth_mb_large_doc']:>15}{s['large_doc_chars']:>13}")
+        b = (baseline or {}).get("extractors", {}).get(name)
+        if b:
+            delta = (s["total_s"] - b["total_s"]) / (b["total_s"] or 1) * 100
+            print(f"   {'':<14}vs baseline: total {b['total_s']} s ({delta:+.1f}%)")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="python-docx vs streaming DOCX extraction")
+    p.add_argument("--files", type=int, default=500)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--large-pages", type=int, default=200, help="size of the large document (≈ pages)")
+    p.add_argument("--output", help="write the JSON report here")
+    p.add_argument("--baseline", help="previous --output file to compare against")
+    p.add_argument("--child", choices=EXTRACTORS, help=argparse.SUPPRESS)
+    p.add_argument("--large-path", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure_child(args.child, args.large_path)))
+        return
+
+    report = run(args.files, args.seed, args.large_pages)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    _print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
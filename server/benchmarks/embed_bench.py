@@ -0,0 +1,157 @@
+# File: benchmarks/embed_bench.py
+# --------------------------------------------------------------------------
+# Embedding backends: sentence-transformers (PyTorch) vs onnx_embedder
+# (ONNX Runtime, int8). Each backend runs in a fresh child process:
+#   • load time and peak RSS after import + model load and after encoding
+#   • sentences / s over resume-sized chunks of the synthetic corpus
+#   • cosine agreement of every vector with the PyTorch one
+#
+#   cd server
+#   python -m onnx_embedder export          # once
+#   python -m benchmarks.embed_bench --sentences 5000 --output embed.json
+# --------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.corpus import resume_lines
+from benchmarks.run_pipeline import SERVER_DIR, _peak_rss_mb
+
+BACKENDS = ("torch", "onnx")
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def build_sentences(n: int, seed: int) -> list:
+    """Mix of short lines and ~1000-character windows, as embed_resumes sends."""
+    rng = random.Random(seed)
+    out = []
+    while len(out) < n:
+        lines = resume_lines(rng)
+        out.append(" ".join(lines)[:1000] if rng.random() < 0.6 else rng.choice(lines))
+    return out
+
+
+# ─── child: one backend ────────────────────────────────────────────────
+def run_child(backend: str, sentences_path: str, vectors_path: str, batch_size: int) -> dict:
+    sys.path.insert(0, SERVER_DIR)
+    with open(sentences_path) as f:
+        sentences = json.load(f)
+    rss_start = _peak_rss_mb()
+    t0 = time.perf_counter()
+    import onnx_embedder
+    model, _ = onnx_embedder.load_encoder(backend, MODEL_NAME)
+    load_s = time.perf_counter() - t0
+    rss_loaded = _peak_rss_mb()
+
+    model.encode(sentences[:batch_size], batch_size=batch_size, normalize_embeddings=True)    # warm-up
+    t0 = time.perf_counter()
+    vecs = np.asarray(model.encode(sentences, batch_size=batch_size, normalize_embeddings=True), dtype="float32")
+    encode_s = time.perf_counter() - t0
+    np.save(vectors_path, vecs)
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "encode_s": round(encode_s, 2),
+        "sentences_per_s": round(len(sentences) / encode_s, 1) if encode_s else 0.0,
+        "rss_mb_loaded": round(rss_loaded - rss_start, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# ─── parent ────────────────────────────────────────────────────────────
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="embed-bench-")
+    sentences_path = os.path.join(workdir, "sentences.json")
+    with open(sentences_path, "w") as f:
+        json.dump(build_sentences(args.sentences, args.seed), f)
+
+    report = {"sentences": args.sentences, "batch_size": args.batch_size, "backends": {}}
+    vectors = {}
+    for backend in args.backends:
+        vectors_path = os.path.join(workdir, f"{backend}.npy")
+        print(f"⏱️ Encoding with {backend} ...", flush=True)
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.embed_bench", "--child", backend,
+             "--sentences-path", sentences_path, "--vectors-path", vectors_path,
+             "--batch-size", str(args.batch_size)],
+            cwd=SERVER_DIR, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"❌ {backend} failed:\n{proc.stderr[-2000:]}")
+            continue
+        report["backends"][backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+        vectors[backend] = np.load(vectors_path)
+
+    if "torch" in vectors:
+        ref = vectors["torch"]
+        for backend, vecs in vectors.items():
+            if backend == "torch":
+                continue
+            cos = np.sum(ref * vecs, axis=1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(vecs, axis=1) + 1e-12)
+            # do both backends rank the same neighbours first? (top-10 overlap, first 500 queries)
+            q = slice(0, min(500, len(ref)))
+            top_ref = np.argsort(-(ref[q] @ ref.T), axis=1)[:, 1:11]
+            top_new = np.argsort(-(vecs[q] @ vecs.T), axis=1)[:, 1:11]
+            overlap = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(top_ref, top_new)])
+            report["backends"][backend]["cosine_vs_torch"] = {
+                "mean": round(float(cos.mean()), 5),
+                "p1": round(float(np.percentile(cos, 1)), 5),
+                "min": round(float(cos.min()), 5),
+                "top10_overlap": round(float(overlap), 3),
+            }
+    return report
+
+
+def _print_report(r: dict, baseline: dict = None) -> None:
+    print(f"\n📊 {r['sentences']} sentences, batch size {r['batch_size']}")
+    print(f"   {'backend':<8}{'sent/s':>10}{'load s':>9}{'+RSS MB':>10}{'peak MB':>10}"
+          f"{'cos mean':>10}{'cos min':>10}{'top10':>8}")
+    for name, s in r["backends"].items():
+        c = s.get("cosine_vs_torch", {})
+        print(f"   {name:<8}{s['sentences_per_s']:>10}{s['load_s']:>9}{s['rss_mb_loaded']:>10}{s['peak_rss_mb']:>10}"
+              f"{c.get('mean', ''):>10}{c.get('min', ''):>10}{c.get('top10_overlap', ''):>8}")
+        b = (baseline or {}).get("backends", {}).get(name)
+        if b:
+            delta = (s["sentences_per_s"] - b["sentences_per_s"]) / (b["sentences_per_s"] or 1) * 100
+            print(f"   {'':<8}vs baseline: {b['sentences_per_s']} sent/s ({delta:+.1f}%), peak {b['peak_rss_mb']} MB")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="PyTorch vs ONNX int8 embedding backend")
+    p.add_argument("--sentences", type=int, default=5000)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    p.add_argument("--output", help="write the JSON report here")
+    p.add_argument("--baseline", help="previous --output file to compare against")
+    p.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    p.add_argument("--sentences-path", help=argparse.SUPPRESS)
+    p.add_argument("--vectors-path", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.sentences_path, args.vectors_path, args.batch_size)))
+        return
+
+    report = run(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    _print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# File: benchmarks/fake_groq.py
+# --------------------------------------------------------------------------
+# Local OpenAI-compatible chat endpoint standing in for Groq during
+# benchmarks. Latency, error rate and a requests/min limit (→ 429 with
+# Retry-After) are configurable; every call is counted.
+# --------------------------------------------------------------------------
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency_ms=300.0, jitter_ms=100.0, error_rate=0.0,
+                 rpm_limit=0, seed=7):
+        super().__init__(("127.0.0.1", port), _GroqHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rpm_limit = rpm_limit
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = []                 # request timestamps inside the last minute
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+        self.tokens = {"prompt": 0, "completion": 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/openai/v1"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {**self.counts, **{f"{k}_tokens": v for k, v in self.tokens.items()}}
+
+    # ── admission: sliding one-minute window ─────────────────────────
+    def admit(self):
+        """Returns (allowed, retry_after_seconds, fail)."""
+        with self.lock:
+            self.counts["requests"] += 1
+            now = time.monotonic()
+            if self.rpm_limit:
+                self.window = [t for t in self.window if now - t < 60]
+                if len(self.window) >= self.rpm_limit:
+                    self.counts["rate_limited"] += 1
+                    return False, max(1, int(60 - (now - self.window[0])) + 1), False
+                self.window.append(now)
+            fail = self.rng.random() < self.error_rate
+            delay = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        time.sleep(delay)
+        return True, 0, fail
+
+
+def _fake_analysis(prompt: str) -> dict:
+    h = hashlib.sha1(prompt.encode("utf-8")).digest()
+    return {
+        "Key Skills": ["Python", "SQL", "AWS", "Docker"][: 1 + h[0] % 4],
+        "Overall Analysis": "Synthetic analysis produced by the benchmark stand-in.",
+        "Certifications & Courses": ["AWS Certified Cloud Practitioner"] if h[1] % 2 else [],
+        "Relevant Projects": ["Data pipeline", "REST API"][: 1 + h[2] % 2],
+        "Soft Skills": ["Communication"],
+        "Overall Match Score": h[3] % 11,
+        "Projects Relevance Score": h[4] % 11,
+        "Experience Relevance Score": h[5] % 11,
+    }
+
+
+_BATCH_SECTION_RE = re.compile(r"^### Resume (R\d+):\n", re.M)
+
+
+def _fake_batch(prompt: str) -> dict:
+    """Keyed analyses for a multi-resume prompt (one per '### Resume Rn:' section)."""
+    parts = _BATCH_SECTION_RE.split(prompt)
+    return {
+        key: {**_fake_analysis(text), "Candidate Name": "Jordan Example"}
+        for key, text in zip(parts[1::2], parts[2::2])
+    }
+
+
+class _GroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        req = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            return self._send(404, {"error": {"message": "not found"}})
+
+        srv = self.server
+        allowed, retry_after, fail = srv.admit()
+        if not allowed:
+            return self._send(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                {"Retry-After": str(retry_after)},
+            )
+        if fail:
+            with srv.lock:
+                srv.counts["errors"] += 1
+            return self._send(500, {"error": {"message": "Injected failure"}})
+
+        prompt = "\n".join(m.get("content", "") for m in req.get("messages", []))
+        if "full name of the candidate" in prompt:
+            content = "Jordan Example"
+        elif _BATCH_SECTION_RE.search(prompt):
+            content = json.dumps(_fake_batch(prompt))
+        else:
+            content = json.dumps(_fake_analysis(prompt))
+
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        with srv.lock:
+            srv.counts["ok"] += 1
+            srv.tokens["prompt"] += prompt_tokens
+            srv.tokens["completion"] += completion_tokens
+
+        self._send(200, {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": req.get("model", "mistral-saba-24b"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
@@ -0,0 +1,143 @@
+# File: benchmarks/fake_supabase.py
+# --------------------------------------------------------------------------
+# In-memory PostgREST + Storage stand-in for benchmarks. Implements just
+# what the screening pipeline uses: select / insert / update / delete with
+# eq. filters, .single() via the pgrst object Accept header, and object
+# uploads. Every request is counted per (method, resource).
+# --------------------------------------------------------------------------
+
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+
+class FakeSupabaseServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency_ms=20.0):
+        super().__init__(("127.0.0.1", port), _SupabaseHandler)
+        self.latency_ms = latency_ms
+        self.lock = threading.Lock()
+        self.tables = defaultdict(list)
+        self.objects = {}
+        self.calls = defaultdict(int)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "stored_objects": len(self.objects),
+                "rows": {t: len(r) for t, r in self.tables.items()},
+            }
+
+
+def _split_filters(query: str):
+    select, filters = None, []
+    for k, v in parse_qsl(query, keep_blank_values=True):
+        if k == "select":
+            select = [c.strip() for c in v.split(",") if c.strip() and c.strip() != "*"]
+        elif k in ("order", "limit", "offset", "on_conflict", "columns"):
+            continue
+        elif v.startswith("eq."):
+            filters.append((k, v[3:]))
+    return select, filters
+
+
+def _matches(row, filters):
+    return all(str(row.get(k)) == v for k, v in filters)
+
+
+class _SupabaseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None):
+        raw = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _handle(self, method: str):
+        srv = self.server
+        parts = urlsplit(self.path)
+        body = self._body()
+        time.sleep(srv.latency_ms / 1000)
+
+        if parts.path.startswith("/storage/v1/object/"):
+            key = unquote(parts.path[len("/storage/v1/object/"):])
+            with srv.lock:
+                srv.calls[f"{method} storage"] += 1
+                srv.objects[key] = len(body)
+            return self._send(200, {"Key": key, "Id": key})
+
+        if not parts.path.startswith("/rest/v1/"):
+            return self._send(404, {"message": "not found"})
+
+        table = parts.path[len("/rest/v1/"):]
+        select, filters = _split_filters(parts.query)
+        single = "vnd.pgrst.object" in (self.headers.get("Accept") or "")
+
+        with srv.lock:
+            srv.calls[f"{method} {table}"] += 1
+            rows = srv.tables[table]
+
+            if method == "POST":
+                payload = json.loads(body or b"[]")
+                new = payload if isinstance(payload, list) else [payload]
+                rows.extend(dict(r) for r in new)
+                return self._send(201, new)
+
+            hit = [r for r in rows if _matches(r, filters)]
+            if method == "DELETE":
+                srv.tables[table] = [r for r in rows if not _matches(r, filters)]
+                return self._send(200, hit)
+            if method == "PATCH":
+                patch = json.loads(body or b"{}")
+                for r in hit:
+                    r.update(patch)
+                return self._send(200, hit)
+
+            if select:
+                hit = [{c: r.get(c) for c in select} for r in hit]
+            if single:
+                if len(hit) != 1:
+                    return self._send(406, {
+                        "message": "JSON object requested, multiple (or no) rows returned",
+                        "code": "PGRST116", "hint": None,
+                        "details": f"The result contains {len(hit)} rows",
+                    })
+                return self._send(200, hit[0])
+            return self._send(200, hit)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
@@ -0,0 +1,258 @@
+# File: benchmarks/ingest_bench.py
+# --------------------------------------------------------------------------
+# Ingestion microbenchmarks on the synthetic corpus (benchmarks/corpus.py):
+#   extract_zip → read_resumes → rank_results + job_analytics.build
+# Fully offline: no Groq, no Supabase, no embedding model.
+#
+#   cd server
+#   python -m benchmarks.ingest_bench --sizes 1000 10000 100000 \
+#          --workers 4 --output ingest.json --baseline previous_ingest.json
+#
+# Corpora are cached per (size, seed, layout) under --cache-dir, so repeat
+# runs time the same bytes. Each size runs in a fresh child process (peak
+# RSS per run). Above --read-sample files, read_resumes runs on a fixed
+# sample of the extracted tree and the full-size time is extrapolated.
+# --------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from benchmarks.run_pipeline import SERVER_DIR, _peak_rss_mb
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "screening-ingest-corpus")
+
+
+# ─── corpus cache ──────────────────────────────────────────────────────
+def cached_corpus(cache_dir: str, size: int, seed: int, layout: str) -> dict:
+    """Manifest of the cached corpus, built on first use."""
+    from benchmarks.corpus import build_corpus
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"corpus_{size}_{seed}_{layout}.zip")
+    if os.path.exists(path + ".json") and os.path.exists(path):
+        with open(path + ".json") as f:
+            return json.load(f)
+
+    print(f"🏗️ Building {size}-file corpus → {path}", flush=True)
+    t0 = time.perf_counter()
+    manifest = build_corpus(path + ".part", size, seed, layout)
+    os.replace(path + ".part", path)
+    manifest.update(path=path, build_s=round(time.perf_counter() - t0, 2), bytes=os.path.getsize(path))
+    with open(path + ".json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# ─── child: one corpus size ────────────────────────────────────────────
+def _sample_tree(folder: str, dest: str, n: int, seed: int) -> int:
+    """Hard-links (or copies) a fixed sample of n files of folder into dest."""
+    files = sorted(
+        os.path.join(root, f) for root, _, names in os.walk(folder) for f in names
+        if not f.lower().endswith(".zip")
+    )
+    picked = random.Random(seed).sample(files, min(n, len(files)))
+    for i, src in enumerate(picked):
+        target = os.path.join(dest, f"{i // 1000:03d}", os.path.basename(src))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(src, target)
+        except OSError:
+            with open(src, "rb") as a, open(target, "wb") as b:
+                b.write(a.read())
+    return len(files)
+
+
+def _latency(xs: list) -> dict:
+    arr = np.asarray(xs or [0.0]) * 1000
+    return {
+        "count": len(xs),
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p99_ms": round(float(np.percentile(arr, 99)), 2),
+        "total_s": round(float(arr.sum()) / 1000, 3),
+    }
+
+
+def _synthetic_results(n: int, seed: int) -> list:
+    """Analysed-resume entries shaped like process_resumes_in_batches output."""
+    from benchmarks.corpus import SKILLS
+
+    rng = random.Random(seed)
+    results = []
+    for i in range(n):
+        match, exp, proj = rng.randint(0, 10), rng.randint(0, 10), rng.randint(0, 10)
+        results.append({
+            "filename": f"resume_{i:06d}.pdf",
+            "candidate_name": f"Candidate {i}",
+            "analysis": {
+                "Overall Match Score": match,
+                "Experience Relevance Score": exp,
+                "Projects Relevance Score": proj,
+                "Final Score": round(match + exp * 0.5 + proj * 0.5 + rng.random(), 3),
+                "Key Skills": rng.sample(SKILLS, rng.randint(3, 8)),
+                "Soft Skills": rng.sample(["Communication", "Leadership", "Teamwork", "Ownership"], 2),
+                "Certifications & Courses": ["AWS Certified Developer"] if rng.random() < 0.3 else [],
+                "Relevant Projects": [],
+            },
+        })
+    return results
+
+
+def run_child(manifest: dict, workdir: str, report_path: str, workers: int, read_sample: int) -> None:
+    os.chdir(workdir)
+    sys.path.insert(0, SERVER_DIR)
+
+    import pandas as pd
+
+    import job_analytics
+    from process_resumes import extract_zip, read_resumes
+    from rank_candidates import rank_results
+
+    size, stages = manifest["n"], {}
+    folder = os.path.join(workdir, "extracted")
+
+    t0 = time.perf_counter()
+    extract_zip(manifest["path"], folder)
+    stages["extract_zip_s"] = round(time.perf_counter() - t0, 3)
+
+    read_folder, files = folder, None
+    if read_sample and size > read_sample:
+        read_folder = os.path.join(workdir, "sample")
+        files = _sample_tree(folder, read_folder, read_sample, manifest["seed"])
+    t0 = time.perf_counter()
+    resumes = read_resumes(read_folder, workers=workers)
+    read_s = time.perf_counter() - t0
+    scale = files / read_sample if files else 1.0
+    stages["read_resumes_s"] = round(read_s * scale, 3)
+
+    by_format = {}
+    for r in resumes:
+        by_format.setdefault(os.path.splitext(r["filename"])[1].lstrip(".").lower(), []).append(r["extract_s"])
+
+    results = _synthetic_results(size, manifest["seed"])
+    t0 = time.perf_counter()
+    ranked, _ = rank_results(results)
+    stages["rank_results_s"] = round(time.perf_counter() - t0, 3)
+    statuses = pd.DataFrame({
+        "resume_id": [str(uuid.uuid4()) for _ in ranked],
+        "status": job_analytics.DEFAULT_STATUS,
+        "score": [r["analysis"]["Relative Ranking Score"] for r in ranked],
+    })
+    t0 = time.perf_counter()
+    job_analytics.build(ranked, statuses)
+    stages["job_analytics_s"] = round(time.perf_counter() - t0, 3)
+
+    report = {
+        "size": size,
+        "layout": manifest["layout"],
+        "corpus_mb": round(manifest["bytes"] / 1e6, 1),
+        "workers": workers,
+        "read_sampled": bool(files),
+        "resumes_loaded": round(len(resumes) * scale),
+        "resumes_expected": manifest["expected_resumes"],
+        "read_resumes_per_s": round(len(resumes) / read_s, 1) if read_s else 0.0,
+        "stages": stages,
+        "extract_by_format": {fmt: _latency(xs) for fmt, xs in sorted(by_format.items())},
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    with open(report_path, "w") as f:
+        json.dump(report, f)
+
+
+# ─── parent: corpora + one child per size ──────────────────────────────
+def run(args) -> list:
+    env = dict(os.environ)
+    # process_resumes builds its LLM client at import; nothing here calls it
+    env.setdefault("OPENAI_API_KEY", "bench")
+    env["PYTHONPATH"] = SERVER_DIR + os.pathsep + env.get("PYTHONPATH", "")
+
+    reports = []
+    for size in args.sizes:
+        manifest = cached_corpus(args.cache_dir, size, args.seed, args.layout)
+        workdir = tempfile.mkdtemp(prefix=f"ingest-bench-{size}-")
+        report_path = os.path.join(workdir, "report.json")
+        manifest_path = os.path.join(workdir, "manifest.json")
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+        print(f"⏱️ Ingesting {size} files (workdir {workdir}) ...", flush=True)
+        with open(os.path.join(workdir, "ingest.log"), "w") as log:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.ingest_bench", "--child",
+                 "--manifest", manifest_path, "--workdir", workdir, "--report-to", report_path,
+                 "--workers", str(args.workers), "--read-sample", str(args.read_sample)],
+                cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+        if proc.returncode != 0 or not os.path.exists(report_path):
+            print(f"❌ Run for {size} failed, see {workdir}/ingest.log")
+            continue
+        with open(report_path) as f:
+            reports.append(json.load(f))
+    return reports
+
+
+def _print_reports(reports: list, baseline: list = None) -> None:
+    base = {(r["size"], r["layout"]): r for r in baseline or []}
+    for r in reports:
+        sampled = " (sampled, extrapolated)" if r["read_sampled"] else ""
+        print(f"\n📊 {r['size']} files, {r['corpus_mb']} MB, {r['layout']} layout — "
+              f"{r['resumes_loaded']}/{r['resumes_expected']} resumes loaded{sampled}, "
+              f"{r['workers']} worker(s), peak RSS {r['peak_rss_mb']} MB")
+        b = base.get((r["size"], r["layout"]))
+        print(f"   {'stage':<20}{'s':>10}{'baseline':>12}{'delta':>9}")
+        for stage, s in r["stages"].items():
+            old = b["stages"].get(stage) if b else None
+            delta = f"{(s - old) / old * 100:+.1f}%" if old else ""
+            print(f"   {stage[:-2]:<20}{s:>10}{old if old is not None else '':>12}{delta:>9}")
+        print(f"   read_resumes: {r['read_resumes_per_s']} resumes/s")
+        print(f"   {'format':<20}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+        for fmt, s in r["extract_by_format"].items():
+            print(f"   {fmt:<20}{s['count']:>8}{s['p50_ms']:>10}{s['p99_ms']:>10}")
+
+
+def main(argv=None):
+    from benchmarks.corpus import LAYOUTS
+
+    p = argparse.ArgumentParser(description="Offline ingestion microbenchmarks on a synthetic corpus")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--layout", choices=LAYOUTS, default="mixed")
+    p.add_argument("--workers", type=int, default=1, help="read_resumes extraction processes")
+    p.add_argument("--read-sample", type=int, default=10000,
+                   help="read at most this many files per size and extrapolate (0 = read all)")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    p.add_argument("--output", help="write the JSON report here")
+    p.add_argument("--baseline", help="previous --output file to compare against")
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--manifest", help=argparse.SUPPRESS)
+    p.add_argument("--report-to", help=argparse.SUPPRESS)
+    p.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+        return run_child(manifest, args.workdir, args.report_to, max(1, args.workers), args.read_sample)
+
+    reports = run(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    _print_reports(reports, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n✅ Report written → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
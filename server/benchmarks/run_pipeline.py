@@ -0,0 +1,225 @@
+# File: benchmarks/run_pipeline.py
+# --------------------------------------------------------------------------
+# End-to-end screening benchmark:
+#   process_all_resumes → upload_analysis_to_db → compute_relative_ranking
+# against local stand-ins for Groq and Supabase, so no API quota is used.
+#
+#   cd server
+#   python -m benchmarks.run_pipeline --sizes 100 1000 10000 \
+#          --groq-latency-ms 300 --error-rate 0.01 --rpm 600 \
+#          --output bench.json --baseline previous_bench.json
+#
+# Each corpus size runs in a fresh child process so peak RSS is per run.
+# The sentence-transformer is still loaded for real (it must be cached).
+# --------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_SUPABASE_KEY = "bench.fake.key"       # JWT-shaped, never validated by the stand-in
+JOB_DESCRIPTION = (
+    "Backend Software Engineer. Python, SQL, AWS, Docker and Kubernetes. "
+    "Experience building REST services and data pipelines; Kafka is a plus."
+)
+
+
+# ─── child: one corpus size, timed per stage ───────────────────────────
+class _StageTimers:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - t0)
+        return timed
+
+    def summary(self) -> dict:
+        out = {}
+        for stage, xs in self.samples.items():
+            arr = np.asarray(xs) * 1000
+            out[stage] = {
+                "count": int(arr.size),
+                "total_s": round(float(arr.sum()) / 1000, 3),
+                "p50_ms": round(float(np.percentile(arr, 50)), 2),
+                "p99_ms": round(float(np.percentile(arr, 99)), 2),
+            }
+        return out
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def run_child(size: int, seed: int, report_path: str, workdir: str, scoring_mode: str = "llm") -> None:
+    os.chdir(workdir)
+    sys.path.insert(0, SERVER_DIR)
+    from benchmarks.corpus import build_zip
+
+    zip_path = build_zip(os.path.join(workdir, "corpus.zip"), size, seed)
+
+    import process_resumes
+    import api_service
+    import rank_candidates
+
+    timers = _StageTimers()
+    process_resumes.extract_text = timers.wrap("extract_pdf", process_resumes.extract_text)
+    completions = process_resumes.client.chat.completions
+    completions.create = timers.wrap("llm_call", completions.create)
+    process_resumes.upload_resume_info_to_db = timers.wrap(
+        "storage_upload", process_resumes.upload_resume_info_to_db
+    )
+
+    job_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    out_folder = os.path.join(workdir, "resumes", job_id)
+    weights = {"experience": 1, "projects": 1}
+
+    t0 = time.perf_counter()
+    results, resume_id_map = timers.wrap("process_all_resumes", process_resumes.process_all_resumes)(
+        zip_path, JOB_DESCRIPTION, weights, out_folder, job_id, user_id, scoring_mode
+    )
+    timers.wrap("upload_analysis_to_db", api_service.upload_analysis_to_db)(
+        resume_id_map, job_id, user_id, results
+    )
+    timers.wrap("compute_relative_ranking", rank_candidates.compute_relative_ranking)(job_id, results)
+    elapsed = time.perf_counter() - t0
+
+    report = {
+        "size": size,
+        "analysed": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "resumes_per_s": round(len(results) / elapsed, 3) if elapsed else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": timers.summary(),
+    }
+    with open(report_path, "w") as f:
+        json.dump(report, f)
+
+
+# ─── parent: fakes + one child per size ────────────────────────────────
+def _diff_counts(after: dict, before: dict) -> dict:
+    return {k: after[k] - before.get(k, 0) for k in after if isinstance(after[k], (int, float))}
+
+
+def run(args) -> list:
+    from benchmarks.fake_groq import FakeGroqServer
+    from benchmarks.fake_supabase import FakeSupabaseServer
+
+    groq = FakeGroqServer(
+        latency_ms=args.groq_latency_ms, jitter_ms=args.groq_jitter_ms,
+        error_rate=args.error_rate, rpm_limit=args.rpm, seed=args.seed,
+    ).start()
+    supa = FakeSupabaseServer(latency_ms=args.supabase_latency_ms).start()
+
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "bench",
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": groq.base_url,
+        "SUPABASE_URL": supa.url,
+        "SUPABASE_KEY": FAKE_SUPABASE_KEY,
+        "PYTHONPATH": SERVER_DIR + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+
+    reports = []
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix=f"screening-bench-{size}-")
+        report_path = os.path.join(workdir, "report.json")
+        groq_before, supa_before = groq.stats(), supa.stats()
+
+        print(f"⏱️ Running {size} resumes (workdir {workdir}) ...", flush=True)
+        with open(os.path.join(workdir, "pipeline.log"), "w") as log:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.run_pipeline", "--child",
+                 "--sizes", str(size), "--seed", str(args.seed),
+                 "--report-to", report_path, "--workdir", workdir,
+                 "--scoring-mode", args.scoring_mode],
+                cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+        if proc.returncode != 0 or not os.path.exists(report_path):
+            print(f"❌ Run for {size} failed, see {workdir}/pipeline.log")
+            continue
+
+        with open(report_path) as f:
+            report = json.load(f)
+        supa_after = supa.stats()
+        report["http"] = {
+            "groq": _diff_counts(groq.stats(), groq_before),
+            "supabase_total_calls": supa_after["total_calls"] - supa_before["total_calls"],
+            "supabase_calls": _diff_counts(supa_after["calls"], supa_before["calls"]),
+        }
+        reports.append(report)
+
+    groq.shutdown()
+    supa.shutdown()
+    return reports
+
+
+def _print_reports(reports: list, baseline: list = None) -> None:
+    base = {r["size"]: r for r in baseline or []}
+    for r in reports:
+        print(f"\n📊 {r['size']} resumes — {r['resumes_per_s']} resumes/s, "
+              f"{r['elapsed_s']} s total, peak RSS {r['peak_rss_mb']} MB")
+        b = base.get(r["size"])
+        if b:
+            delta = (r["resumes_per_s"] - b["resumes_per_s"]) / (b["resumes_per_s"] or 1) * 100
+            print(f"   vs baseline: {b['resumes_per_s']} resumes/s ({delta:+.1f}%), "
+                  f"peak RSS {b['peak_rss_mb']} MB")
+        print(f"   {'stage':<26}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'total s':>10}")
+        for stage, s in r["stages"].items():
+            print(f"   {stage:<26}{s['count']:>8}{s['p50_ms']:>10}{s['p99_ms']:>10}{s['total_s']:>10}")
+        g = r["http"]["groq"]
+        print(f"   Groq: {g.get('requests', 0)} requests, {g.get('rate_limited', 0)} × 429, "
+              f"{g.get('errors', 0)} × 5xx, {g.get('prompt_tokens', 0)} prompt tokens")
+        print(f"   Supabase: {r['http']['supabase_total_calls']} requests {r['http']['supabase_calls']}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="End-to-end screening benchmark with local stand-ins")
+    p.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--groq-latency-ms", type=float, default=300.0)
+    p.add_argument("--groq-jitter-ms", type=float, default=100.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--rpm", type=int, default=0, help="requests/min before the fake answers 429 (0 = unlimited)")
+    p.add_argument("--supabase-latency-ms", type=float, default=20.0)
+    p.add_argument("--scoring-mode", choices=("llm", "offline"), default="llm")
+    p.add_argument("--output", help="write the JSON report here")
+    p.add_argument("--baseline", help="previous --output file to compare against")
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--report-to", help=argparse.SUPPRESS)
+    p.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        return run_child(args.sizes[0], args.seed, args.report_to, args.workdir, args.scoring_mode)
+
+    reports = run(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    _print_reports(reports, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n✅ Report written → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# File: clustering.py
+# --------------------------------------------------------------------------
+# Applicant groups per job ("ML research", "frontend", "data analysis", …).
+#   • spherical mini-batch k-means in NumPy over the L2-normalised resume
+#     embeddings (search_index.embed_resumes, the same vectors the search
+#     index gets)
+#   • k chosen automatically: 2…CLUSTER_MAX_K are fitted on a sample and
+#     the best mean silhouette (cosine distance, one shared distance
+#     matrix) wins
+#   • every cluster is labelled with its most distinctive Key Skills:
+#     share inside the cluster × lift over the whole job
+# add() is incremental: resumes appended to a job (e.g. as shards finish)
+# join their nearest centroid, which moves to the running mean of its
+# members; once the job has grown by REFIT_GROWTH since the last fit it is
+# re-clustered from the stored vectors.
+#   processed_data/clusters.db
+#     job_clusters    → job_id → user_id, centroids, counts, JSON payload
+#     cluster_members → (job_id, member) → cluster, float16 vector, skills
+# --------------------------------------------------------------------------
+
+import json
+import math
+import os
+import sqlite3
+import time
+from collections import Counter
+from contextlib import closing
+
+import numpy as np
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+PROCESSED_DATA_FOLDER = "processed_data"
+DB_PATH = os.path.join(PROCESSED_DATA_FOLDER, "clusters.db")
+CLUSTER_MIN_RESUMES = 20        # smaller jobs are not clustered
+CLUSTER_MAX_K = int(os.getenv("CLUSTER_MAX_K", "12"))
+FIT_SAMPLE = 4096               # k-means is fitted on at most this many resumes …
+SILHOUETTE_SAMPLE = 1500        # … and k is scored on at most this many
+BATCH_SIZE = 512
+MAX_ITER = 100
+TOLERANCE = 1e-4                # stop once no centroid moves more than this
+REFIT_GROWTH = 0.5              # re-cluster after the job grew by 50% since the last fit
+LABEL_SKILLS = 3
+TOP_SKILLS = 10
+MIN_LABEL_SHARE = 0.2           # a label skill appears in ≥ 20% of the cluster …
+MIN_LABEL_LIFT = 1.2            # … and is more common there than in the whole job
+SEED = 0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_clusters (
+    job_id      TEXT PRIMARY KEY,
+    user_id     TEXT,
+    computed_at REAL NOT NULL,
+    fitted_n    INTEGER NOT NULL,
+    centroids   BLOB NOT NULL,
+    counts      BLOB NOT NULL,
+    payload     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cluster_members (
+    job_id         TEXT NOT NULL,
+    member         TEXT NOT NULL,
+    cluster        INTEGER,
+    resume_id      TEXT,
+    filename       TEXT,
+    candidate_name TEXT,
+    score          REAL,
+    skills         TEXT,
+    vector         BLOB NOT NULL,
+    PRIMARY KEY (job_id, member)
+);
+"""
+
+os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
+
+
+def _connect():
+    db = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return closing(db)
+
+
+# ─── k-means ───────────────────────────────────────────────────────────
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _cluster_sums(x: np.ndarray, labels: np.ndarray, k: int) -> np.ndarray:
+    """Sum of the member vectors per cluster, as one matrix product (np.add.at is far slower)."""
+    onehot = np.zeros((k, len(x)), dtype=x.dtype)
+    onehot[labels, np.arange(len(x))] = 1.0
+    return onehot @ x
+
+
+def _seed_centroids(x: np.ndarray, k: int, rng) -> np.ndarray:
+    """k-means++ on unit vectors (squared distance = 2 - 2·cos)."""
+    centers = [x[rng.integers(len(x))]]
+    d2 = np.maximum(2.0 - 2.0 * (x @ centers[0]), 0.0)
+    for _ in range(1, k):
+        total = d2.sum()
+        i = rng.choice(len(x), p=d2 / total) if total > 0 else rng.integers(len(x))
+        centers.append(x[i])
+        d2 = np.minimum(d2, np.maximum(2.0 - 2.0 * (x @ x[i]), 0.0))
+    return np.array(centers, dtype="float32")
+
+
+def minibatch_kmeans(x: np.ndarray, k: int, rng) -> np.ndarray:
+    """
+    Spherical mini-batch k-means: each batch moves a centroid towards the
+    mean of its batch members with rate 1/(points seen so far).
+    Returns unit-norm centroids (k × dim).
+    """
+    centroids = _seed_centroids(x, k, rng)
+    counts = np.zeros(k)
+    for _ in range(MAX_ITER):
+        batch = x[rng.integers(0, len(x), min(BATCH_SIZE, len(x)))]
+        labels = np.argmax(batch @ centroids.T, axis=1)
+        sums = _cluster_sums(batch, labels, k)
+        hits = np.bincount(labels, minlength=k)
+        counts += hits
+        moved = hits > 0
+        previous = centroids.copy()
+        centroids[moved] += (sums[moved] - hits[moved, None] * centroids[moved]) / counts[moved, None]
+        centroids = _normalize(centroids)
+        if np.abs(centroids - previous).max() < TOLERANCE:
+            break
+    return centroids
+
+
+def _silhouette(dist: np.ndarray, labels: np.ndarray, k: int) -> float:
+    """Mean silhouette from a precomputed distance matrix, all points at once."""
+    onehot = np.zeros((len(labels), k))
+    onehot[np.arange(len(labels)), labels] = 1.0
+    sizes = onehot.sum(axis=0)
+    sums = dist @ onehot                                    # point → total distance to each cluster
+    rows = np.arange(len(labels))
+    own = sizes[labels]
+    a = np.where(own > 1, sums[rows, labels] / np.maximum(own - 1, 1), 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / sizes
+    means[:, sizes == 0] = np.inf
+    means[rows, labels] = np.inf
+    b = means.min(axis=1)
+    s = np.where((own > 1) & np.isfinite(b), (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0.0)
+    return float(s.mean())
+
+
+def fit(x: np.ndarray, seed: int = SEED):
+    """(centroids, k, silhouette) with k chosen over 2…CLUSTER_MAX_K."""
+    rng = np.random.default_rng(seed)
+    sample = x if len(x) <= FIT_SAMPLE else x[rng.choice(len(x), FIT_SAMPLE, replace=False)]
+    scored = sample if len(sample) <= SILHOUETTE_SAMPLE else \
+        sample[rng.choice(len(sample), SILHOUETTE_SAMPLE, replace=False)]
+    dist = np.maximum(1.0 - scored @ scored.T, 0.0)
+    max_k = max(2, min(CLUSTER_MAX_K, int(math.sqrt(len(x) / 2))))
+    best = None
+    for k in range(2, max_k + 1):
+        centroids = minibatch_kmeans(sample, k, rng)
+        score = _silhouette(dist, np.argmax(scored @ centroids.T, axis=1), k)
+        if best is None or score > best[2]:
+            best = (centroids, k, score)
+    return best
+
+
+# ─── labels ────────────────────────────────────────────────────────────
+def _describe(labels: np.ndarray, skills: list, scores: np.ndarray, k: int) -> list:
+    """Per non-empty cluster: size, mean Final Score, label and distinctive skills."""
+    overall = Counter(s for member in skills for s in member)
+    n = len(labels)
+    clusters = []
+    for c in range(k):
+        rows = np.flatnonzero(labels == c)
+        if not len(rows):
+            continue
+        inside = Counter(s for i in rows for s in skills[i])
+        ranked = []
+        for name, count in inside.items():
+            share = count / len(rows)
+            lift = share / (overall[name] / n)
+            ranked.append((share * lift, name, share, lift))
+        ranked.sort(reverse=True)
+        label = [name for _, name, share, lift in ranked
+                 if share >= MIN_LABEL_SHARE and lift >= MIN_LABEL_LIFT][:LABEL_SKILLS]
+        clusters.append({
+            "cluster": c,
+            "label": " / ".join(label) if label else f"cluster {c + 1}",
+            "size": int(len(rows)),
+            "share": round(len(rows) / n, 3),
+            "mean_final_score": round(float(scores[rows].mean()), 2),
+            "top_skills": [
+                {"name": name, "share": round(share, 3), "lift": round(lift, 2)}
+                for _, name, share, lift in ranked[:TOP_SKILLS]
+            ],
+        })
+    clusters.sort(key=lambda c: -c["size"])
+    return clusters
+
+
+# ─── persistence helpers ───────────────────────────────────────────────
+def _load_members(db, job_id: str):
+    rows = db.execute(
+        "SELECT member, skills, score, vector FROM cluster_members WHERE job_id = ? ORDER BY rowid", (job_id,)
+    ).fetchall()
+    members = [r[0] for r in rows]
+    skills = [json.loads(r[1]) for r in rows]
+    scores = np.array([r[2] or 0.0 for r in rows])
+    vectors = np.frombuffer(b"".join(r[3] for r in rows), dtype="float16").reshape(len(rows), -1)
+    return members, skills, scores, vectors.astype("float32")
+
+
+def _save(db, job_id, user_id, fitted_n, centroids, counts, payload, assignments) -> None:
+    db.execute("BEGIN IMMEDIATE")
+    db.executemany(
+        "UPDATE cluster_members SET cluster = ? WHERE job_id = ? AND member = ?",
+        [(int(c), job_id, m) for m, c in assignments],
+    )
+    db.execute(
+        "INSERT OR REPLACE INTO job_clusters (job_id, user_id, computed_at, fitted_n, centroids, counts, payload) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (job_id, user_id, time.time(), fitted_n, centroids.astype("float32").tobytes(),
+         counts.astype("float64").tobytes(), json.dumps(payload)),
+    )
+    db.execute("COMMIT")
+
+
+# ─── public API ────────────────────────────────────────────────────────
+def add(job_id: str, user_id: str, members: list, vectors: np.ndarray):
+    """
+    Appends resumes to a job's clustering. members: [{"member", "resume_id",
+    "filename", "candidate_name", "score", "skills"}] aligned with the rows of
+    vectors (L2-normalised). Returns the payload, or None while the job has
+    fewer than CLUSTER_MIN_RESUMES resumes.
+    """
+    if not members:
+        return None
+    t0 = time.perf_counter()
+    vectors = np.asarray(vectors, dtype="float32")
+    with _connect() as db:
+        db.execute("BEGIN IMMEDIATE")
+        db.executemany(
+            "INSERT OR REPLACE INTO cluster_members "
+            "(job_id, member, cluster, resume_id, filename, candidate_name, score, skills, vector) "
+            "VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?)",
+            [
+                (job_id, m["member"], m.get("resume_id"), m.get("filename"), m.get("candidate_name"),
+                 float(m.get("score") or 0.0), json.dumps(m.get("skills", [])), v.astype("float16").tobytes())
+                for m, v in zip(members, vectors)
+            ],
+        )
+        db.execute("COMMIT")
+        state = db.execute("SELECT fitted_n, centroids, counts FROM job_clusters WHERE job_id = ?",
+                           (job_id,)).fetchone()
+        names, skills, scores, all_vectors = _load_members(db, job_id)
+        n = len(names)
+        if n < CLUSTER_MIN_RESUMES:
+            return None
+
+        if state is None or n >= state[0] * (1 + REFIT_GROWTH):
+            centroids, k, silhouette = fit(all_vectors)
+            labels = np.argmax(all_vectors @ centroids.T, axis=1)
+            counts = np.bincount(labels, minlength=k).astype("float64")
+            fitted_n, mode = n, "fit"
+        else:
+            # incremental: only the new resumes are assigned; their centroids
+            # move to the running mean of their members
+            fitted_n, mode, silhouette = state[0], "incremental", None
+            centroids = np.frombuffer(state[1], dtype="float32").reshape(-1, all_vectors.shape[1]).copy()
+            counts = np.frombuffer(state[2], dtype="float64").copy()
+            k = len(centroids)
+            stored = dict(db.execute("SELECT member, cluster FROM cluster_members WHERE job_id = ?", (job_id,)))
+            new = np.array([stored[m] is None for m in names])
+            new_labels = np.argmax(all_vectors[new] @ centroids.T, axis=1)
+            sums = _cluster_sums(all_vectors[new], new_labels, k)
+            hits = np.bincount(new_labels, minlength=k)
+            centroids = _normalize(centroids * counts[:, None] + sums)
+            counts += hits
+            labels = np.array([-1 if stored[m] is None else stored[m] for m in names])
+            labels[new] = new_labels
+
+        payload = {
+            "k": k,
+            "resumes": n,
+            "fitted_on": fitted_n,
+            "silhouette": None if silhouette is None else round(silhouette, 3),
+            "clusters": _describe(labels, skills, scores, k),
+        }
+        if mode == "incremental":
+            previous = db.execute("SELECT payload FROM job_clusters WHERE job_id = ?", (job_id,)).fetchone()
+            payload["silhouette"] = json.loads(previous[0]).get("silhouette")
+        _save(db, job_id, user_id, fitted_n, centroids, counts, payload, zip(names, labels))
+    print(f"🧭 Clusters for job {job_id}: {n} resumes → {k} groups ({mode}) "
+          f"in {time.perf_counter() - t0:.2f}s")
+    return payload
+
+
+def get(job_id: str):
+    """(user_id, payload) or None when the job has no clusters."""
+    with _connect() as db:
+        row = db.execute(
+            "SELECT user_id, computed_at, payload FROM job_clusters WHERE job_id = ?", (job_id,)
+        ).fetchone()
+    if not row:
+        return None
+    user_id, computed_at, payload = row
+    payload = json.loads(payload)
+    payload["job_id"], payload["computed_at"] = job_id, computed_at
+    return user_id, payload
+
+
+def members(job_id: str, cluster: int, limit: int = 100) -> list:
+    """Candidates of one cluster, best Final Score first."""
+    with _connect() as db:
+        rows = db.execute(
+            "SELECT resume_id, filename, candidate_name, score FROM cluster_members "
+            "WHERE job_id = ? AND cluster = ? ORDER BY score DESC LIMIT ?",
+            (job_id, cluster, limit),
+        ).fetchall()
+    return [
+        {"resume_id": r[0], "filename": r[1], "candidate_name": r[2], "final_score": r[3]}
+        for r in rows
+    ]
+
+
+def delete(job_id: str) -> None:
+    with _connect() as db:
+        db.execute("DELETE FROM cluster_members WHERE job_id = ?", (job_id,))
+        db.execute("DELETE FROM job_clusters WHERE job_id = ?", (job_id,))
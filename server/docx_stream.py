@@ -0,0 +1,151 @@
+# File: docx_stream.py
+# --------------------------------------------------------------------------
+# Streaming text extraction for .docx resumes (replaces python-docx, which
+# builds the whole object model and only returns body paragraphs).
+#   • parts are read straight from the ZIP with iterparse, and each
+#     top-level block is cleared once emitted, so memory stays flat
+#     whatever the document size
+#   • output follows reading order: headers, body, footers; inside the
+#     body paragraphs, table rows (cells joined with " | ", nested tables
+#     inline) and text boxes (emitted before their anchor paragraph)
+#   • w:tab / w:br become tab / newline; deleted text (w:delText), field
+#     codes and the VML fallback copy of each text box are skipped
+#   • identical header / footer parts (first page, even pages) appear once
+# --------------------------------------------------------------------------
+
+import io
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+_OFFICE_DOCUMENT = "/officeDocument"
+DEFAULT_DOCUMENT = "word/document.xml"
+CELL_SEPARATOR = " | "
+
+_P, _T, _TAB, _BR, _CR = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr"
+_TBL, _TR, _TC, _SDT = _W + "tbl", _W + "tr", _W + "tc", _W + "sdt"
+_TXBX = _W + "txbxContent"
+_NB_HYPHEN = _W + "noBreakHyphen"
+_PART_ROOTS = {_W + "body", _W + "hdr", _W + "ftr"}
+_BLOCKS = {_P, _TBL, _SDT}
+
+
+# ─── package structure ─────────────────────────────────────────────────
+def _rels(zf: zipfile.ZipFile, part: str) -> list:
+    """[(type, target part)] of a part's relationships, in file order."""
+    folder, name = posixpath.split(part)
+    rels_name = posixpath.join(folder, "_rels", name + ".rels")
+    try:
+        with zf.open(rels_name) as f:
+            root = ET.parse(f).getroot()
+    except KeyError:
+        return []
+    out = []
+    for rel in root.iter(_REL):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(folder, target))
+        out.append((rel.get("Type", ""), target))
+    return out
+
+
+def _parts(zf: zipfile.ZipFile) -> tuple:
+    """(header parts, main document part, footer parts)."""
+    names = set(zf.namelist())
+    main = next((t for typ, t in _rels(zf, "") if typ.endswith(_OFFICE_DOCUMENT) and t in names), None)
+    main = main or DEFAULT_DOCUMENT
+    if main not in names:
+        raise ValueError(f"not a Word document: no {main}")
+    related = [(typ.rsplit("/", 1)[-1], t) for typ, t in _rels(zf, main) if t in names]
+    headers = list(dict.fromkeys(t for kind, t in related if kind == "header"))
+    footers = list(dict.fromkeys(t for kind, t in related if kind == "footer"))
+    return headers, main, footers
+
+
+# ─── one XML part ──────────────────────────────────────────────────────
+def _part_lines(stream) -> list:
+    lines = []
+    paras = []          # run text of each open paragraph (text boxes nest paragraphs)
+    outputs = []        # where finished paragraphs go: open table cells / text boxes
+    rows = []           # cells of each open table row (tables nest inside cells)
+    skip = 0            # depth inside mc:Fallback
+    root = None
+
+    def emit(text):
+        (outputs[-1] if outputs else lines).append(text)
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if tag == _MC_FALLBACK:
+            skip += 1 if event == "start" else -1
+            if event == "end":
+                elem.clear()
+            continue
+        if skip:
+            continue
+
+        if event == "start":
+            if tag == _P:
+                paras.append([])
+            elif tag in (_TC, _TXBX):
+                outputs.append([])
+            elif tag == _TR:
+                rows.append([])
+            elif tag in _PART_ROOTS:
+                root = elem
+            continue
+
+        if tag == _T:
+            if paras and elem.text:
+                paras[-1].append(elem.text)
+        elif tag == _TAB:
+            if paras:
+                paras[-1].append("\t")
+        elif tag in (_BR, _CR):
+            if paras:
+                paras[-1].append("\n")
+        elif tag == _NB_HYPHEN:
+            if paras:
+                paras[-1].append("-")
+        elif tag == _P:
+            text = "".join(paras.pop()).strip()
+            if text:
+                emit(text)
+        elif tag == _TC:
+            cell = " ".join(outputs.pop())
+            if rows:
+                rows[-1].append(cell)
+        elif tag == _TXBX:
+            for text in outputs.pop():
+                emit(text)
+        elif tag == _TR:
+            row = CELL_SEPARATOR.join(c for c in rows.pop() if c)
+            if row:
+                emit(row)
+
+        # top-level block done: drop it from the tree
+        if tag in _BLOCKS and root is not None and not paras and not rows and not outputs:
+            root.clear()
+    return lines
+
+
+# ─── public API ────────────────────────────────────────────────────────
+def extract_text(source) -> str:
+    """Text of a .docx given as a path, bytes or binary file object."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as zf:
+        headers, main, footers = _parts(zf)
+        blocks, seen = [], set()
+        for part in headers + [main] + footers:
+            with zf.open(part) as f:
+                block = "\n".join(_part_lines(f))
+            if block and (part == main or block not in seen):
+                seen.add(block)
+                blocks.append(block)
+    return "\n".join(blocks)
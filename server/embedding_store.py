@@ -0,0 +1,220 @@
+# File: embedding_store.py
+# --------------------------------------------------------------------------
+# Persistent embedding cache shared by every process on the host.
+#   indexes/embeddings/<model>/vectors.bin → row-major matrix (float16 by
+#                                            default), appended, read via mmap
+#   indexes/embeddings/<model>/keys.db     → blake2b(text) → row, plus meta
+# Keys are per model (and per normalize_embeddings), so a model swap never
+# returns stale vectors. Misses are encoded in one batched call and
+# appended under SQLite's write lock (BEGIN IMMEDIATE), which also orders
+# appends between worker processes. Readers map the file read-only; the
+# pages live once in the OS page cache however many workers read them.
+#
+# cached(model, name) wraps a SentenceTransformer so existing encode()
+# callers (search index, offline scoring, multi-JD prefilter, clustering,
+# query embedding) get the cache without changes.
+# --------------------------------------------------------------------------
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+
+import metrics
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+EMBEDDING_CACHE_FOLDER = os.getenv("EMBEDDING_CACHE_DIR", os.path.join("indexes", "embeddings"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1") != "0"
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")     # or float32
+LOOKUP_CHUNK = 500              # keys per SELECT … IN (…)
+CACHED_KWARGS = {"batch_size", "normalize_embeddings", "show_progress_bar"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (key BLOB PRIMARY KEY, row INTEGER NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+# ─── one model's store ─────────────────────────────────────────────────
+class EmbeddingStore:
+    def __init__(self, name: str, folder: str = EMBEDDING_CACHE_FOLDER, dtype: str = EMBEDDING_CACHE_DTYPE):
+        self.name = name
+        self.folder = os.path.join(folder, re.sub(r"[^A-Za-z0-9._-]+", "_", name))
+        self.dtype = np.dtype(dtype)
+        self._vectors_path = os.path.join(self.folder, "vectors.bin")
+        self._db_path = os.path.join(self.folder, "keys.db")
+        self._lock = threading.Lock()
+        self._map = None                # read-only np.memmap over the first _mapped_rows rows
+        self._mapped_rows = 0
+        os.makedirs(self.folder, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('dtype', ?)", (self.dtype.name,))
+            stored = db.execute("SELECT value FROM meta WHERE key = 'dtype'").fetchone()[0]
+        if stored != self.dtype.name:
+            # the file was written with another dtype; follow it rather than misread rows
+            print(f"⚠️ Embedding cache {self.name} is {stored}, not {self.dtype.name}; using {stored}")
+            self.dtype = np.dtype(stored)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self._db_path, timeout=60, isolation_level=None))
+
+    @staticmethod
+    def _meta_int(db, key: str) -> int:
+        row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    # ── reads ────────────────────────────────────────────────────────
+    def matrix(self, min_rows: int = 0):
+        """
+        Read-only memory-mapped view of the stored vectors (no copy), remapped
+        when rows beyond the current mapping are needed. None while empty.
+        """
+        with self._lock:
+            if self._map is None or self._mapped_rows < min_rows or not min_rows:
+                with self._connect() as db:
+                    rows, dim = self._meta_int(db, "rows"), self._meta_int(db, "dim")
+                if rows and rows != self._mapped_rows:
+                    self._map = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, dim))
+                    self._mapped_rows = rows
+            return self._map
+
+    def lookup(self, keys: list) -> dict:
+        """{key: row} for the keys that are stored."""
+        found = {}
+        with self._connect() as db:
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[i:i + LOOKUP_CHUNK]
+                found.update(db.execute(
+                    f"SELECT key, row FROM vectors WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        return found
+
+    def get(self, keys: list):
+        """(float32 matrix with a row per key, mask of keys found); missing rows are zero."""
+        found = self.lookup(keys)
+        out, mask = None, np.zeros(len(keys), dtype=bool)
+        if found:
+            mapped = self.matrix(max(found.values()) + 1)
+            out = np.zeros((len(keys), mapped.shape[1]), dtype="float32")
+            idx = [(i, found[k]) for i, k in enumerate(keys) if k in found]
+            pos, rows = np.asarray([i for i, _ in idx]), np.asarray([r for _, r in idx])
+            out[pos] = mapped[rows]
+            mask[pos] = True
+        return out, mask
+
+    # ── writes ───────────────────────────────────────────────────────
+    def put(self, keys: list, vectors: np.ndarray) -> int:
+        """Appends vectors for keys not stored yet; returns how many were added."""
+        vectors = np.asarray(vectors, dtype=self.dtype)
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")          # one appender at a time, across processes
+            try:
+                present = self._lookup_in(db, keys)
+                fresh, seen = [], set(present)
+                for i, k in enumerate(keys):
+                    if k not in seen:
+                        seen.add(k)
+                        fresh.append(i)
+                if not fresh:
+                    db.execute("ROLLBACK")
+                    return 0
+                rows, dim = self._meta_int(db, "rows"), self._meta_int(db, "dim")
+                if dim and dim != vectors.shape[1]:
+                    raise ValueError(f"embedding cache {self.name} holds {dim}-d vectors, got {vectors.shape[1]}")
+                # rows past the counter are leftovers of an interrupted append: overwrite them
+                with open(self._vectors_path, "r+b" if os.path.exists(self._vectors_path) else "wb") as f:
+                    f.seek(rows * vectors.shape[1] * self.dtype.itemsize)
+                    f.write(np.ascontiguousarray(vectors[fresh]).tobytes())
+                db.executemany("INSERT INTO vectors VALUES (?, ?)",
+                               [(keys[i], rows + n) for n, i in enumerate(fresh)])
+                db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                               [("rows", str(rows + len(fresh))), ("dim", str(vectors.shape[1]))])
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return len(fresh)
+
+    @staticmethod
+    def _lookup_in(db, keys: list) -> set:
+        present = set()
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[i:i + LOOKUP_CHUNK]
+            present.update(k for (k,) in db.execute(
+                f"SELECT key FROM vectors WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return present
+
+    def stats(self) -> dict:
+        with self._connect() as db:
+            rows, dim = self._meta_int(db, "rows"), self._meta_int(db, "dim")
+        return {"model": self.name, "rows": rows, "dim": dim, "dtype": self.dtype.name,
+                "mb": round(rows * dim * self.dtype.itemsize / 1e6, 1)}
+
+
+# ─── drop-in encoder ───────────────────────────────────────────────────
+class CachedEncoder:
+    """Wraps a SentenceTransformer; encode() serves stored vectors and batches the misses."""
+
+    def __init__(self, model, name: str, folder: str = EMBEDDING_CACHE_FOLDER):
+        self.model, self.name, self.folder = model, name, folder
+        self._stores = {}
+        self._stores_lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if attr.startswith("__") or "model" not in self.__dict__:
+            raise AttributeError(attr)
+        return getattr(self.__dict__["model"], attr)
+
+    def store(self, normalize: bool) -> EmbeddingStore:
+        with self._stores_lock:
+            if normalize not in self._stores:
+                self._stores[normalize] = EmbeddingStore(self.name if normalize else f"{self.name}-raw", self.folder)
+            return self._stores[normalize]
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        if not EMBEDDING_CACHE_ENABLED or set(kwargs) - CACHED_KWARGS:
+            return self.model.encode(sentences, batch_size=batch_size,
+                                     normalize_embeddings=normalize_embeddings, **kwargs)
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings)
+
+        store = self.store(normalize_embeddings)
+        keys = [text_key(t) for t in texts]
+        out, mask = store.get(keys)
+
+        missing = {}                    # key → first position, duplicates encoded once
+        for i in np.flatnonzero(~mask):
+            missing.setdefault(keys[i], i)
+        if missing:
+            vecs = np.asarray(self.model.encode(
+                [texts[i] for i in missing.values()], batch_size=batch_size,
+                normalize_embeddings=normalize_embeddings, **kwargs,
+            ), dtype="float32")
+            if out is None:
+                out = np.zeros((len(texts), vecs.shape[1]), dtype="float32")
+            by_key = dict(zip(missing, vecs))
+            for i in np.flatnonzero(~mask):
+                out[i] = by_key[keys[i]]
+            try:
+                store.put(list(missing), vecs)
+            except (sqlite3.Error, OSError, ValueError) as e:
+                print(f"⚠️ Embedding cache write failed for {store.name}: {e}")
+        metrics.EMBEDDING_CACHE.labels("hit").inc(int(mask.sum()))
+        metrics.EMBEDDING_CACHE.labels("miss").inc(len(texts) - int(mask.sum()))
+        return out[0] if single else out
+
+
+def cached(model, name: str) -> CachedEncoder:
+    return CachedEncoder(model, name)
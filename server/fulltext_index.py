@@ -0,0 +1,269 @@
+# File: fulltext_index.py
+# --------------------------------------------------------------------------
+# BM25 full-text index over the complete extracted resume text.
+#   indexes/<user_id>/fulltext.db
+#     docs      → doc_id, resume_id, job_id, filename, token length,
+#                 zlib-compressed original text (for snippets)
+#     postings  → (term, segment) → zlib( delta doc_ids uint32 | tf uint16 )
+# Every ingestion batch writes a new segment per term; terms with too many
+# segments are merged in place, so updates never rewrite the whole index.
+# Writers from several processes (serve.py workers, screening_cli) take
+# the database write lock up front; searches reload the document lengths
+# when another process has committed (PRAGMA data_version).
+# --------------------------------------------------------------------------
+
+import html
+import os
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+from index_paths import tenant_folder
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_SEGMENTS = 8                # per term, before segments are merged
+SNIPPET_CHARS = 220
+DB_LOCK_TIMEOUT = 60            # seconds a writer waits for another process's write
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the to was "
+    "were will with i my me we our you your this".split()
+)
+# keeps c++, c#, node.js, az-900, saa-c03 … as single tokens
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[._-][a-z0-9+#]+)*")
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+# ─── posting list codec ────────────────────────────────────────────────
+def _encode(doc_ids: np.ndarray, tfs: np.ndarray) -> bytes:
+    deltas = np.diff(doc_ids, prepend=0).astype("<u4")
+    return zlib.compress(deltas.tobytes() + np.minimum(tfs, 65535).astype("<u2").tobytes())
+
+
+def _decode(blob: bytes):
+    raw = zlib.decompress(blob)
+    n = len(raw) // 6
+    doc_ids = np.cumsum(np.frombuffer(raw[: 4 * n], dtype="<u4"), dtype="int64")
+    tfs = np.frombuffer(raw[4 * n :], dtype="<u2").astype("float32")
+    return doc_ids, tfs
+
+
+# ─── tenant index ──────────────────────────────────────────────────────
+class _FullTextIndex:
+    def __init__(self, user_id: str):
+        folder = tenant_folder(user_id)
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(
+            os.path.join(folder, "fulltext.db"), check_same_thread=False, timeout=DB_LOCK_TIMEOUT
+        )
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id INTEGER PRIMARY KEY, resume_id TEXT UNIQUE, job_id TEXT,
+                filename TEXT, length INTEGER, text BLOB
+            );
+            CREATE INDEX IF NOT EXISTS ix_docs_job ON docs(job_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT, segment INTEGER, blob BLOB, PRIMARY KEY (term, segment)
+            );
+            """
+        )
+        self.db.commit()
+        self._load_lengths()
+
+    def _data_version(self) -> int:
+        return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load_lengths(self):
+        self.version = self._data_version()
+        rows = self.db.execute("SELECT doc_id, length FROM docs").fetchall()
+        size = (max(r[0] for r in rows) + 1) if rows else 1
+        self.lengths = np.zeros(size, dtype="float32")
+        for doc_id, length in rows:
+            self.lengths[doc_id] = length
+        self.n_docs = len(rows)
+
+    def add(self, job_id: str, docs: list) -> int:
+        """docs: [{"resume_id", "filename", "text"}, ...]"""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")      # doc_ids and segments stay consistent across processes
+            try:
+                added = self._add_locked(job_id, docs)
+                self.db.commit()
+            except BaseException:
+                self.db.rollback()
+                raise
+            finally:
+                self._load_lengths()
+        return added
+
+    def _add_locked(self, job_id: str, docs: list) -> int:
+        term_docs = {}
+        added = 0
+        for d in docs:
+            if self.db.execute("SELECT 1 FROM docs WHERE resume_id = ?", (d["resume_id"],)).fetchone():
+                continue
+            tokens = tokenize(d["text"])
+            doc_id = self.db.execute(
+                "INSERT INTO docs (resume_id, job_id, filename, length, text) VALUES (?, ?, ?, ?, ?)",
+                (d["resume_id"], job_id, d["filename"], len(tokens),
+                 zlib.compress(d["text"].encode("utf-8"))),
+            ).lastrowid
+            counts = {}
+            for t in tokens:
+                counts[t] = counts.get(t, 0) + 1
+            for t, tf in counts.items():
+                term_docs.setdefault(t, []).append((doc_id, tf))
+            added += 1
+
+        for term, pairs in term_docs.items():
+            ids = np.fromiter((p[0] for p in pairs), dtype="int64")
+            tfs = np.fromiter((p[1] for p in pairs), dtype="int64")
+            segs = self.db.execute(
+                "SELECT segment, blob FROM postings WHERE term = ? ORDER BY segment", (term,)
+            ).fetchall()
+            if len(segs) >= MAX_SEGMENTS:
+                # merge: doc_ids only grow, so segments concatenate in order
+                parts = [_decode(b) for _, b in segs]
+                ids = np.concatenate([p[0] for p in parts] + [ids])
+                tfs = np.concatenate([p[1] for p in parts] + [tfs])
+                self.db.execute("DELETE FROM postings WHERE term = ?", (term,))
+                next_seg = 0
+            else:
+                next_seg = (segs[-1][0] + 1) if segs else 0
+            self.db.execute(
+                "INSERT INTO postings (term, segment, blob) VALUES (?, ?, ?)",
+                (term, next_seg, _encode(ids, tfs)),
+            )
+        return added
+
+    def postings(self, term: str):
+        blobs = self.db.execute(
+            "SELECT blob FROM postings WHERE term = ? ORDER BY segment", (term,)
+        ).fetchall()
+        if not blobs:
+            return np.empty(0, dtype="int64"), np.empty(0, dtype="float32")
+        parts = [_decode(b[0]) for b in blobs]
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def search(self, query: str, job_id: str = None, top_k: int = 20) -> list:
+        phrases = [p.lower() for p in re.findall(r'"([^"]+)"', query)]
+        terms = list(dict.fromkeys(tokenize(query.replace('"', " "))))
+        if not terms:
+            return []
+
+        with self.lock:
+            if self._data_version() != self.version:
+                self._load_lengths()            # documents added by another process
+            if self.n_docs == 0:
+                return []
+            scores = np.zeros(self.lengths.size, dtype="float32")
+            matched = np.zeros(self.lengths.size, dtype="int32")
+            avgdl = float(self.lengths.sum()) / self.n_docs
+            for term in terms:
+                doc_ids, tfs = self.postings(term)
+                if doc_ids.size and doc_ids[-1] >= self.lengths.size:
+                    keep = doc_ids < self.lengths.size      # committed by another process mid-search
+                    doc_ids, tfs = doc_ids[keep], tfs[keep]
+                if doc_ids.size == 0:
+                    continue
+                idf = np.log(1 + (self.n_docs - doc_ids.size + 0.5) / (doc_ids.size + 0.5))
+                dl = self.lengths[doc_ids]
+                scores[doc_ids] += idf * tfs * (BM25_K1 + 1) / (
+                    tfs + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl)
+                )
+                matched[doc_ids] += 1
+
+            if phrases:
+                # every token of a quoted phrase must be present before the exact check
+                need = len(set(tokenize(" ".join(phrases))))
+                scores[matched < need] = 0
+            if job_id:
+                mask = np.zeros(self.lengths.size, dtype=bool)
+                mask[[r[0] for r in self.db.execute(
+                    "SELECT doc_id FROM docs WHERE job_id = ? AND doc_id < ?", (job_id, self.lengths.size)
+                )]] = True
+                scores[~mask] = 0
+
+            candidates = np.flatnonzero(scores > 0)
+            order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            results = []
+            for doc_id in order:
+                row = self.db.execute(
+                    "SELECT resume_id, job_id, filename, text FROM docs WHERE doc_id = ?", (int(doc_id),)
+                ).fetchone()
+                text = zlib.decompress(row[3]).decode("utf-8")
+                if phrases and not all(p in " ".join(text.lower().split()) for p in phrases):
+                    continue
+                results.append({
+                    "resume_id": row[0],
+                    "job_id":    row[1],
+                    "filename":  row[2],
+                    "score":     round(float(scores[doc_id]), 4),
+                    "snippet":   make_snippet(text, terms),
+                })
+                if len(results) >= top_k:
+                    break
+        return results
+
+
+# ─── snippets ──────────────────────────────────────────────────────────
+def make_snippet(text: str, terms: list, width: int = SNIPPET_CHARS) -> str:
+    """Picks the window with the most query-term hits and wraps hits in <mark>."""
+    text = " ".join(text.split())
+    wanted = set(terms)
+    hits = [(m.start(), m.end()) for m in _TOKEN_RE.finditer(text.lower()) if m.group() in wanted]
+    if not hits:
+        return html.escape(text[:width])
+
+    starts = np.array([h[0] for h in hits])
+    # hits covered by a window starting at each hit
+    covered = np.searchsorted(starts, starts + width, side="left") - np.arange(len(starts))
+    best = int(np.argmax(covered))
+    lo = max(0, starts[best] - width // 6)
+    lo = text.rfind(" ", 0, lo) + 1 if lo > 0 else 0
+    hi = min(len(text), lo + width)
+
+    out, pos = [], lo
+    for s, e in hits:
+        if s < lo or e > hi:
+            continue
+        out.append(html.escape(text[pos:s]))
+        out.append(f"<mark>{html.escape(text[s:e])}</mark>")
+        pos = e
+    out.append(html.escape(text[pos:hi]))
+    return ("…" if lo > 0 else "") + "".join(out) + ("…" if hi < len(text) else "")
+
+
+# ─── public API ────────────────────────────────────────────────────────
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _get_index(user_id: str) -> _FullTextIndex:
+    with _indexes_lock:
+        idx = _indexes.get(user_id)
+        if idx is None:
+            idx = _indexes[user_id] = _FullTextIndex(user_id)
+        return idx
+
+
+def add_documents(user_id: str, job_id: str, docs: list) -> int:
+    if not user_id or not docs:
+        return 0
+    added = _get_index(user_id).add(job_id, docs)
+    print(f"📚 Full-text index: +{added} resumes for recruiter {user_id} (job {job_id})")
+    return added
+
+
+def search(user_id: str, query: str, job_id: str = None, top_k: int = 20) -> list:
+    return _get_index(user_id).search(query, job_id=job_id, top_k=top_k)
@@ -0,0 +1,28 @@
+# File: index_paths.py
+# --------------------------------------------------------------------------
+# On-disk layout of the per-recruiter search indexes:
+#   indexes/<user_id>/   → vectors.faiss + meta.db   (search_index)
+#                          fulltext.db               (fulltext_index)
+#                          skills.db                 (skill_index)
+# user_id comes from the JWT sub, so it must be a UUID before it becomes a
+# path component; anything else ("../x", "", None) raises ValueError.
+# --------------------------------------------------------------------------
+
+import os
+import uuid
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+INDEX_FOLDER = "indexes"
+
+os.makedirs(INDEX_FOLDER, exist_ok=True)
+
+
+def tenant_folder(user_id: str) -> str:
+    """indexes/<user_id> (created if needed) for a UUID user_id."""
+    try:
+        canonical = str(uuid.UUID(str(user_id)))
+    except ValueError:
+        raise ValueError(f"user_id must be a UUID, got {user_id!r}") from None
+    folder = os.path.join(INDEX_FOLDER, canonical)
+    os.makedirs(folder, exist_ok=True)
+    return folder
@@ -0,0 +1,237 @@
+# File: job_analytics.py
+# --------------------------------------------------------------------------
+# Materialized per-job aggregates for the recruiter dashboard:
+#   processed_data/analytics.db
+#     job_analytics    → job_id → user_id, computed_at, JSON payload:
+#                        score histograms + percentiles, top skills,
+#                        certification counts, status funnel
+#     candidate_status → (job_id, resume_id) → status, relative score
+# materialize() runs once when compute_relative_ranking finishes (one
+# vectorized pass with NumPy / pandas over the job's results);
+# record_status() then moves one candidate between funnel buckets, so
+# /update-status/ never re-aggregates and the dashboard reads one row.
+# --------------------------------------------------------------------------
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from skill_index import normalize_skill, split_skills
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+PROCESSED_DATA_FOLDER = "processed_data"
+DB_PATH = os.path.join(PROCESSED_DATA_FOLDER, "analytics.db")
+DEFAULT_STATUS = "unreviewed"
+FUNNEL_ORDER = ("unreviewed", "shortlisted", "rejected")
+TOP_SKILLS = 25
+TOP_CERTIFICATIONS = 15
+PERCENTILES = (10, 25, 50, 75, 90)
+RELATIVE_BINS = np.linspace(0, 100, 11)          # 0-10, 10-20, … 90-100
+SUBSCORE_BINS = np.arange(0, 12) - 0.5           # integer 0…10 scores
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_analytics (
+    job_id      TEXT PRIMARY KEY,
+    user_id     TEXT,
+    computed_at REAL NOT NULL,
+    payload     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS candidate_status (
+    job_id    TEXT NOT NULL,
+    resume_id TEXT NOT NULL,
+    status    TEXT NOT NULL,
+    score     REAL,
+    PRIMARY KEY (job_id, resume_id)
+);
+"""
+
+os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
+
+
+def _connect():
+    db = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return closing(db)
+
+
+# ─── aggregation ───────────────────────────────────────────────────────
+def _histogram(values: np.ndarray, bins: np.ndarray, labels: list) -> list:
+    counts, _ = np.histogram(values, bins=bins)
+    return [{"bin": label, "count": int(c)} for label, c in zip(labels, counts)]
+
+
+def _distribution(values: np.ndarray) -> dict:
+    if not len(values):
+        return {"mean": None, "percentiles": {}}
+    pct = np.percentile(values, PERCENTILES)
+    return {
+        "mean": round(float(values.mean()), 2),
+        "percentiles": {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, pct)},
+    }
+
+
+def _value_counts(lists: pd.Series, n: int, total: int) -> list:
+    """Top n names over per-candidate lists; each candidate counts a name once."""
+    exploded = lists.explode().dropna()
+    counts = exploded[exploded != ""].value_counts().head(n)
+    return [
+        {"name": name, "candidates": int(c), "share": round(c / total, 3)}
+        for name, c in counts.items()
+    ]
+
+
+def _funnel(statuses: pd.DataFrame) -> dict:
+    """status → {count, score_sum}; score_sum lets record_status() keep means exact."""
+    grouped = statuses.groupby("status")["score"].agg(["count", "sum"])
+    return {s: {"count": int(r["count"]), "score_sum": float(r["sum"])} for s, r in grouped.iterrows()}
+
+
+def _funnel_view(funnel: dict) -> list:
+    names = list(FUNNEL_ORDER) + sorted(s for s in funnel if s not in FUNNEL_ORDER)
+    out = []
+    for s in names:
+        b = funnel.get(s, {"count": 0, "score_sum": 0.0})
+        out.append({
+            "status": s,
+            "count": b["count"],
+            "mean_score": round(b["score_sum"] / b["count"], 2) if b["count"] else None,
+        })
+    return out
+
+
+def build(results: list, statuses: pd.DataFrame) -> dict:
+    """Aggregates for one job; statuses has columns resume_id, status, score."""
+    frame = pd.DataFrame({
+        "relative": [r["analysis"].get("Relative Ranking Score", 0.0) or 0.0 for r in results],
+        "final": [r["analysis"].get("Final Score", 0.0) or 0.0 for r in results],
+        "match": [r["analysis"].get("Overall Match Score", 0) or 0 for r in results],
+        "experience": [r["analysis"].get("Experience Relevance Score", 0) or 0 for r in results],
+        "projects": [r["analysis"].get("Projects Relevance Score", 0) or 0 for r in results],
+        "skills": [split_skills(r["analysis"].get("Key Skills", [])) for r in results],
+        "soft": [split_skills(r["analysis"].get("Soft Skills", [])) for r in results],
+        "certs": [
+            list(dict.fromkeys(normalize_skill(c) for c in r["analysis"].get("Certifications & Courses", [])
+                               if isinstance(c, str) and c.strip()))
+            for r in results
+        ],
+        "offline": [r["analysis"].get("Scoring Mode") == "offline" for r in results],
+    })
+    n = len(frame)
+    cert_counts = frame["certs"].str.len().to_numpy()
+    sub_labels = [str(i) for i in range(11)]
+    return {
+        "candidates": n,
+        "offline_scored": int(frame["offline"].sum()),
+        "scores": {
+            "relative": {
+                **_distribution(frame["relative"].to_numpy(float)),
+                "histogram": _histogram(frame["relative"].to_numpy(float), RELATIVE_BINS,
+                                        [f"{int(a)}-{int(b)}" for a, b in zip(RELATIVE_BINS, RELATIVE_BINS[1:])]),
+            },
+            "final": _distribution(frame["final"].to_numpy(float)),
+            "overall_match": {
+                **_distribution(frame["match"].to_numpy(float)),
+                "histogram": _histogram(np.rint(frame["match"].to_numpy(float)), SUBSCORE_BINS, sub_labels),
+            },
+            "experience_relevance": _histogram(np.rint(frame["experience"].to_numpy(float)), SUBSCORE_BINS, sub_labels),
+            "projects_relevance": _histogram(np.rint(frame["projects"].to_numpy(float)), SUBSCORE_BINS, sub_labels),
+        },
+        "top_skills": _value_counts(frame["skills"], TOP_SKILLS, n) if n else [],
+        "top_soft_skills": _value_counts(frame["soft"], TOP_SKILLS, n) if n else [],
+        "certifications": {
+            "with_any": int((cert_counts > 0).sum()),
+            "per_candidate": [{"count": i, "candidates": int(c)}
+                              for i, c in enumerate(np.bincount(cert_counts, minlength=1))],
+            "top": _value_counts(frame["certs"], TOP_CERTIFICATIONS, n) if n else [],
+        },
+        "funnel": _funnel(statuses),
+    }
+
+
+# ─── public API ────────────────────────────────────────────────────────
+def materialize(job_id: str, results: list, statuses: list, user_id: str = None) -> dict:
+    """
+    (Re)computes a job's aggregates. statuses: [(resume_id, status, relative
+    score)] for the candidates that have a ranking row.
+    """
+    t0 = time.perf_counter()
+    frame = pd.DataFrame(statuses, columns=["resume_id", "status", "score"])
+    frame["score"] = frame["score"].fillna(0.0)
+    payload = build(results, frame)
+    with _connect() as db:
+        db.execute("BEGIN IMMEDIATE")
+        db.execute("DELETE FROM candidate_status WHERE job_id = ?", (job_id,))
+        db.executemany(
+            "INSERT INTO candidate_status (job_id, resume_id, status, score) VALUES (?, ?, ?, ?)",
+            [(job_id, *row) for row in frame.itertuples(index=False)],
+        )
+        db.execute(
+            "INSERT OR REPLACE INTO job_analytics (job_id, user_id, computed_at, payload) VALUES (?, ?, ?, ?)",
+            (job_id, user_id, time.time(), json.dumps(payload)),
+        )
+        db.execute("COMMIT")
+    print(f"📊 Analytics for job {job_id}: {len(results)} candidates in {time.perf_counter() - t0:.2f}s")
+    return payload
+
+
+def record_status(job_id: str, resume_id: str, status: str) -> bool:
+    """
+    Moves one candidate between funnel buckets. False when the job has no
+    analytics yet or resume_id is not one of its candidates.
+    """
+    with _connect() as db:
+        db.execute("BEGIN IMMEDIATE")
+        row = db.execute("SELECT payload FROM job_analytics WHERE job_id = ?", (job_id,)).fetchone()
+        if not row:
+            db.execute("ROLLBACK")
+            return False
+        payload = json.loads(row[0])
+        prev = db.execute(
+            "SELECT status, score FROM candidate_status WHERE job_id = ? AND resume_id = ?", (job_id, resume_id)
+        ).fetchone()
+        if prev is None or prev[0] == status:
+            # not a candidate of this job (nothing to move), or already in that bucket
+            db.execute("ROLLBACK")
+            return prev is not None
+        old, score = prev
+        funnel = payload["funnel"]
+        funnel[old]["count"] -= 1
+        funnel[old]["score_sum"] -= score or 0.0
+        if not funnel[old]["count"]:
+            del funnel[old]
+        bucket = funnel.setdefault(status, {"count": 0, "score_sum": 0.0})
+        bucket["count"] += 1
+        bucket["score_sum"] += score or 0.0
+        db.execute(
+            "UPDATE candidate_status SET status = ? WHERE job_id = ? AND resume_id = ?", (status, job_id, resume_id)
+        )
+        db.execute("UPDATE job_analytics SET payload = ? WHERE job_id = ?", (json.dumps(payload), job_id))
+        db.execute("COMMIT")
+    return True
+
+
+def get(job_id: str):
+    """(user_id, dashboard payload) or None when the job was never materialized."""
+    with _connect() as db:
+        row = db.execute(
+            "SELECT user_id, computed_at, payload FROM job_analytics WHERE job_id = ?", (job_id,)
+        ).fetchone()
+    if not row:
+        return None
+    user_id, computed_at, payload = row
+    payload = json.loads(payload)
+    payload["funnel"] = _funnel_view(payload["funnel"])
+    payload["job_id"], payload["computed_at"] = job_id, computed_at
+    return user_id, payload
+
+
+def delete(job_id: str) -> None:
+    with _connect() as db:
+        db.execute("DELETE FROM candidate_status WHERE job_id = ?", (job_id,))
+        db.execute("DELETE FROM job_analytics WHERE job_id = ?", (job_id,))
@@ -0,0 +1,302 @@
+# File: job_control.py
+# --------------------------------------------------------------------------
+# Cooperative cancellation and per-resume deadlines for screening jobs.
+#   • CancelToken per running job (registered under each of its job_ids);
+#     checkpoint() raises JobCancelled between stages, before each resume
+#     group and while a call waits for the rate governor
+#   • resume_deadline(): RESUME_DEADLINE_SECONDS per resume covering
+#     extraction, LLM calls and upload. Time spent queued for the rate
+#     governor does not count; a resume past its deadline raises
+#     ResumeTimeout, is recorded as failed and left out of the results.
+# Both live in context variables, so pipeline helpers find them without
+# the job being threaded through their arguments (same as metrics.py).
+# Tokens, cancel requests and failed resumes are kept in
+# processed_data/job_control.db, so cancel() and info() work from any
+# serve.py worker; a token picks up a cancel made elsewhere within
+# CANCEL_POLL_SECONDS.
+# --------------------------------------------------------------------------
+
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+import metrics
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+RESUME_DEADLINE_SECONDS = float(os.getenv("RESUME_DEADLINE_SECONDS", "300"))
+TOKEN_TTL = 3600                # seconds a finished job's token stays visible in info()
+MAX_FAILURES_KEPT = 200
+CANCEL_POLL_SECONDS = 1.0       # how often a token looks for a cancel from another process
+PROCESSED_DATA_FOLDER = "processed_data"
+DB_PATH = os.path.join(PROCESSED_DATA_FOLDER, "job_control.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    job_id      TEXT PRIMARY KEY,
+    token_id    TEXT NOT NULL,
+    reason      TEXT,
+    started_at  REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS tokens_by_token ON tokens (token_id);
+CREATE TABLE IF NOT EXISTS failures (
+    token_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    reason   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS failures_by_token ON failures (token_id);
+"""
+
+os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
+
+
+def _connect():
+    db = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return closing(db)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class ResumeTimeout(Exception):
+    pass
+
+
+class CancelToken:
+    def __init__(self, job_id: str):
+        self.job_id = job_id                # first job_id of the run; its failures are kept under it
+        self.reason = None
+        self.partial = None                 # why the job finished with only part of its resumes
+        self._event = threading.Event()
+        self._polled = time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        self._poll()
+        return self._event.is_set()
+
+    def cancel(self, reason: str) -> None:
+        self.reason = reason
+        self._event.set()
+
+    def _poll(self) -> None:
+        """Picks up a cancel() made by another process, at most every CANCEL_POLL_SECONDS."""
+        if self._event.is_set() or time.monotonic() - self._polled < CANCEL_POLL_SECONDS:
+            return
+        self._polled = time.monotonic()
+        with _connect() as db:
+            row = db.execute("SELECT reason FROM tokens WHERE token_id = ? AND reason IS NOT NULL LIMIT 1",
+                             (self.job_id,)).fetchone()
+        if row:
+            self.cancel(row[0])
+
+    def check(self) -> None:
+        self._poll()
+        if self._event.is_set():
+            raise JobCancelled(self.reason)
+
+    def fail(self, filename: str, reason: str) -> None:
+        with _connect() as db:
+            db.execute(
+                "INSERT INTO failures (token_id, filename, reason) SELECT ?, ?, ? "
+                "WHERE (SELECT COUNT(*) FROM failures WHERE token_id = ?) < ?",
+                (self.job_id, filename, reason, self.job_id, MAX_FAILURES_KEPT),
+            )
+
+
+_tokens = {}                        # job_id → token of a job running in this process
+_tokens_lock = threading.Lock()
+_current = contextvars.ContextVar("cancel_token", default=None)
+_deadline = contextvars.ContextVar("resume_deadline", default=None)
+
+
+def _forget_old(db) -> None:
+    cutoff = time.time() - TOKEN_TTL
+    old = [t for (t,) in db.execute("SELECT DISTINCT token_id FROM tokens WHERE finished_at < ?", (cutoff,))]
+    db.executemany("DELETE FROM failures WHERE token_id = ?", [(t,) for t in old])
+    db.execute("DELETE FROM tokens WHERE finished_at < ?", (cutoff,))
+
+
+# ─── cancellation ──────────────────────────────────────────────────────
+@contextmanager
+def running(*job_ids):
+    """Token for one running job; a multi-JD job registers all its job_ids."""
+    token = CancelToken(job_ids[0])
+    now = time.time()
+    with _connect() as db:
+        db.execute("BEGIN IMMEDIATE")
+        _forget_old(db)
+        db.execute("DELETE FROM failures WHERE token_id = ?", (token.job_id,))
+        # a cancel made after register() and before this point is kept
+        db.executemany(
+            "INSERT INTO tokens (job_id, token_id, started_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (job_id) DO UPDATE SET token_id = excluded.token_id, "
+            "reason = CASE WHEN finished_at IS NULL THEN reason END, "
+            "started_at = excluded.started_at, finished_at = NULL",
+            [(job_id, token.job_id, now) for job_id in job_ids],
+        )
+        row = db.execute("SELECT reason FROM tokens WHERE token_id = ? AND reason IS NOT NULL LIMIT 1",
+                         (token.job_id,)).fetchone()
+        db.execute("COMMIT")
+    if row:
+        token.cancel(row[0])
+    with _tokens_lock:
+        for job_id in job_ids:
+            _tokens[job_id] = token
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        with _connect() as db:
+            db.execute("UPDATE tokens SET finished_at = ? WHERE token_id = ?", (time.time(), token.job_id))
+        with _tokens_lock:
+            for job_id in job_ids:
+                _tokens.pop(job_id, None)
+        _current.reset(reset)
+
+
+def register(job_id: str) -> None:
+    """
+    Makes a job cancellable before it is published as running (job_scheduler
+    calls this inside its claim); running() then takes the entry over.
+    """
+    with _connect() as db:
+        db.execute("INSERT OR REPLACE INTO tokens (job_id, token_id, started_at) VALUES (?, ?, ?)",
+                   (job_id, job_id, time.time()))
+
+
+def release(job_id: str) -> None:
+    """The job's task returned: a registered entry that running() never took over is closed."""
+    with _connect() as db:
+        db.execute("UPDATE tokens SET finished_at = ? WHERE job_id = ? AND finished_at IS NULL",
+                   (time.time(), job_id))
+
+
+def cancel(job_id: str, reason: str = "cancelled by recruiter") -> bool:
+    """True when a running job (in any process) was asked to stop."""
+    with _connect() as db:
+        cur = db.execute("UPDATE tokens SET reason = COALESCE(reason, ?) WHERE job_id = ? AND finished_at IS NULL",
+                         (reason, job_id))
+    if cur.rowcount != 1:
+        return False
+    with _tokens_lock:
+        token = _tokens.get(job_id)
+    if token:
+        token.cancel(reason)            # owned here: no need to wait for the next poll
+    print(f"🛑 Cancelling job {job_id}: {reason}")
+    return True
+
+
+def checkpoint() -> None:
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+def cancelled() -> bool:
+    token = _current.get()
+    return token is not None and token.cancelled
+
+
+def record_failure(filename: str, error: Exception) -> None:
+    print(f"⏱️ {filename} failed and was skipped: {error}")
+    metrics.RESUMES_FAILED.labels("deadline" if isinstance(error, ResumeTimeout) else "error").inc()
+    token = _current.get()
+    if token is not None:
+        token.fail(filename, str(error))
+
+
+def mark_partial(reason: str) -> None:
+    """The running job will end with results for only part of its resumes."""
+    print(f"⚠️ Job finishes partially: {reason}")
+    token = _current.get()
+    if token is not None:
+        token.partial = reason
+
+
+def info(job_id: str):
+    with _connect() as db:
+        row = db.execute(
+            "SELECT token_id, (SELECT reason FROM tokens AS t WHERE t.token_id = tokens.token_id "
+            "AND reason IS NOT NULL LIMIT 1) FROM tokens WHERE job_id = ?", (job_id,),
+        ).fetchone()
+        if not row:
+            return None
+        failed = db.execute("SELECT filename, reason FROM failures WHERE token_id = ? ORDER BY rowid",
+                            (row[0],)).fetchall()
+    return {
+        "cancelled": row[1] is not None,
+        "reason": row[1],
+        "failed_resumes": [{"filename": f, "reason": r} for f, r in failed],
+    }
+
+
+# ─── per-resume deadlines ──────────────────────────────────────────────
+class _Deadline:
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    def extend(self, seconds: float) -> None:
+        self.expires_at += seconds
+
+
+@contextmanager
+def resume_deadline(spent: float = 0.0, seconds: float = None):
+    """spent: seconds already used on this resume (its extraction)."""
+    seconds = RESUME_DEADLINE_SECONDS if seconds is None else seconds
+    reset = _deadline.set(_Deadline(time.monotonic() + seconds - spent))
+    try:
+        yield
+    finally:
+        _deadline.reset(reset)
+
+
+def remaining():
+    """Seconds left for the current resume, or None outside a deadline."""
+    d = _deadline.get()
+    return None if d is None else d.expires_at - time.monotonic()
+
+
+def check_deadline(step: str) -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise ResumeTimeout(f"deadline of {RESUME_DEADLINE_SECONDS:.0f}s passed before {step}")
+
+
+def extend_deadline(seconds: float) -> None:
+    """Gives back time the resume spent waiting, e.g. queued for the rate governor."""
+    d = _deadline.get()
+    if d is not None:
+        d.extend(seconds)
+
+
+def run_with_deadline(fn, *args, seconds: float = None):
+    """
+    fn(*args) on a daemon thread, abandoned after the deadline. Used for
+    text extraction: a parser stuck on a malformed file cannot be
+    interrupted, but the job no longer waits for it.
+    """
+    seconds = RESUME_DEADLINE_SECONDS if seconds is None else seconds
+    box = {}
+    ctx = contextvars.copy_context()
+
+    def _run():
+        try:
+            box["value"] = ctx.run(fn, *args)
+        except BaseException as e:
+            box["error"] = e
+
+    t = threading.Thread(target=_run, daemon=True)
+    t.start()
+    t.join(seconds)
+    if t.is_alive():
+        raise ResumeTimeout(f"deadline of {seconds:.0f}s passed during extraction")
+    if "error" in box:
+        raise box["error"]
+    return box["value"]
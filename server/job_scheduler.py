@@ -0,0 +1,354 @@
+# File: job_scheduler.py
+# --------------------------------------------------------------------------
+# Tenant-fair scheduler in front of the screening workers.
+#   • two lanes: "fast" for jobs with ≤ FAST_LANE_MAX_RESUMES resumes,
+#     "bulk" for the rest; FAST_LANE_WORKERS slots only serve the fast
+#     lane, the other JOB_WORKERS serve fast first, then bulk
+#   • weighted fair queuing across user_ids inside each lane: a job's
+#     finish tag is max(virtual clock, tenant's last tag) + size / weight
+#   • at most TENANT_MAX_RUNNING jobs per tenant run at once
+#   • queue wait per job is recorded (metrics + job_info())
+#   • cancel() drops a job that has not started yet; a claimed job is
+#     registered with job_control before it shows as running, so it can
+#     be cancelled from that moment on
+# The queue lives in processed_data/scheduler.db, shared by every serve.py
+# worker on the host: any worker may submit, claim (BEGIN IMMEDIATE), cancel
+# or report a job, and the slot and tenant limits hold for the host, not
+# per worker. Jobs are therefore stored as a registered task name plus
+# JSON arguments (@scheduler.task); the submitter's trace context travels
+# with them. A running job whose worker process died is marked failed on
+# the next claim. Idle workers look for work every POLL_SECONDS, and at
+# once after a submit or a job end in their own process.
+# Running jobs are tagged with rate_governor.caller(user_id, lane) so the
+# LLM budget is shared fairly between tenants too.
+# Worker threads start with start() (api_service's startup) or the first
+# submit(), never at import time, so a process that imports this module
+# and then forks stays safe.
+# --------------------------------------------------------------------------
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import job_control
+import metrics
+import tracing
+from rate_governor import caller
+from shard_store import worker_name
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "3"))
+FAST_LANE_WORKERS = int(os.getenv("FAST_LANE_WORKERS", "1"))
+FAST_LANE_MAX_RESUMES = int(os.getenv("FAST_LANE_MAX_RESUMES", "25"))
+TENANT_MAX_RUNNING = int(os.getenv("TENANT_MAX_RUNNING", "2"))
+JOB_INFO_TTL = 3600             # seconds a finished job stays visible in job_info()
+POLL_SECONDS = 1.0              # idle workers look for jobs submitted by other processes
+LANES = ("fast", "bulk")
+PROCESSED_DATA_FOLDER = "processed_data"
+DB_PATH = os.path.join(PROCESSED_DATA_FOLDER, "scheduler.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id      TEXT UNIQUE NOT NULL,
+    user_id     TEXT NOT NULL,
+    lane        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    task        TEXT NOT NULL,
+    args        TEXT NOT NULL,
+    on_cancel   TEXT,
+    trace       TEXT,
+    tag         REAL NOT NULL,
+    state       TEXT NOT NULL,
+    pool        TEXT,
+    worker      TEXT,
+    enqueued_at REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, lane, tag, seq);
+CREATE TABLE IF NOT EXISTS tags (
+    lane    TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    tag     REAL NOT NULL,
+    PRIMARY KEY (lane, user_id)
+);
+"""
+_VCLOCK = ""                    # tags row holding a lane's virtual clock
+
+os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
+
+
+def _connect():
+    db = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return closing(db)
+
+
+def _alive(worker: str) -> bool:
+    """False only for a worker of this host whose process is gone."""
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, ValueError):
+        pass
+    return True
+
+
+class JobScheduler:
+    def __init__(self, workers: int = JOB_WORKERS, fast_lane_workers: int = FAST_LANE_WORKERS,
+                 tenant_max_running: int = TENANT_MAX_RUNNING, weights: dict = None):
+        self.workers = max(1, workers)
+        self.fast_lane_workers = max(0, fast_lane_workers)
+        self.tenant_max_running = max(1, tenant_max_running)
+        self.weights = weights or {}
+        self._tasks = {}                                    # task name → function
+        self._cond = threading.Condition()
+        self._running = 0                                   # jobs running in this process
+        self._draining = False
+        self._threads = []
+
+    def task(self, fn):
+        """Decorator: fn can be submitted (and used as on_cancel) by name."""
+        self._tasks[fn.__name__] = fn
+        return fn
+
+    def _task_ref(self, fn, args) -> list:
+        """[name, args] of a registered task; on_cancel may be a functools.partial of one."""
+        args = list(getattr(fn, "args", ())) + list(args)
+        fn = getattr(fn, "func", fn)
+        if self._tasks.get(fn.__name__) is not fn:
+            raise ValueError(f"{fn.__name__} is not a scheduler task")
+        return [fn.__name__, args]
+
+    # ── submission ───────────────────────────────────────────────────
+    def submit(self, job_id: str, user_id: str, size: int, fn, *args, on_cancel=None) -> str:
+        """
+        Queues fn(*args) for the tenant; returns the lane it went to.
+        on_cancel() runs instead of fn when the job is cancelled before it starts.
+        """
+        lane = "fast" if size <= FAST_LANE_MAX_RESUMES else "bulk"
+        name, task_args = self._task_ref(fn, args)
+        undo = json.dumps(self._task_ref(on_cancel, ())) if on_cancel else None
+        weight = float(self.weights.get(user_id, 1.0))
+        # fast-lane jobs all cost 1 so tenants alternate; bulk jobs cost their size
+        cost = (1 if lane == "fast" else max(1, size)) / weight
+        now = time.time()
+        with _connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            tags = dict(db.execute("SELECT user_id, tag FROM tags WHERE lane = ? AND user_id IN (?, ?)",
+                                   (lane, _VCLOCK, user_id)).fetchall())
+            tag = max(tags.get(_VCLOCK, 0.0), tags.get(user_id, 0.0)) + cost
+            db.execute("INSERT OR REPLACE INTO tags (lane, user_id, tag) VALUES (?, ?, ?)", (lane, user_id, tag))
+            db.execute("DELETE FROM jobs WHERE finished_at < ?", (now - JOB_INFO_TTL,))
+            db.execute(
+                "INSERT INTO jobs (job_id, user_id, lane, size, task, args, on_cancel, trace, tag, state, "
+                "enqueued_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?)",
+                (job_id, user_id, lane, size, name, json.dumps(task_args), undo,
+                 json.dumps(tracing.inject()), tag, now),
+            )
+            db.execute("COMMIT")
+        metrics.QUEUE_DEPTH.labels(f"jobs_queued_{lane}").inc()
+        print(f"🗓️ Job {job_id} queued in {lane} lane ({size} resumes, recruiter {user_id})")
+        with self._cond:
+            self._start_workers()
+            self._cond.notify_all()
+        return lane
+
+    def start(self) -> None:
+        """Starts this process's worker threads (they also serve jobs other processes queued)."""
+        with self._cond:
+            self._start_workers()
+
+    def _start_workers(self):
+        if self._threads:
+            return
+        for i in range(self.fast_lane_workers + self.workers):
+            pool, lanes = ("fast", ("fast",)) if i < self.fast_lane_workers else ("general", LANES)
+            t = threading.Thread(target=self._worker, args=(pool, lanes), daemon=True, name=f"job-worker-{i}")
+            t.start()
+            self._threads.append(t)
+
+    # ── dispatch ─────────────────────────────────────────────────────
+    def _reap(self, db) -> None:
+        """Running jobs of a dead worker process never finish: mark them failed."""
+        for (worker,) in db.execute("SELECT DISTINCT worker FROM jobs WHERE state = 'running'").fetchall():
+            if not _alive(worker):
+                db.execute("UPDATE jobs SET state = 'failed', error = 'worker process exited', finished_at = ? "
+                           "WHERE state = 'running' AND worker = ?", (time.time(), worker))
+                print(f"🚨 Jobs of worker {worker} marked failed: the process exited")
+
+    def _claim(self, pool: str, lanes: tuple):
+        """
+        Smallest finish tag among tenants below their cap, lanes in priority
+        order, while the host has a free slot in this pool; None otherwise.
+        """
+        marks = ",".join("?" * len(lanes))
+        capacity = self.fast_lane_workers if pool == "fast" else self.workers
+        with _connect() as db:
+            if not db.execute(f"SELECT 1 FROM jobs WHERE state = 'queued' AND lane IN ({marks}) LIMIT 1",
+                              lanes).fetchone():
+                return None
+            db.execute("BEGIN IMMEDIATE")
+            self._reap(db)
+            busy = db.execute("SELECT COUNT(*) FROM jobs WHERE state = 'running' AND pool = ?", (pool,)).fetchone()[0]
+            if busy >= capacity:
+                db.execute("COMMIT")
+                return None
+            capped = [u for (u,) in db.execute(
+                "SELECT user_id FROM jobs WHERE state = 'running' GROUP BY user_id HAVING COUNT(*) >= ?",
+                (self.tenant_max_running,),
+            ).fetchall()]
+            job = None
+            for lane in lanes:
+                job = db.execute(
+                    f"SELECT * FROM jobs WHERE state = 'queued' AND lane = ? "
+                    f"AND user_id NOT IN ({','.join('?' * len(capped))}) ORDER BY tag, seq LIMIT 1",
+                    (lane, *capped),
+                ).fetchone()
+                if job:
+                    break
+            if job:
+                # cancellable before anyone can read "running" (/cancel-job/ would 404 otherwise)
+                job_control.register(job["job_id"])
+                started_at = time.time()
+                db.execute("UPDATE jobs SET state = 'running', pool = ?, worker = ?, started_at = ? WHERE seq = ?",
+                           (pool, worker_name(), started_at, job["seq"]))
+                db.execute(
+                    "INSERT INTO tags (lane, user_id, tag) VALUES (?, ?, ?) "
+                    "ON CONFLICT (lane, user_id) DO UPDATE SET tag = MAX(tag, excluded.tag)",
+                    (job["lane"], _VCLOCK, job["tag"]),
+                )
+                job = {**dict(job), "started_at": started_at}
+            db.execute("COMMIT")
+        return job
+
+    def _worker(self, pool, lanes):
+        while True:
+            job = None
+            if not self._draining:
+                try:
+                    job = self._claim(pool, lanes)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Job scheduler could not claim a job: {e}")
+            if job is None:
+                with self._cond:
+                    self._cond.wait(POLL_SECONDS)
+                continue
+            with self._cond:
+                self._running += 1
+            self._execute(job)
+
+    def _execute(self, job):
+        wait = job["started_at"] - job["enqueued_at"]
+        metrics.QUEUE_DEPTH.labels(f"jobs_queued_{job['lane']}").dec()
+        metrics.QUEUE_WAIT_SECONDS.labels(job["lane"]).observe(wait)
+        print(f"▶️ Job {job['job_id']} started after {wait:.1f}s in the {job['lane']} lane")
+        state, error = "done", None
+        try:
+            fn = self._tasks[job["task"]]
+            with tracing.attached(json.loads(job["trace"] or "{}")), caller(job["user_id"], job["lane"]):
+                fn(*json.loads(job["args"]))
+        except Exception as e:
+            state, error = "failed", str(e)
+            print(f"🚨 Job {job['job_id']} failed in scheduler: {e}")
+        finally:
+            try:
+                job_control.release(job["job_id"])
+                with _connect() as db:
+                    db.execute("UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE seq = ?",
+                               (state, error, time.time(), job["seq"]))
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+    # ── cancellation ─────────────────────────────────────────────────
+    def cancel(self, job_id: str, user_id: str):
+        """
+        Drops a queued job of user_id: "cancelled". A running one is left to
+        job_control (cooperative): "running". None for unknown, finished or
+        someone else's job.
+        """
+        with _connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            job = db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if not job or job["user_id"] != user_id or job["state"] not in ("queued", "running"):
+                db.execute("COMMIT")
+                return None
+            if job["state"] == "running":
+                db.execute("COMMIT")
+                return "running"
+            db.execute("UPDATE jobs SET state = 'cancelled', finished_at = ? WHERE seq = ?", (time.time(), job["seq"]))
+            db.execute("COMMIT")
+        metrics.QUEUE_DEPTH.labels(f"jobs_queued_{job['lane']}").dec()
+        print(f"🛑 Job {job_id} cancelled before it started")
+        if job["on_cancel"]:
+            name, args = json.loads(job["on_cancel"])
+            self._tasks[name](*args)
+        return "cancelled"
+
+    def wait_idle(self, timeout: float) -> bool:
+        """
+        Graceful worker stop: claims no new job and blocks until this
+        process's running jobs end; False on timeout. Queued jobs stay in
+        the store for the other workers (or the next start).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._draining = True
+            while self._running:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    # ── reporting ────────────────────────────────────────────────────
+    def job_info(self, job_id: str):
+        with _connect() as db:
+            job = db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if not job:
+                return None
+            ahead = None
+            if job["state"] == "queued":
+                ahead = db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND lane = ? "
+                    "AND (tag < ? OR (tag = ? AND seq < ?))",
+                    (job["lane"], job["tag"], job["tag"], job["seq"]),
+                ).fetchone()[0]
+        end = job["started_at"] or time.time()
+        return {
+            "state": job["state"],
+            "lane": job["lane"],
+            "resumes": job["size"],
+            "queue_wait_s": round(end - job["enqueued_at"], 2),
+            "jobs_ahead_in_lane": ahead,
+            "run_s": round((job["finished_at"] or time.time()) - job["started_at"], 2) if job["started_at"] else None,
+            "error": job["error"],
+        }
+
+    def snapshot(self) -> dict:
+        with _connect() as db:
+            queued = dict(db.execute("SELECT lane, COUNT(*) FROM jobs WHERE state = 'queued' GROUP BY lane").fetchall())
+            running = dict(db.execute(
+                "SELECT user_id, COUNT(*) FROM jobs WHERE state = 'running' GROUP BY user_id"
+            ).fetchall())
+        return {
+            "queued": {lane: queued.get(lane, 0) for lane in LANES},
+            "running_by_tenant": running,
+        }
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,215 @@
+# File: leaderboard.py
+# --------------------------------------------------------------------------
+# Provisional ranking of a job that is still running.
+#   • bounded min-heap of the LEADERBOARD_SIZE best Final Scores so far
+#   • running min / max over every finished analysis, so the provisional
+#     Relative Ranking Score uses the same min-max normalisation that
+#     compute_relative_ranking applies at the end
+# Updated once per finished analysis (O(log K)); reading it never touches
+# the other candidates. Once the job ends, finish() marks the board final
+# — its top K then equals the head of the final ranking — or, when the job
+# failed, failed: its partial ranking is never final. A board is updated
+# in the process that runs the job and copied to processed_data/
+# leaderboard.db at most every FLUSH_SECONDS (and on begin / finish), so
+# get() from another serve.py worker sees it too. Boards are dropped
+# LEADERBOARD_TTL seconds after the job ends; later reads come from the
+# artifact store.
+# --------------------------------------------------------------------------
+
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "200"))
+LEADERBOARD_TTL = 3600
+FLUSH_SECONDS = 1.0             # how stale another process's view of a running board may get
+PROCESSED_DATA_FOLDER = "processed_data"
+DB_PATH = os.path.join(PROCESSED_DATA_FOLDER, "leaderboard.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS boards (
+    job_id      TEXT PRIMARY KEY,
+    user_id     TEXT,
+    total       INTEGER,
+    done        INTEGER NOT NULL,
+    lo          REAL,
+    hi          REAL,
+    final       INTEGER NOT NULL,
+    failed      INTEGER NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    heap        TEXT NOT NULL
+);
+"""
+
+os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
+
+
+def _connect():
+    db = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return closing(db)
+
+
+class Leaderboard:
+    def __init__(self, job_id: str, total: int = None, user_id: str = None, size: int = LEADERBOARD_SIZE):
+        self.job_id, self.total, self.user_id, self.size = job_id, total, user_id, size
+        self.done = 0
+        self.lo = self.hi = None
+        self.final = self.failed = False
+        self.started_at, self.finished_at = time.time(), None
+        self._heap = []                     # (score, seq, row); smallest kept score on top
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed = 0.0
+        self._discarded = False
+        self._pending = None                # deferred flush timer
+
+    def add(self, entry: dict, resume_id: str = None) -> None:
+        score = float(entry["analysis"].get("Final Score", 0.0) or 0.0)
+        row = {
+            "filename": entry["filename"],
+            "candidate_name": entry.get("candidate_name"),
+            "resume_id": resume_id,
+            "final_score": score,
+            "overall_match_score": entry["analysis"].get("Overall Match Score"),
+        }
+        with self._lock:
+            self.done += 1
+            self.lo = score if self.lo is None else min(self.lo, score)
+            self.hi = score if self.hi is None else max(self.hi, score)
+            # ties: earlier analyses stay, like the stable sort of the final ranking
+            item = (score, -next(self._seq), row)
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Copies the board to the store. Within FLUSH_SECONDS of the last copy
+        it is deferred instead (one timer), so the last records still land.
+        """
+        with self._flush_lock:
+            if self._discarded:
+                return
+            wait = FLUSH_SECONDS - (time.monotonic() - self._flushed)
+            if not force and wait > 0:
+                if self._pending is None:
+                    self._pending = threading.Timer(wait, self.flush, kwargs={"force": True})
+                    self._pending.daemon = True
+                    self._pending.start()
+                return
+            if self._pending is not None:
+                self._pending.cancel()
+                self._pending = None
+            with self._lock:
+                self._flushed = time.monotonic()
+                row = (self.job_id, self.user_id, self.total, self.done, self.lo, self.hi, int(self.final),
+                       int(self.failed), self.started_at, self.finished_at, json.dumps(self._heap))
+            with _connect() as db:
+                db.execute("INSERT OR REPLACE INTO boards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    @classmethod
+    def load(cls, job_id: str):
+        """Read-only copy of a board kept by another process; None when there is none."""
+        with _connect() as db:
+            row = db.execute("SELECT user_id, total, done, lo, hi, final, failed, started_at, finished_at, heap "
+                             "FROM boards WHERE job_id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        board = cls(job_id, row[1], row[0])
+        board.done, board.lo, board.hi = row[2], row[3], row[4]
+        board.final, board.failed = bool(row[5]), bool(row[6])
+        board.started_at, board.finished_at = row[7], row[8]
+        board._heap = [tuple(item) for item in json.loads(row[9])]
+        return board
+
+    def snapshot(self, top_k: int) -> dict:
+        with self._lock:
+            best = heapq.nlargest(top_k, self._heap)
+            lo, hi, done = self.lo, self.hi, self.done
+        span = (hi - lo) if done else 0.0
+        ranking = []
+        for rank, (score, _, row) in enumerate(best, start=1):
+            relative = round((score - lo) / span * 100, 2) if span else 0.0
+            ranking.append({**row, "rank": rank, "relative_score": relative})
+        return {
+            "job_id": self.job_id,
+            "final": self.final,
+            "failed": self.failed,
+            "analysed": done,
+            "total": self.total,
+            "score_range": [lo, hi],
+            "elapsed_s": round((self.finished_at or time.time()) - self.started_at, 1),
+            "ranking": ranking,
+        }
+
+
+_boards = {}                        # boards of jobs running (or recently ended) in this process
+_boards_lock = threading.Lock()
+
+
+def _forget_old() -> None:
+    cutoff = time.time() - LEADERBOARD_TTL
+    for job_id in [j for j, b in _boards.items() if b.finished_at and b.finished_at < cutoff]:
+        del _boards[job_id]
+    with _connect() as db:
+        db.execute("DELETE FROM boards WHERE finished_at < ?", (cutoff,))
+
+
+# ─── public API ────────────────────────────────────────────────────────
+def begin(job_id: str, total: int = None, user_id: str = None) -> Leaderboard:
+    """Starts (or restarts) the job's board once the number of resumes is known."""
+    with _boards_lock:
+        _forget_old()
+        board = _boards[job_id] = Leaderboard(job_id, total, user_id)
+    board.flush(force=True)
+    return board
+
+
+def record(job_id: str, entry: dict, resume_id: str = None) -> None:
+    """One finished analysis (results entry as built by process_resumes_in_batches)."""
+    with _boards_lock:
+        board = _boards.get(job_id)
+        if board is None:
+            board = _boards[job_id] = Leaderboard(job_id)
+    board.add(entry, resume_id)
+    board.flush()
+
+
+def finish(job_id: str, failed: bool = False) -> None:
+    """The job ended: its board becomes final, or failed when the job raised."""
+    with _boards_lock:
+        board = _boards.get(job_id)
+        if board:
+            board.final, board.failed, board.finished_at = not failed, failed, time.time()
+        _forget_old()
+    if board:
+        board.flush(force=True)
+
+
+def get(job_id: str):
+    """The job's board, kept here or (a copy) by the serve.py worker running the job."""
+    with _boards_lock:
+        board = _boards.get(job_id)
+    return board or Leaderboard.load(job_id)
+
+
+def discard(job_id: str) -> None:
+    """A cancelled job has no ranking to show, provisional or final."""
+    with _boards_lock:
+        board = _boards.pop(job_id, None)
+    if board:
+        with board._flush_lock:         # a late record() must not write it back
+            board._discarded = True
+    with _connect() as db:
+        db.execute("DELETE FROM boards WHERE job_id = ?", (job_id,))
@@ -0,0 +1,218 @@
+# File: metrics.py
+# --------------------------------------------------------------------------
+# Prometheus metrics for the screening service.
+# Every pipeline metric carries `stage` and `job_size` labels. Both come
+# from context variables set by job_context() / stage(), so helpers deep in
+# the pipeline do not need the job threaded through their arguments.
+# stage() / extraction() / storage_call() / db_call() also open a tracing
+# span each (no-op unless TRACING_EXPORTER is set), see tracing.py.
+# --------------------------------------------------------------------------
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+import tracing
+
+# ─── label context ─────────────────────────────────────────────────────
+_job_size = contextvars.ContextVar("job_size", default="unknown")
+_stage = contextvars.ContextVar("stage", default="none")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 3600)
+
+
+def size_bucket(n: int) -> str:
+    if n <= 10:
+        return "1-10"
+    if n <= 100:
+        return "11-100"
+    if n <= 1000:
+        return "101-1000"
+    return "1000+"
+
+
+# ─── metric definitions ────────────────────────────────────────────────
+STAGE_SECONDS = Histogram(
+    "screening_stage_seconds", "Wall time of one pipeline stage for a job",
+    ["stage", "job_size"], buckets=LATENCY_BUCKETS,
+)
+EXTRACTION_SECONDS = Histogram(
+    "screening_extraction_seconds", "Text extraction time per resume file",
+    ["stage", "format", "job_size"], buckets=LATENCY_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "llm_request_seconds", "Latency of a single LLM request",
+    ["stage", "call", "model", "job_size"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens reported by the LLM provider",
+    ["stage", "call", "model", "kind", "job_size"],
+)
+LLM_RETRIES = Counter(
+    "llm_retries_total", "Failed LLM attempts that were retried",
+    ["stage", "call", "model", "job_size"],
+)
+LLM_DEFAULT_FALLBACKS = Counter(
+    "llm_default_analysis_total", "analyze_resume_mistral results that fell back to offline scoring",
+    ["stage", "model", "job_size"],
+)
+LLM_BATCH_SECTIONS = Counter(
+    "llm_batch_sections_total", "Resume sections in multi-resume responses, by validation outcome",
+    ["stage", "outcome", "job_size"],
+)
+PROMPT_COMPRESSION_TOKENS = Counter(
+    "resume_compression_tokens_total", "Resume tokens before / after JD-aware compression",
+    ["stage", "kind", "job_size"],
+)
+STORAGE_SECONDS = Histogram(
+    "supabase_storage_seconds", "Supabase Storage round trip",
+    ["stage", "op", "job_size"], buckets=LATENCY_BUCKETS,
+)
+DB_SECONDS = Histogram(
+    "supabase_db_seconds", "Supabase PostgREST round trip",
+    ["stage", "table", "op", "job_size"], buckets=LATENCY_BUCKETS,
+)
+QUEUE_DEPTH = Gauge(
+    "screening_queue_depth", "Items waiting in a screening queue",
+    ["queue"], multiprocess_mode="livesum",
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "screening_job_queue_wait_seconds", "Time a job waited in the scheduler before starting",
+    ["lane"], buckets=LATENCY_BUCKETS,
+)
+RESUMES_FAILED = Counter(
+    "screening_resumes_failed_total", "Resumes skipped after missing their deadline or failing outright",
+    ["reason"],
+)
+MULTI_JD_PAIRS = Counter(
+    "screening_multi_jd_pairs_total", "(resume, JD) pairs of multi-JD jobs, by how they were scored",
+    ["mode"],
+)
+UPLOAD_EARLY_MEMBERS = Counter(
+    "screening_upload_early_members_total", "ZIP members handled before a chunked upload finished",
+    ["outcome"],
+)
+EMBEDDING_CACHE = Counter(
+    "embedding_cache_texts_total", "Texts served from / added to the embedding cache",
+    ["result"],
+)
+HTTP_SECONDS = Histogram(
+    "http_request_seconds", "FastAPI request latency per route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+
+
+# ─── context helpers ───────────────────────────────────────────────────
+@contextmanager
+def job_context(n_resumes: int):
+    token = _job_size.set(size_bucket(n_resumes))
+    try:
+        yield
+    finally:
+        _job_size.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    token = _stage.set(name)
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(f"stage {name}", stage=name, job_size=_job_size.get()):
+            yield
+    finally:
+        STAGE_SECONDS.labels(name, _job_size.get()).observe(time.perf_counter() - t0)
+        _stage.reset(token)
+
+
+@contextmanager
+def extraction(fmt: str):
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(f"extract {fmt}", format=fmt):
+            yield
+    finally:
+        EXTRACTION_SECONDS.labels(_stage.get(), fmt, _job_size.get()).observe(time.perf_counter() - t0)
+
+
+@contextmanager
+def storage_call(op: str):
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(f"supabase.storage {op}", **{"db.system": "supabase", "storage.operation": op}):
+            yield
+    finally:
+        STORAGE_SECONDS.labels(_stage.get(), op, _job_size.get()).observe(time.perf_counter() - t0)
+
+
+@contextmanager
+def db_call(table: str, op: str):
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(f"supabase.db {table} {op}",
+                          **{"db.system": "supabase", "db.collection.name": table, "db.operation.name": op}):
+            yield
+    finally:
+        DB_SECONDS.labels(_stage.get(), table, op, _job_size.get()).observe(time.perf_counter() - t0)
+
+
+def observe_llm(call: str, model: str, seconds: float, usage=None) -> None:
+    labels = (_stage.get(), call, model)
+    LLM_SECONDS.labels(*labels, _job_size.get()).observe(seconds)
+    if usage is not None:
+        LLM_TOKENS.labels(*labels, "prompt", _job_size.get()).inc(getattr(usage, "prompt_tokens", 0) or 0)
+        LLM_TOKENS.labels(*labels, "completion", _job_size.get()).inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def count_llm_retry(call: str, model: str) -> None:
+    LLM_RETRIES.labels(_stage.get(), call, model, _job_size.get()).inc()
+
+
+def count_default_fallback(model: str) -> None:
+    LLM_DEFAULT_FALLBACKS.labels(_stage.get(), model, _job_size.get()).inc()
+
+
+def count_batch_outcome(valid: int, invalid: int) -> None:
+    LLM_BATCH_SECTIONS.labels(_stage.get(), "valid", _job_size.get()).inc(valid)
+    LLM_BATCH_SECTIONS.labels(_stage.get(), "fallback", _job_size.get()).inc(invalid)
+
+
+def count_compression(stats: dict) -> None:
+    for kind in ("original", "legacy", "sent"):
+        PROMPT_COMPRESSION_TOKENS.labels(_stage.get(), kind, _job_size.get()).inc(stats[f"{kind}_tokens"])
+
+
+# ─── FastAPI wiring ────────────────────────────────────────────────────
+def install(app) -> None:
+    """Adds per-route latency middleware and a GET /metrics endpoint."""
+
+    @app.middleware("http")
+    async def _record_latency(request: Request, call_next):
+        t0 = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_SECONDS.labels(request.method, path, str(status)).observe(time.perf_counter() - t0)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return Response(exposition(), media_type=CONTENT_TYPE_LATEST)
+
+
+def exposition() -> bytes:
+    """All workers' metrics when served by serve.py (PROMETHEUS_MULTIPROC_DIR), else this process's."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
@@ -0,0 +1,155 @@
+# File: multi_jd_job.py
+# --------------------------------------------------------------------------
+# One applicant pool screened against several job descriptions (campus
+# drives with 5-10 openings) in a single pass:
+#   extract + read the ZIP once → upload every resume once (one Storage
+#   object, one resume_uploads row per job) → embed resumes once →
+#   cosine similarity resume × JD → LLM analysis only for promising pairs
+#   (similarity ≥ MULTI_JD_MIN_SIMILARITY, or in a JD's MULTI_JD_TOP_K) →
+#   every other pair gets the offline score (sections encoded once for
+#   all JDs) → one artifact store / ranking / search-index entry per job_id.
+# Each JD stays an ordinary job (job_descriptions, job_status,
+# resume_uploads, resume_analysis, resume_rankings rows); only the Storage
+# object and the extracted text are shared.
+# --------------------------------------------------------------------------
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+import job_control
+import leaderboard
+import metrics
+import offline_scoring
+import search_index
+from process_resumes import (
+    OFFLINE_CHUNK, cluster_resumes, count_zip_resumes, embed_model, extract_zip,
+    index_resumes_for_search, persist_job_results, process_resumes_in_batches, read_resumes,
+)
+from storage_utils import upload_resume_for_jobs
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+MULTI_JD_MAX_JOBS = 10
+MIN_SIMILARITY = float(os.getenv("MULTI_JD_MIN_SIMILARITY", "0.35"))
+TOP_K_PER_JD = int(os.getenv("MULTI_JD_TOP_K", "50"))
+UPLOAD_WORKERS = 8
+
+
+def select_pairs(sims: np.ndarray) -> np.ndarray:
+    """Boolean (resumes × JDs) mask of the pairs worth an LLM analysis."""
+    mask = sims >= MIN_SIMILARITY
+    k = min(TOP_K_PER_JD, sims.shape[0])
+    if k:
+        top = np.argpartition(-sims, k - 1, axis=0)[:k]
+        mask[top, np.arange(sims.shape[1])] = True
+    return mask
+
+
+def _upload_once(resumes, job_ids, user_id) -> int:
+    """One Storage object per resume, one resume_uploads row per job; sets r['resume_ids']."""
+    def _one(r):
+        name = offline_scoring.guess_candidate_name(r["text"])
+        return upload_resume_for_jobs(r["filename"], r["path"], job_ids, user_id, name)
+
+    uploaded = 0
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+        for r, resume_ids in zip(resumes, pool.map(_one, resumes)):
+            r["resume_ids"] = resume_ids
+            uploaded += bool(resume_ids)
+    print(f"📤 Uploaded {uploaded}/{len(resumes)} resumes once for all job descriptions")
+    return uploaded
+
+
+def _offline_scores(job_descriptions, texts, user_id) -> list:
+    per_jd = [[] for _ in job_descriptions]
+    for i in range(0, len(texts), OFFLINE_CHUNK):
+        chunk = offline_scoring.score_resumes_for_jds(
+            embed_model, job_descriptions, texts[i:i + OFFLINE_CHUNK], user_id
+        )
+        for j, analyses in enumerate(chunk):
+            per_jd[j] += analyses
+    return per_jd
+
+
+def _screen_one_jd(job, resumes, promising, offline, user_id, scoring_mode):
+    """Results in resume order: LLM analysis for promising rows, offline score elsewhere."""
+    job_id = job["job_id"]
+    llm_rows = [i for i in range(len(resumes)) if promising[i]]
+    other_rows = [i for i in range(len(resumes)) if not promising[i]]
+    print(f"🎯 Job {job_id}: {len(llm_rows)}/{len(resumes)} resumes analysed by the LLM, "
+          f"{len(other_rows)} scored offline")
+    metrics.MULTI_JD_PAIRS.labels("llm").inc(len(llm_rows))
+    metrics.MULTI_JD_PAIRS.labels("offline").inc(len(other_rows))
+
+    merged, resume_id_map = [None] * len(resumes), {}
+    for rows, mode, analyses in (
+        (llm_rows, scoring_mode, None),
+        (other_rows, "offline", [offline[i] for i in other_rows]),
+    ):
+        if not rows:
+            continue
+        results, ids = process_resumes_in_batches(
+            [resumes[i] for i in rows], job["job_description"], job["weights"], job_id, user_id,
+            scoring_mode=mode, analyses=analyses, on_result=partial(leaderboard.record, job_id),
+        )
+        for i, entry in zip(rows, results):
+            merged[i] = entry
+        resume_id_map.update(ids)
+    return merged, resume_id_map
+
+
+def process_multi_jd(zip_path, jobs, resume_output_folder, user_id, scoring_mode="llm"):
+    """
+    jobs: [{"job_id", "job_description", "weights"}]; the Storage objects
+    are filed under the first job, every job gets its own resume_ids.
+    Returns {job_id: (results, resume_id_map)}.
+    """
+    with metrics.job_context(count_zip_resumes(zip_path)):
+        with metrics.stage("extract_zip"):
+            extract_zip(zip_path, resume_output_folder)
+        with metrics.stage("read_resumes"):
+            resumes = read_resumes(resume_output_folder)
+        if not resumes:
+            print("❌ No resumes found.")
+            return {job["job_id"]: ([], {}) for job in jobs}
+
+        for job in jobs:
+            leaderboard.begin(job["job_id"], len(resumes), user_id)
+        job_control.checkpoint()
+        with metrics.stage("upload"):
+            _upload_once(resumes, [job["job_id"] for job in jobs], user_id)
+
+        texts = [r["text"] for r in resumes]
+        job_descriptions = [job["job_description"] for job in jobs]
+        with metrics.stage("embedding"):
+            resume_vecs = search_index.embed_resumes(embed_model, texts)
+            jd_vecs = np.asarray(embed_model.encode(job_descriptions, normalize_embeddings=True), dtype="float32")
+            sims = resume_vecs @ jd_vecs.T
+            offline = _offline_scores(job_descriptions, texts, user_id)
+        if scoring_mode == "offline":
+            promising = np.zeros_like(sims, dtype=bool)
+        else:
+            promising = select_pairs(sims)
+        print(f"🧮 Multi-JD prefilter: {int(promising.sum())}/{promising.size} (resume, JD) pairs go to the LLM")
+
+        by_job = {}
+        for j, job in enumerate(jobs):
+            job_control.checkpoint()
+            for r in resumes:
+                r["resume_id"] = r["resume_ids"].get(job["job_id"])
+            with metrics.stage("analysis"):
+                results, resume_id_map = _screen_one_jd(
+                    job, resumes, promising[:, j], offline[j], user_id, scoring_mode
+                )
+            persist_job_results(job["job_id"], results, resume_id_map)
+            with metrics.stage("clustering"):
+                cluster_resumes(resumes, results, resume_id_map, job["job_id"], user_id, resume_vecs)
+            by_job[job["job_id"]] = (results, resume_id_map)
+
+        job_control.checkpoint()
+        with metrics.stage("indexing"):
+            for job_id, (results, resume_id_map) in by_job.items():
+                index_resumes_for_search(resumes, results, resume_id_map, job_id, user_id, resume_vecs)
+    return by_job
@@ -0,0 +1,250 @@
+# File: offline_scoring.py
+# --------------------------------------------------------------------------
+# Deterministic resume scoring without any LLM call. Produces the same
+# `analysis` shape as analyze_resume_mistral:
+#   • Key / Soft Skills  → dictionary matching (built-in vocabulary plus the
+#                          recruiter's skill index), JD skills listed first
+#   • Certifications     → certification section + "certified …" lines
+#   • Experience / Projects Relevance → embedding similarity of that
+#                          section to the JD, mapped onto 0-10
+#   • Overall Match      → calibrated blend of JD skill coverage and both
+#                          relevance scores
+# Used per job (scoring_mode="offline") and as the fallback when the LLM
+# gives up on a resume.
+# --------------------------------------------------------------------------
+
+import re
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+import skill_index
+from fulltext_index import tokenize
+from resume_compression import split_sections
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+SCORING_MODES = ("llm", "offline")
+OFFLINE_MARKER = "offline"
+
+# cosine similarity (all-MiniLM-L6-v2) → 0-10: unrelated sections sit
+# around 0.1, sections the LLM scores 9-10 are usually above 0.6
+SIM_FLOOR = 0.10
+SIM_CEIL = 0.62
+BLEND = {"skills": 0.5, "experience": 0.3, "projects": 0.2}
+NO_SECTION_PENALTY = 0.8        # similarity of the whole resume stands in
+SECTION_CHARS = 2000            # the encoder truncates at 256 word pieces anyway
+ENCODE_BATCH = 64
+MAX_SKILLS = 15
+MAX_NGRAM = 3
+VOCAB_TTL = 300
+
+TECH_SKILLS = (
+    "python", "java", "javascript", "typescript", "c++", "c#", "golang", "rust", "kotlin",
+    "scala", "ruby", "php", "swift", "matlab", "bash", "sql", "nosql", "html", "css",
+    "react", "angular", "vue", "next.js", "node.js", "express", "django", "flask", "fastapi",
+    "spring", "spring boot", ".net", "graphql", "rest", "microservices", "grpc",
+    "postgresql", "mysql", "sql server", "oracle", "mongodb", "redis", "cassandra",
+    "elasticsearch", "snowflake", "bigquery", "redshift", "dynamodb", "sqlite",
+    "aws", "azure", "gcp", "docker", "kubernetes", "terraform", "ansible", "jenkins",
+    "ci/cd", "github actions", "gitlab", "git", "linux", "nginx", "helm",
+    "spark", "hadoop", "kafka", "airflow", "dbt", "databricks", "etl", "tableau", "power bi",
+    "excel", "pandas", "numpy", "scikit-learn", "tensorflow", "pytorch", "keras",
+    "machine learning", "deep learning", "natural language processing", "computer vision",
+    "artificial intelligence", "data analysis", "data science", "statistics", "llm",
+    "opencv", "hugging face", "langchain", "mlops",
+    "selenium", "cypress", "jest", "pytest", "junit", "unit testing",
+    "android", "ios", "flutter", "react native", "figma", "jira", "agile", "scrum",
+    "security", "networking", "system design", "distributed systems",
+)
+SOFT_SKILLS = (
+    "communication", "leadership", "teamwork", "collaboration", "problem solving",
+    "critical thinking", "time management", "adaptability", "creativity", "mentoring",
+    "stakeholder management", "presentation", "negotiation", "attention to detail",
+    "decision making", "ownership", "project management", "public speaking",
+)
+# surface forms that are ordinary English words on their own
+AMBIGUOUS = frozenset({"go", "r", "c", "less", "express", "rest", "spring", "swift", "security"})
+
+_CERT_RE = re.compile(r"\b(certified|certification|certificate|certificat)\b", re.I)
+_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z.'\- ]{1,60}$")
+_BULLET_RE = re.compile(r"^\s*(?:[-–—•●▪◦*·>]|\d{1,2}[.)])\s*")
+
+
+# ─── vocabulary ────────────────────────────────────────────────────────
+def _key(form: str) -> str:
+    return " ".join(tokenize(form))
+
+
+def _build_lookup(skills, soft) -> dict:
+    """n-gram key → (canonical name, field)."""
+    lookup = {}
+    for alias, canonical in skill_index.SKILL_ALIASES.items():
+        if canonical in skills and alias not in AMBIGUOUS:
+            lookup.setdefault(_key(alias), (canonical, "skill"))
+    for name in skills:
+        k = _key(name)
+        if k and name not in AMBIGUOUS and len(k.split()) <= MAX_NGRAM:
+            lookup.setdefault(k, (name, "skill"))
+    for name in soft:
+        k = _key(name)
+        if k and len(k.split()) <= MAX_NGRAM:
+            lookup[k] = (name, "soft")
+    return lookup
+
+
+_BUILTIN = _build_lookup(set(TECH_SKILLS) | set(skill_index.SKILL_ALIASES.values()), SOFT_SKILLS)
+_tenant_lookups = {}
+_tenant_lock = threading.Lock()
+
+
+def _lookup_for(user_id: str) -> dict:
+    """Built-in vocabulary extended with skills the LLM has found for this recruiter."""
+    if not user_id:
+        return _BUILTIN
+    now = time.monotonic()
+    with _tenant_lock:
+        hit = _tenant_lookups.get(user_id)
+        if hit and now - hit[0] < VOCAB_TTL:
+            return hit[1]
+    try:
+        vocab = skill_index.vocabulary(user_id)
+        lookup = {**_build_lookup(vocab.get("skill", ()), vocab.get("soft", ())), **_BUILTIN}
+    except Exception as e:
+        print(f"⚠️ Offline scoring: tenant vocabulary unavailable ({e})")
+        lookup = _BUILTIN
+    with _tenant_lock:
+        _tenant_lookups[user_id] = (now, lookup)
+    return lookup
+
+
+def match_skills(text: str, lookup: dict = _BUILTIN) -> dict:
+    """{'skill': [...], 'soft': [...]} in order of first mention."""
+    tokens = tokenize(text)
+    found = {"skill": {}, "soft": {}}
+    for n in range(MAX_NGRAM, 0, -1):
+        for i in range(len(tokens) - n + 1):
+            hit = lookup.get(" ".join(tokens[i:i + n]))
+            if hit and hit[0] not in found[hit[1]]:
+                found[hit[1]][hit[0]] = i
+    return {f: sorted(d, key=d.get) for f, d in found.items()}
+
+
+# ─── helpers ───────────────────────────────────────────────────────────
+def guess_candidate_name(text: str) -> str:
+    """First header line that looks like a person's name, else 'Unknown'."""
+    for line in text.strip().splitlines()[:8]:
+        line = line.strip()
+        if 2 <= len(line.split()) <= 4 and _NAME_RE.match(line):
+            return line.title() if line.isupper() else line
+    return "Unknown"
+
+
+def _sections(text: str) -> dict:
+    out = {}
+    for kind, _, lines in split_sections(text):
+        if lines:
+            out.setdefault(kind, []).extend(lines)
+    return out
+
+
+def _certifications(sections: dict, text: str) -> list:
+    certs = list(sections.get("certifications", []))
+    certs += [ln.strip() for ln in text.splitlines() if _CERT_RE.search(ln) and len(ln.strip()) <= 120]
+    return list(dict.fromkeys(c for c in certs if c))[:8]
+
+
+def _projects(sections: dict) -> list:
+    """Project lines with their bullet markers stripped (most resumes list projects as bullets)."""
+    titles = (_BULLET_RE.sub("", ln).strip() for ln in sections.get("projects", []))
+    return list(dict.fromkeys(t for t in titles if 3 <= len(t) <= 100))[:4]
+
+
+def _scale(sim: float) -> float:
+    return round(float(np.clip((sim - SIM_FLOOR) / (SIM_CEIL - SIM_FLOOR), 0.0, 1.0)) * 10, 1)
+
+
+@lru_cache(maxsize=16)
+def _jd_vector(model, job_description: str):
+    vec = model.encode([job_description[:SECTION_CHARS]], normalize_embeddings=True)[0]
+    return np.asarray(vec, dtype="float32")
+
+
+# ─── public API ────────────────────────────────────────────────────────
+def score_resumes(model, job_description: str, texts: list, user_id: str = None) -> list:
+    """One analysis dict per resume text; one encoder pass for the whole batch."""
+    return score_resumes_for_jds(model, [job_description], texts, user_id)[0]
+
+
+def score_resumes_for_jds(model, job_descriptions: list, texts: list, user_id: str = None) -> list:
+    """
+    [analyses per JD] for the same resumes: sections are parsed, encoded and
+    skill-matched once, only the JD side differs.
+    """
+    if not texts:
+        return [[] for _ in job_descriptions]
+    lookup = _lookup_for(user_id)
+
+    parsed, to_encode = [], []
+    for text in texts:
+        sections = _sections(text)
+        exp = "\n".join(sections.get("experience", []))
+        proj = "\n".join(sections.get("projects", []))
+        parsed.append((sections, bool(exp), bool(proj), match_skills(text, lookup)))
+        to_encode += [(exp or text)[:SECTION_CHARS], (proj or text)[:SECTION_CHARS]]
+
+    vecs = np.asarray(
+        model.encode(to_encode, batch_size=ENCODE_BATCH, normalize_embeddings=True), dtype="float32"
+    )
+    return [
+        _score_against(texts, parsed, (vecs @ _jd_vector(model, jd)).reshape(-1, 2),
+                       match_skills(jd, lookup)["skill"])
+        for jd in job_descriptions
+    ]
+
+
+def _score_against(texts, parsed, sims, jd_skills) -> list:
+    out = []
+    for text, (sections, has_exp, has_proj, skills), (exp_sim, proj_sim) in zip(texts, parsed, sims):
+        have = set(skills["skill"])
+        matched = [s for s in jd_skills if s in have]
+        missing = [s for s in jd_skills if s not in have]
+        coverage = len(matched) / len(jd_skills) if jd_skills else None
+
+        exp_score = _scale(exp_sim * (1.0 if has_exp else NO_SECTION_PENALTY))
+        proj_score = _scale(proj_sim * (1.0 if has_proj else NO_SECTION_PENALTY))
+        if coverage is None:
+            w = BLEND["experience"] + BLEND["projects"]
+            overall = (BLEND["experience"] * exp_score + BLEND["projects"] * proj_score) / w
+        else:
+            overall = (BLEND["skills"] * coverage * 10 + BLEND["experience"] * exp_score
+                       + BLEND["projects"] * proj_score)
+
+        key_skills = matched + [s for s in skills["skill"] if s not in matched]
+        summary = (
+            f"Offline score (no LLM): matches {len(matched)}/{len(jd_skills)} job skills"
+            + (f" ({', '.join(matched[:6])})" if matched else "")
+            + (f"; missing {', '.join(missing[:6])}" if missing else "")
+            + f". Experience similarity {exp_sim:.2f}, projects similarity {proj_sim:.2f}."
+        )
+        out.append({
+            "Key Skills": key_skills[:MAX_SKILLS],
+            "Overall Analysis": summary,
+            "Certifications & Courses": _certifications(sections, text),
+            "Relevant Projects": _projects(sections),
+            "Soft Skills": skills["soft"][:MAX_SKILLS],
+            "Overall Match Score": round(overall, 1),
+            "Projects Relevance Score": proj_score,
+            "Experience Relevance Score": exp_score,
+            "Scoring Mode": OFFLINE_MARKER,
+        })
+    return out
+
+
+def score_resume(model, job_description: str, text: str, user_id: str = None) -> dict:
+    return score_resumes(model, job_description, [text], user_id)[0]
+
+
+def is_offline(analysis: dict) -> bool:
+    return analysis.get("Scoring Mode") == OFFLINE_MARKER
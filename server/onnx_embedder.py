@@ -0,0 +1,154 @@
+# File: onnx_embedder.py
+# --------------------------------------------------------------------------
+# all-MiniLM-L6-v2 on ONNX Runtime, int8 (dynamic quantisation), as a
+# drop-in for SentenceTransformer.encode when EMBEDDING_BACKEND=onnx.
+# No torch at serve time: onnxruntime + the Rust `tokenizers` package.
+#   • texts are cut to MAX_CHARS before tokenising (the model only reads
+#     MAX_SEQ_LENGTH word pieces), then encoded with encode_batch
+#   • dynamic batching: texts are sorted by token count and packed so a
+#     batch pads to at most BATCH_TOKENS tokens; short chunks are not
+#     padded to the longest resume in the call
+#   • mean pooling over the attention mask + L2 normalisation, exactly the
+#     Pooling / Normalize modules of the sentence-transformers model
+#
+# One-time export (needs torch, sentence-transformers, onnx, onnxruntime):
+#   cd server
+#   python -m onnx_embedder export --out models/all-MiniLM-L6-v2-onnx
+# → model.onnx (fp32), model_int8.onnx, tokenizer.json
+# --------------------------------------------------------------------------
+
+import argparse
+import os
+
+import numpy as np
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("models", "all-MiniLM-L6-v2-onnx"))
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "model_int8.onnx")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))         # 0 = onnxruntime picks
+MAX_SEQ_LENGTH = 256            # word pieces, as the sentence-transformers model
+MAX_CHARS = MAX_SEQ_LENGTH * 12         # more characters than that many word pieces ever span
+BATCH_TOKENS = int(os.getenv("ONNX_BATCH_TOKENS", "8192"))
+EMBED_DIM = 384
+
+
+class OnnxEncoder:
+    """encode() / get_sentence_embedding_dimension() of a SentenceTransformer, on ONNX Runtime."""
+
+    cache_tag = "onnx-int8"         # vectors differ slightly from torch ones: separate cache
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, model_file: str = ONNX_MODEL_FILE,
+                 threads: int = ONNX_THREADS, batch_tokens: int = BATCH_TOKENS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = os.path.join(model_dir, model_file)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} missing; run `python -m onnx_embedder export --out {model_dir}`")
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.no_padding()             # padded per batch below
+        self.batch_tokens = max(MAX_SEQ_LENGTH, batch_tokens)
+        print(f"🧮 ONNX embedder loaded: {path}")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return EMBED_DIM
+
+    def _batches(self, lengths: np.ndarray, batch_size: int):
+        """Index batches, longest first, each padding to ≤ batch_tokens tokens."""
+        order = np.argsort(-lengths, kind="stable")
+        batch = []
+        for i in order:
+            if batch and (len(batch) >= batch_size or (len(batch) + 1) * lengths[batch[0]] > self.batch_tokens):
+                yield batch
+                batch = []
+            batch.append(int(i))
+        if batch:
+            yield batch
+
+    def _run(self, encodings: list) -> np.ndarray:
+        width = max(len(e.ids) for e in encodings)
+        ids = np.zeros((len(encodings), width), dtype=np.int64)
+        mask = np.zeros_like(ids)
+        for row, e in enumerate(encodings):
+            ids[row, :len(e.ids)] = e.ids
+            mask[row, :len(e.ids)] = 1
+        feed = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feed["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feed)[0]
+        summed = np.einsum("bsd,bs->bd", hidden, mask.astype(hidden.dtype))
+        pooled = summed / np.maximum(mask.sum(axis=1, keepdims=True), 1)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        # all-MiniLM-L6-v2 ends in a Normalize module, so vectors are unit length either way
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), EMBED_DIM), dtype="float32")
+        if texts:
+            encodings = self.tokenizer.encode_batch([t[:MAX_CHARS] for t in texts])
+            lengths = np.fromiter((len(e.ids) for e in encodings), dtype=np.int64, count=len(encodings))
+            for batch in self._batches(lengths, max(1, batch_size)):
+                out[batch] = self._run([encodings[i] for i in batch])
+        return out[0] if single else out
+
+
+def load_encoder(backend: str, model_name: str):
+    """(encoder, embedding-cache name) for EMBEDDING_BACKEND torch | onnx."""
+    if backend == "onnx":
+        encoder = OnnxEncoder()
+        return encoder, f"{model_name}-{encoder.cache_tag}"
+    if backend != "torch":
+        raise ValueError(f"EMBEDDING_BACKEND must be torch or onnx, not {backend!r}")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name), model_name
+
+
+# ─── export ────────────────────────────────────────────────────────────
+def export(model_name: str, out_dir: str) -> str:
+    """Writes model.onnx, model_int8.onnx and tokenizer.json for model_name into out_dir."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(out_dir, exist_ok=True)
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0].auto_model.eval()
+    st.tokenizer.save_pretrained(out_dir)           # tokenizer.json is what the fast path reads
+
+    sample = st.tokenizer(["an example resume line"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    axes = {n: {0: "batch", 1: "seq"} for n in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+    fp32 = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer, tuple(sample[n] for n in names), fp32,
+            input_names=names, output_names=["last_hidden_state"], dynamic_axes=axes, opset_version=14,
+        )
+    int8 = os.path.join(out_dir, "model_int8.onnx")
+    quantize_dynamic(fp32, int8, weight_type=QuantType.QInt8)
+    print(f"✅ Exported {model_name} → {fp32}, {int8}")
+    return int8
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m onnx_embedder")
+    sub = p.add_subparsers(dest="command", required=True)
+    e = sub.add_parser("export", help="export + int8-quantise the sentence-transformers model")
+    e.add_argument("--model", default="all-MiniLM-L6-v2")
+    e.add_argument("--out", default=ONNX_MODEL_DIR)
+    args = p.parse_args(argv)
+    export(args.model, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,30 @@ import json
 import os
 import zipfile
 import time
+import threading
+import contextvars
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import partial
 from pdfminer.high_level import extract_text
-import docx
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 from supabase import create_client
-from storage_utils import upload_resume_info_to_db 
+from storage_utils import upload_resume_info_to_db, writes_enabled
+import search_index
+import fulltext_index
+import metrics
+import tracing
+import resume_compression
+import offline_scoring
+import artifact_store
+import leaderboard
+import clustering
+import docx_stream
+import embedding_store
+import onnx_embedder
+from skill_index import split_skills
+import job_control
+from job_control import JobCancelled, ResumeTimeout
+from rate_governor import governor, RateLimited, estimate_tokens, parse_retry_after, backoff
 
 
 load_dotenv()
@@ -18,9 +36,32 @@ GROQ_API_KEY = os.getenv("OPENAI_API_KEY")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-client = openai.OpenAI(api_key=GROQ_API_KEY, base_url="https://api.groq.com/openai/v1")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-embed_model = SentenceTransformer("all-MiniLM-L6-v2")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+LLM_MODEL = "mistral-saba-24b"
+MAX_ATTEMPTS = 5                    # non-429 failures before the default analysis
+MAX_RATE_LIMITED_ATTEMPTS = 20      # 429s are paced by the governor, so allow more
+
+# multi-resume requests: set ANALYSIS_BATCH_MAX_RESUMES=1 to disable
+BATCH_MAX_RESUMES = int(os.getenv("ANALYSIS_BATCH_MAX_RESUMES", "6"))
+BATCH_TOKEN_BUDGET = int(os.getenv("ANALYSIS_BATCH_TOKEN_BUDGET", "2400"))
+BATCH_OUTPUT_TOKENS_PER_RESUME = 350
+# after this many consecutive LLM give-ups, the rest of the job is scored offline
+OFFLINE_AFTER_FAILURES = 3
+OFFLINE_CHUNK = 256
+# per-request cap; a resume's own deadline (RESUME_DEADLINE_SECONDS) can shorten it
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+# retries are owned by analyze_resume_mistral + the rate governor, not the SDK;
+# without a key (offline CLI runs) there is no client and only offline scoring works
+client = openai.OpenAI(
+    api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, max_retries=0, timeout=LLM_TIMEOUT_SECONDS
+) if GROQ_API_KEY else None
+supabase = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")      # or onnx (int8, no torch import)
+# vectors of texts seen before come from the on-disk cache (embedding_store)
+embed_model = embedding_store.cached(*onnx_embedder.load_encoder(EMBEDDING_BACKEND, EMBED_MODEL_NAME))
 
 PROCESSED_DATA_FOLDER = "processed_data"
 os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
@@ -48,11 +89,26 @@ def extract_zip(zip_path: str, extract_to: str):
 
 
 import os
-import docx
 from pdfminer.high_level import extract_text
 
-def read_resumes(folder_path: str):
+def read_resume_file(path: str) -> str:
+    """Text of one PDF/DOCX file."""
+    if path.lower().endswith(".pdf"):
+        with metrics.extraction("pdf"):
+            return extract_text(path)
+    with metrics.extraction("docx"):
+        # streamed; includes tables, text boxes, headers and footers
+        return docx_stream.extract_text(path)
+
+
+def read_resumes(folder_path: str, prefetched=None, workers: int = 1):
+    """
+    prefetched: optional mapping (ZIP member path relative to folder_path →
+    text) of files already read during upload; their text is not extracted again.
+    workers > 1 extracts text in that many processes (screening_cli batch runs).
+    """
     resumes = []
+    paths = []
 
     for root, _, files in os.walk(folder_path):
         for file in files:
@@ -69,30 +125,93 @@ def read_resumes(folder_path: str):
                 os.chmod(path, 0o644)
             except Exception as e:
                 print(f"⚠️ chmod failed for {file}: {e}")
+            paths.append(path)
+
+    cached = {}
+    if prefetched is not None:
+        for path in paths:
+            text = prefetched.get(os.path.relpath(path, folder_path).replace(os.sep, "/"))
+            if text is not None:
+                cached[path] = text
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    if pool:
+        pending = {path: pool.submit(read_resume_file, path) for path in paths if path not in cached}
 
-            # ✅ Try to read the file
+    try:
+        for path in paths:
+            file = os.path.basename(path)
+            # ✅ Try to read the file (abandoned after the resume's deadline)
+            job_control.checkpoint()
             try:
-                if file.lower().endswith(".pdf"):
-                    text = extract_text(path)
-                elif file.lower().endswith(".docx"):
-                    doc = docx.Document(path)
-                    text = "\n".join(p.text for p in doc.paragraphs)
+                t0 = time.monotonic()
+                text = cached.get(path)
+                if text is None and pool:
+                    try:
+                        text = pending[path].result(timeout=job_control.RESUME_DEADLINE_SECONDS)
+                    except FutureTimeout:
+                        raise ResumeTimeout(
+                            f"deadline of {job_control.RESUME_DEADLINE_SECONDS:.0f}s passed during extraction"
+                        )
+                elif text is None:
+                    text = job_control.run_with_deadline(read_resume_file, path)
 
                 if text.strip():
                     resumes.append({
                         "filename": os.path.basename(file),  # Clean file name
                         "text": text,
-                        "path": path
+                        "path": path,
+                        "extract_s": time.monotonic() - t0,
                     })
                     print(f"✅ Loaded resume: {file}")
                 else:
                     print(f"⚠️ Skipped empty resume: {file}")
+            except ResumeTimeout as e:
+                job_control.record_failure(file, e)
             except Exception as e:
                 print(f"❌ Failed to read {file}: {e}")
+    finally:
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
 
     return resumes
 
 
+def _llm_chat(call: str, messages: list, max_output_tokens: int = 400):
+    """
+    One chat completion through the shared rate governor. A provider 429 is
+    re-raised as RateLimited (after the governor has applied Retry-After).
+    Waiting for admission stops when the job is cancelled and is not charged
+    to the resume's deadline; the request itself is cut off at the deadline.
+    """
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY is not set; only scoring_mode='offline' is available")
+    est = estimate_tokens("".join(m["content"] for m in messages), max_output_tokens)
+    job_control.check_deadline(call)
+    with tracing.span(f"llm {call}", **{"gen_ai.system": "groq", "gen_ai.request.model": LLM_MODEL,
+                                         "llm.estimated_tokens": est}) as span, \
+            governor.slot(est, abort=job_control.checkpoint) as slot:
+        job_control.extend_deadline(slot["waited"])
+        timeout = LLM_TIMEOUT_SECONDS
+        left = job_control.remaining()
+        if left is not None:
+            job_control.check_deadline(call)
+            timeout = min(timeout, left)
+        t0 = time.perf_counter()
+        try:
+            resp = client.chat.completions.create(model=LLM_MODEL, messages=messages, timeout=timeout)
+        except openai.RateLimitError as e:
+            raise RateLimited(parse_retry_after(e.response.headers)) from e
+        metrics.observe_llm(call, LLM_MODEL, time.perf_counter() - t0, resp.usage)
+        slot["used_tokens"] = getattr(resp.usage, "total_tokens", None)
+        if span is not None:
+            span.set_attributes({
+                "llm.rate_wait_s": round(slot["waited"], 3),
+                "gen_ai.usage.input_tokens": getattr(resp.usage, "prompt_tokens", 0) or 0,
+                "gen_ai.usage.output_tokens": getattr(resp.usage, "completion_tokens", 0) or 0,
+            })
+    return resp
+
+
 def extract_candidate_name(resume_text):
     prompt = f"""
     Extract only the full name of the candidate from this resume text. Just return the name string, nothing else.
@@ -101,24 +220,20 @@ def extract_candidate_name(resume_text):
     {resume_text[:2000]}
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="mistral-saba-24b",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"Name extraction failed: {e}")
-        return "Unknown"
-
-def analyze_resume_mistral(resume_text: str, job_description: str):
-    prompt = f"""
-You are an AI that evaluates resumes based on job descriptions.
-Return your response in JSON only:
+    for attempt in range(MAX_RATE_LIMITED_ATTEMPTS):
+        try:
+            response = _llm_chat("name", [{"role": "user", "content": prompt}], max_output_tokens=20)
+            return response.choices[0].message.content.strip()
+        except RateLimited:
+            metrics.count_llm_retry("name", LLM_MODEL)
+        except (JobCancelled, ResumeTimeout):
+            raise
+        except Exception as e:
+            print(f"Name extraction failed: {e}")
+            return "Unknown"
+    return "Unknown"
 
-{{
+ANALYSIS_SCHEMA = """{
   "Key Skills": [],
   "Overall Analysis": "",
   "Certifications & Courses": [],
@@ -127,82 +242,455 @@ Return your response in JSON only:
   "Overall Match Score": 0-10,
   "Projects Relevance Score": 0-10,
   "Experience Relevance Score": 0-10
-}}
+}"""
+_LIST_FIELDS = ("Key Skills", "Certifications & Courses", "Relevant Projects", "Soft Skills")
+_SCORE_FIELDS = ("Overall Match Score", "Projects Relevance Score", "Experience Relevance Score")
+
+
+def _parse_json_object(content: str):
+    content = content.strip().replace(",}", "}").replace(",]", "]")
+    if not content.startswith("{"):
+        content = "{" + content.split("{",1)[-1]
+    if not content.endswith("}"):
+        content = content.rsplit("}",1)[0] + "}"
+    return json.loads(content)
+
+
+def _validate_analysis(obj):
+    """Normalised analysis dict, or None when the object is not a usable analysis."""
+    if not isinstance(obj, dict):
+        return None
+    out = {}
+    for key in _LIST_FIELDS:
+        value = obj.get(key, [])
+        if not isinstance(value, list):
+            return None
+        out[key] = [str(v) for v in value]
+    out["Overall Analysis"] = str(obj.get("Overall Analysis", ""))
+    for key in _SCORE_FIELDS:
+        try:
+            out[key] = min(10.0, max(0.0, float(obj[key])))
+        except (KeyError, TypeError, ValueError):
+            return None
+        if out[key].is_integer():
+            out[key] = int(out[key])
+    return out
+
+
+def analyze_resume_mistral(resume_text: str, job_description: str):
+    """
+    resume_text is expected to be packed already (resume_compression.compress).
+    Returns None once the LLM gives up; the caller scores the original text offline.
+    """
+    prompt = f"""
+You are an AI that evaluates resumes based on job descriptions.
+Return your response in JSON only:
+
+{ANALYSIS_SCHEMA}
 
 ### Job Description:
 {job_description}
 
 ### Resume:
-{resume_text[:2000]}
+{resume_text}
     """
-    for attempt in range(5):
+    errors, rate_limited = 0, 0
+    while errors < MAX_ATTEMPTS and rate_limited < MAX_RATE_LIMITED_ATTEMPTS:
         try:
-            resp = client.chat.completions.create(
-                model="mistral-saba-24b",
-                messages=[
-                    {"role": "system", "content": "Return only JSON."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            content = resp.choices[0].message.content.strip()
-            content = content.replace(",}", "}").replace(",]", "]")
-            if not content.startswith("{"):
-                content = "{" + content.split("{",1)[-1]
-            if not content.endswith("}"):
-                content = content.rsplit("}",1)[0] + "}"
-            return json.loads(content)
+            resp = _llm_chat("analysis", [
+                {"role": "system", "content": "Return only JSON."},
+                {"role": "user", "content": prompt}
+            ])
+            return _parse_json_object(resp.choices[0].message.content)
+        except RateLimited as e:
+            # the governor already paused every caller for Retry-After
+            rate_limited += 1
+            print(f"Rate limited ({rate_limited}): {e}")
+            metrics.count_llm_retry("analysis", LLM_MODEL)
+        except (JobCancelled, ResumeTimeout):
+            raise
         except Exception as e:
-            print(f"Attempt {attempt+1} error: {e}")
-            time.sleep(1.5)
-
-    print("⚠️ Returning default analysis after 5 retries.")
-    return {
-        "Key Skills": [], "Overall Analysis": "", "Certifications & Courses": [],
-        "Relevant Projects": [], "Soft Skills": [],
-        "Overall Match Score": 0, "Projects Relevance Score": 0, "Experience Relevance Score": 0
-    }
+            errors += 1
+            print(f"Attempt {errors} error: {e}")
+            metrics.count_llm_retry("analysis", LLM_MODEL)
+            time.sleep(backoff(errors))
 
-def process_resumes_in_batches(resumes, job_description, weights, job_id, user_id, batch_size=5):
-    results = []
-    resume_id_map = {}
+    print(f"⚠️ LLM gave up after {errors} errors / {rate_limited} rate limits → offline scoring.")
+    metrics.count_default_fallback(LLM_MODEL)
+    return None
 
-    for i in range(0, len(resumes), batch_size):
-        batch = resumes[i : i + batch_size]
 
-        for r in batch:
-            clean_name = os.path.basename(r["filename"]).strip().lower()
-            print(f"🧾 Adding to results.json → '{clean_name}'")
+def analyze_resumes_batch(items: list, job_description: str) -> dict:
+    """
+    Analyses several (key, packed_text) resumes in one request with keyed
+    outputs. Returns {key: (analysis, candidate_name)} for every section that
+    parsed and validated; keys that are missing or invalid are left out so
+    the caller can fall back to single-resume calls.
+    """
+    keys = [k for k, _ in items]
+    resumes = "\n\n".join(f"### Resume {k}:\n{text}" for k, text in items)
+    prompt = f"""
+You are an AI that evaluates resumes based on job descriptions.
+Evaluate each resume below independently against the same job description.
+Return JSON only: one object whose keys are exactly the resume ids ({", ".join(keys)}),
+each value shaped like this, plus "Candidate Name" (the candidate's full name):
+
+{ANALYSIS_SCHEMA}
+
+### Job Description:
+{job_description}
 
-            # ⬇ NEW — extract candidate’s full name --------------------
+{resumes}
+    """
+    messages = [
+        {"role": "system", "content": "Return only JSON."},
+        {"role": "user", "content": prompt}
+    ]
+    for attempt in range(MAX_RATE_LIMITED_ATTEMPTS):
+        try:
+            resp = _llm_chat("analysis_batch", messages,
+                             max_output_tokens=BATCH_OUTPUT_TOKENS_PER_RESUME * len(items))
+            parsed = _parse_json_object(resp.choices[0].message.content)
+            break
+        except RateLimited:
+            metrics.count_llm_retry("analysis_batch", LLM_MODEL)
+        except (JobCancelled, ResumeTimeout):
+            raise
+        except Exception as e:
+            # no batch-level retries: single-resume calls have their own
+            print(f"⚠️ Batch analysis of {len(items)} resumes failed: {e}")
+            return {}
+    else:
+        return {}
+
+    out = {}
+    for key in keys:
+        section = parsed.get(key) if isinstance(parsed, dict) else None
+        analysis = _validate_analysis(section)
+        if analysis is not None:
+            name = str(section.get("Candidate Name") or "").strip()
+            out[key] = (analysis, name)
+    metrics.count_batch_outcome(len(out), len(keys) - len(out))
+    return out
+
+
+def _pack_groups(items: list) -> list:
+    """
+    Greedy packing of [(resume, packed_text)] into request groups bounded by
+    BATCH_MAX_RESUMES and BATCH_TOKEN_BUDGET. Resumes above the budget go alone.
+    """
+    groups, cur, used = [], [], 0
+    for item in items:
+        cost = estimate_tokens(item[1])
+        if cur and (len(cur) >= BATCH_MAX_RESUMES or used + cost > BATCH_TOKEN_BUDGET):
+            groups.append(cur)
+            cur, used = [], 0
+        cur.append(item)
+        used += cost
+    if cur:
+        groups.append(cur)
+    return groups
+
+
+def _finish_resume(r, candidate_name, analysis, weights, job_id, user_id):
+    clean_name = os.path.basename(r["filename"]).strip().lower()
+    print(f"🧾 Adding to results.json → '{clean_name}'")
+    final_score = (
+        analysis.get("Experience Relevance Score", 0) * weights.get("experience", 1)
+        + analysis.get("Projects Relevance Score", 0) * weights.get("projects", 1)
+    )
+    analysis["Final Score"] = round(final_score, 2)
+    entry = {
+        "filename": r["filename"],
+        "candidate_name": candidate_name,
+        "analysis": analysis,
+    }
+
+    # DB + Storage upload  (pass candidate_name); multi-JD jobs upload once up front
+    job_control.check_deadline("upload")
+    resume_id = r.get("resume_id") or upload_resume_info_to_db(
+        r["filename"], r["path"], job_id, user_id, candidate_name
+    )
+    if resume_id:
+        print(f"🗂️ Stored resume_id for: {clean_name}")
+    elif writes_enabled():
+        print(f"❌ Skipped resume_id for: {r['filename']}")
+    return clean_name, entry, resume_id
+
+
+class _LLMHealth:
+    """Switches the rest of a job to offline scoring once the LLM keeps giving up."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.offline = False
+
+    def record(self, analysis: dict) -> None:
+        with self._lock:
+            if not offline_scoring.is_offline(analysis):
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures >= OFFLINE_AFTER_FAILURES and not self.offline:
+                self.offline = True
+                print(f"🔌 {self.failures} consecutive LLM failures → scoring the rest of the job offline")
+
+
+def _finish_offline(r, analysis, weights, job_id, user_id):
+    candidate_name = offline_scoring.guess_candidate_name(r["text"])
+    return [_finish_resume(r, candidate_name, analysis, weights, job_id, user_id)]
+
+
+def _process_offline(rs, job_description, weights, job_id, user_id):
+    analyses = offline_scoring.score_resumes(embed_model, job_description, [r["text"] for r in rs], user_id)
+    out = []
+    for r, a in zip(rs, analyses):
+        out += _within_deadline(partial(_finish_offline, r, a, weights, job_id, user_id), r)
+    return out
+
+
+def _process_one_resume(r, packed, job_description, weights, job_id, user_id):
+    # ⬇ NEW — extract candidate’s full name --------------------
+    candidate_name = extract_candidate_name(r["text"])
+    print(f"🔎 Extracted name: {candidate_name}")
+
+    # AI analysis on the JD-relevant part of the resume, within the token budget
+    analysis = analyze_resume_mistral(packed, job_description)
+    if analysis is None:
+        # scored locally on the full text instead of the old all-zero default,
+        # so the ranking stays meaningful (same scoring as the offline mode)
+        analysis = offline_scoring.score_resume(embed_model, job_description, r["text"], user_id)
+    return _finish_resume(r, candidate_name, analysis, weights, job_id, user_id)
+
+
+def _analyze_group(keyed, job_description):
+    """
+    The packed request of a group, under the budget of its slowest-extracted
+    resume. Returns ({key: (analysis, name)}, seconds it used from every
+    member's deadline); a request that times out leaves every key to the
+    single-resume fallback.
+    """
+    spent = max(r.get("extract_s", 0.0) for r, _ in keyed.values())
+    budget = job_control.RESUME_DEADLINE_SECONDS - spent
+    with job_control.resume_deadline(spent):
+        try:
+            batch = analyze_resumes_batch([(k, packed) for k, (_, packed) in keyed.items()], job_description)
+        except ResumeTimeout as e:
+            print(f"⏱️ Batch analysis of {len(keyed)} resumes timed out ({e}); analysing them alone")
+            batch = {}
+        used = budget - job_control.remaining()    # governor waits were given back already
+    return batch, max(0.0, used)
+
+
+def _finish_group_member(key, r, packed, batch, job_description, weights, job_id, user_id, health):
+    """batch: sections of the group's packed request, None for a group of one."""
+    if batch and key in batch:
+        analysis, candidate_name = batch[key]
+        health.record(analysis)
+        if not candidate_name:
             candidate_name = extract_candidate_name(r["text"])
-            print(f"🔎 Extracted name: {candidate_name}")
+        print(f"🔎 Extracted name: {candidate_name}")
+        return [_finish_resume(r, candidate_name, analysis, weights, job_id, user_id)]
+    if health.offline:
+        analysis = offline_scoring.score_resume(embed_model, job_description, r["text"], user_id)
+        return _finish_offline(r, analysis, weights, job_id, user_id)
+    if batch is not None:
+        print(f"↩️ Batch section {key} unusable, re-analysing {r['filename']} alone")
+    done = _process_one_resume(r, packed, job_description, weights, job_id, user_id)
+    health.record(done[1]["analysis"])
+    return [done]
+
+
+def _process_resume_group(group, job_description, weights, job_id, user_id, health):
+    """
+    One packed request per group, then each resume is finished under its own
+    deadline (its extraction plus the shared request count against it), so a
+    slow fallback only fails the resumes still outstanding and the finished
+    ones are kept.
+    """
+    if health.offline:
+        return _process_offline([r for r, _ in group], job_description, weights, job_id, user_id)
+
+    keyed = {f"R{i}": item for i, item in enumerate(group, start=1)}
+    job_control.checkpoint()
+    batch, shared = _analyze_group(keyed, job_description) if len(group) > 1 else (None, 0.0)
+    out = []
+    for key, (r, packed) in keyed.items():
+        out += _within_deadline(
+            partial(_finish_group_member, key, r, packed, batch, job_description, weights,
+                    job_id, user_id, health),
+            r, shared,
+        )
+    return out
 
-            # AI analysis
-            analysis = analyze_resume_mistral(r["text"], job_description)
-            final_score = (
-                analysis.get("Experience Relevance Score", 0) * weights.get("experience", 1)
-                + analysis.get("Projects Relevance Score", 0) * weights.get("projects", 1)
-            )
-            analysis["Final Score"] = round(final_score, 2)
-            results.append({"filename": r["filename"], "analysis": analysis})
 
-            # DB + Storage upload  (pass candidate_name)
-            resume_id = upload_resume_info_to_db(
-                r["filename"], r["path"], job_id, user_id, candidate_name
-            )
-            if resume_id:
-                resume_id_map[clean_name] = resume_id
-                print(f"🗂️ Stored resume_id for: {clean_name}")
-            else:
-                print(f"❌ Skipped resume_id for: {r['filename']}")
+def _within_deadline(task, r, shared: float = 0.0):
+    """
+    Runs one resume's task under its deadline, less the time it already
+    spent in extraction and in a request shared with its group. A resume
+    that runs out of time is recorded as failed and contributes no result.
+    """
+    job_control.checkpoint()
+    try:
+        with job_control.resume_deadline(r.get("extract_s", 0.0) + shared):
+            return task()
+    except ResumeTimeout as e:
+        job_control.record_failure(r["filename"], e)
+        return []
 
-        print(f"✅ Processed batch {i // batch_size + 1}")
-        time.sleep(1.5)
 
+def _notify(task, on_result):
+    done = task()
+    for _, entry, resume_id in done:
+        on_result(entry, resume_id)
+    return done
+
+
+def process_resumes_in_batches(resumes, job_description, weights, job_id, user_id,
+                               batch_size=5, scoring_mode="llm", report_id=None, analyses=None,
+                               on_result=None):
+    """
+    Analyses resumes concurrently. Short resumes are packed several to a
+    request (BATCH_MAX_RESUMES / BATCH_TOKEN_BUDGET). The pool is sized to the
+    governor's ceiling; the governor's AIMD window decides how many LLM calls
+    are really in flight. scoring_mode="offline" skips the LLM entirely;
+    analyses may then carry offline scores computed by the caller.
+    on_result(entry, resume_id) is called as each resume finishes.
+    """
+    results = []
+    resume_id_map = {}
+    pending = metrics.QUEUE_DEPTH.labels("resumes_pending")
+    pending.inc(len(resumes))
+
+    if scoring_mode == "offline":
+        report = None
+        if analyses is None:
+            analyses = []
+            for i in range(0, len(resumes), OFFLINE_CHUNK):
+                chunk = [r["text"] for r in resumes[i:i + OFFLINE_CHUNK]]
+                analyses += offline_scoring.score_resumes(embed_model, job_description, chunk, user_id)
+        tasks = [
+            partial(_within_deadline, partial(_finish_offline, r, a, weights, job_id, user_id), r)
+            for r, a in zip(resumes, analyses)
+        ]
+    else:
+        report = resume_compression.CompressionReport(report_id or job_id)
+        health = _LLMHealth()
+        items = []
+        for r in resumes:
+            packed, stats = resume_compression.compress(r["text"], job_description)
+            report.add(r["filename"], stats)
+            metrics.count_compression(stats)
+            items.append((r, packed))
+        tasks = [
+            partial(_process_resume_group, group, job_description, weights, job_id, user_id, health)
+            for group in _pack_groups(items)
+        ]
+
+    if on_result:
+        # report in completion order, from the worker thread that finished
+        tasks = [partial(_notify, task, on_result) for task in tasks]
+
+    pool = ThreadPoolExecutor(max_workers=governor.max_concurrency)
+    done = 0
+    try:
+        futures = [
+            # copy_context: metric labels (stage / job size) and the cancel token follow the work
+            pool.submit(contextvars.copy_context().run, task)
+            for task in tasks
+        ]
+        for fut in futures:
+            for clean_name, entry, resume_id in fut.result():
+                results.append(entry)
+                if resume_id:
+                    resume_id_map[clean_name] = resume_id
+                pending.dec()
+                done += 1
+                if done % batch_size == 0 or done == len(resumes):
+                    print(f"✅ Processed {done}/{len(resumes)} resumes {governor.snapshot()}")
+    except BaseException:
+        # e.g. JobCancelled: queued groups never start, in-flight ones stop at their next checkpoint
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        pending.dec(len(resumes) - done)     # cancelled or failed resumes
+    pool.shutdown()
+
+    if report and writes_enabled():         # local-only runs (screening_cli) leave no files behind
+        report.save(PROCESSED_DATA_FOLDER)
     return results, resume_id_map
 
 
 
+def index_resumes_for_search(resumes, results, resume_id_map, job_id, user_id, vectors=None):
+    """
+    Appends every stored resume to the recruiter's search indexes:
+    the FAISS shard (embeddings) and the BM25 full-text index (full text).
+    vectors: embed_resumes() output aligned with resumes, when already computed.
+    """
+    by_name = {os.path.basename(r["filename"]).strip().lower(): r for r in results}
+    docs, texts, rows = [], [], []
+    for i, r in enumerate(resumes):
+        clean_name = os.path.basename(r["filename"]).strip().lower()
+        resume_id = resume_id_map.get(clean_name)
+        entry = by_name.get(clean_name)
+        if not resume_id or not entry:
+            continue
+        docs.append({
+            "resume_id":      resume_id,
+            "filename":       r["filename"],
+            "candidate_name": entry.get("candidate_name"),
+            "score":          entry["analysis"].get("Overall Match Score", 0),
+        })
+        texts.append(r["text"])
+        rows.append(i)
+
+    if not docs:
+        return
+    try:
+        if vectors is None:
+            vectors = search_index.embed_resumes(embed_model, texts)
+        else:
+            vectors = vectors[rows]
+        search_index.add_resumes(user_id, job_id, docs, vectors)
+    except Exception as e:
+        print(f"🚨 Search indexing failed for job {job_id}: {e}")
+    try:
+        fulltext_index.add_documents(user_id, job_id, [
+            {"resume_id": d["resume_id"], "filename": d["filename"], "text": t}
+            for d, t in zip(docs, texts)
+        ])
+    except Exception as e:
+        print(f"🚨 Full-text indexing failed for job {job_id}: {e}")
+
+
+def cluster_resumes(resumes, results, resume_id_map, job_id, user_id, vectors):
+    """
+    Appends the job's analysed resumes to its applicant clusters.
+    vectors: embed_resumes() output aligned with resumes.
+    """
+    by_name = {os.path.basename(r["filename"]).strip().lower(): r for r in results}
+    members, rows = [], []
+    for i, r in enumerate(resumes):
+        clean_name = os.path.basename(r["filename"]).strip().lower()
+        entry = by_name.get(clean_name)
+        if not entry:
+            continue
+        members.append({
+            "member":         clean_name,
+            "resume_id":      resume_id_map.get(clean_name),
+            "filename":       r["filename"],
+            "candidate_name": entry.get("candidate_name"),
+            "score":          entry["analysis"].get("Final Score", 0.0),
+            "skills":         split_skills(entry["analysis"].get("Key Skills", [])),
+        })
+        rows.append(i)
+    try:
+        clustering.add(job_id, user_id, members, vectors[rows])
+    except Exception as e:
+        print(f"🚨 Clustering failed for job {job_id}: {e}")
+
 
 def process_all_resumes(
     zip_path: str,
@@ -210,35 +698,77 @@ def process_all_resumes(
     weightages: dict,
     resume_output_folder: str,
     job_id: str,
-    user_id: str
+    user_id: str,
+    scoring_mode: str = "llm",
+    prefetched=None
 ):
+    with metrics.job_context(count_zip_resumes(zip_path)):
+        return _process_all_resumes(
+            zip_path, job_description, weightages, resume_output_folder, job_id, user_id, scoring_mode,
+            prefetched
+        )
+
+
+def count_zip_resumes(zip_path: str) -> int:
+    """Cheap job-size estimate from the top-level ZIP listing (metric labels, scheduling)."""
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            return sum(n.lower().endswith((".pdf", ".docx", ".zip")) for n in zf.namelist())
+    except Exception:
+        return 0
+
+
+def _process_all_resumes(zip_path, job_description, weightages, resume_output_folder, job_id, user_id,
+                         scoring_mode="llm", prefetched=None):
     print("🚀 Extracting ZIP...")
-    extract_zip(zip_path, resume_output_folder)
+    with metrics.stage("extract_zip"):
+        extract_zip(zip_path, resume_output_folder)
 
     print("📄 Reading Resumes...")
-    resumes = read_resumes(resume_output_folder)
+    job_control.checkpoint()
+    with metrics.stage("read_resumes"):
+        resumes = read_resumes(resume_output_folder, prefetched)
     if not resumes:
         print("❌ No resumes found.")
-        return []
+        return [], {}
 
     print("🧠 Analyzing Resumes...")
-    results, resume_id_map = process_resumes_in_batches(resumes, job_description, weightages, job_id, user_id)
+    job_control.checkpoint()
+    leaderboard.begin(job_id, len(resumes), user_id)
+    with metrics.stage("analysis"):
+        results, resume_id_map = process_resumes_in_batches(
+            resumes, job_description, weightages, job_id, user_id, scoring_mode=scoring_mode,
+            on_result=partial(leaderboard.record, job_id)
+        )
+
+    print("🔎 Updating recruiter search indexes...")
+    job_control.checkpoint()
+    with metrics.stage("indexing"):
+        vectors = search_index.embed_resumes(embed_model, [r["text"] for r in resumes])
+        index_resumes_for_search(resumes, results, resume_id_map, job_id, user_id, vectors)
+    with metrics.stage("clustering"):
+        cluster_resumes(resumes, results, resume_id_map, job_id, user_id, vectors)
+
+    persist_job_results(job_id, results, resume_id_map)
+    return results, resume_id_map
+
 
-    job_json_path = os.path.join(PROCESSED_DATA_FOLDER, f"{job_id}_analysis.json")
-    with open(job_json_path, "w") as f:
-        json.dump(results, f, indent=4)
-    print(f"✅ Wrote local job analysis → {job_json_path}")
+def persist_job_results(job_id, results, resume_id_map):
+    """Single persisted copy (artifact store) + the analysis JSON in Supabase Storage."""
+    store_path = artifact_store.save_results(job_id, results, resume_id_map)
+    print(f"✅ Saved job artifacts → {store_path}")
+    if not writes_enabled():
+        return
 
     try:
         content = json.dumps(results).encode("utf-8")
         storage_path = f"{job_id}/resume_analysis.json"
-        supabase.storage.from_("resumes").upload(
-            path=storage_path,
-            file=content,
-            file_options={"content-type": "application/json"}
-        )
+        with metrics.storage_call("upload_analysis_json"):
+            supabase.storage.from_("resumes").upload(
+                path=storage_path,
+                file=content,
+                file_options={"content-type": "application/json"}
+            )
         print(f"✅ Uploaded to Supabase Storage: resumes/{storage_path}")
     except Exception as e:
         print(f"🚨 Failed to upload analysis JSON: {e}")
-
-    return results, resume_id_map
@@ -1,100 +1,122 @@
 # File: rank_candidates.py
 # --------------------------------------------------------------------------
-# Reads <job_id>_analysis.json  → normalizes scores → ranks candidates
-# → writes JSON & CSV → inserts into Supabase (resume_rankings).
+# Takes a job's analysis results (in memory, or from the artifact store)
+# → normalizes scores → ranks candidates → records rank in the artifact
+# store → inserts into Supabase (resume_rankings) → materializes the job's
+# dashboard aggregates (job_analytics).
 # Adds new columns candidate_name + status = 'unreviewed'.
 # --------------------------------------------------------------------------
 
 import os
-import json
-import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 from supabase import create_client
 from dotenv import load_dotenv
+import metrics
+import artifact_store
+import job_analytics
 
 # ─── ENV ────────────────────────────────────────────────────────────────
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Supabase credentials not found.")
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+if SUPABASE_URL and SUPABASE_KEY:
+    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+else:
+    # rank_results() still works (screening_cli); Supabase rankings are skipped
+    print("⚠️ Supabase credentials not found; rankings are not stored in resume_rankings.")
+    supabase = None
 
 # ─── CONSTANTS ─────────────────────────────────────────────────────────
-PROCESSED_DATA_FOLDER = "processed_data"
 DEFAULT_STATUS = "unreviewed"           # recruiter will change later
 
 
 # ─── MAIN PIPELINE ─────────────────────────────────────────────────────
-def compute_relative_ranking(job_id: str) -> None:
+def compute_relative_ranking(job_id: str, results: list = None, user_id: str = None,
+                             resume_id_map: dict = None) -> list:
     """
-    1. Load <job_id>_analysis.json (created by process_resumes.py)
+    1. Use the results handed over by the pipeline, or load them from the
+       artifact store (process_resumes.py)
     2. Normalize 'Final Score' → 0-100 Relative Ranking Score
-    3. Sort & save JSON + CSV
-    4. Upsert rows into resume_rankings
+    3. Sort & record score + rank in the artifact store
+    4. Upsert rows into resume_rankings (resume_id_map, when given, saves
+       the resume_uploads lookups)
+    5. Materialize score / skill / funnel aggregates for the dashboard
+    Returns the ranked entries.
     """
-    in_path = os.path.join(PROCESSED_DATA_FOLDER, f"{job_id}_analysis.json")
-    if not os.path.exists(in_path):
-        print(f"❌ analysis file not found: {in_path}")
-        return
-
-    with open(in_path) as f:
-        raw = json.load(f)
+    raw = results if results is not None else artifact_store.load_results(job_id)
     if not raw:
-        print("❌ analysis JSON is empty.")
-        return
+        print(f"❌ No analysis results for job {job_id}.")
+        return []
 
     # ── 1) collect Final Score & normalize ────────────────────────────
+    ranked, relative = rank_results(raw)
+
+    # ── 2) record ranking (jobs from before the store get one now) ────
+    if not artifact_store.exists(job_id):
+        artifact_store.save_results(job_id, raw)
+    artifact_store.save_ranking(job_id, relative)
+    print(f"✅ Ranking saved for job {job_id} ({len(ranked)} candidates)")
+
+    # ── 3) push to Supabase ───────────────────────────────────────────
+    records = _upsert_rankings(ranked, job_id, resume_id_map)
+
+    # ── 4) dashboard aggregates ───────────────────────────────────────
+    try:
+        job_analytics.materialize(
+            job_id, ranked, [(r["resume_id"], r["status"], r["total_score"]) for r in records], user_id
+        )
+    except Exception as e:
+        print(f"⚠️ Analytics for job {job_id} not materialized: {e}")
+    return ranked
+
+
+def rank_results(raw: list):
+    """
+    Final Score → 0-100 'Relative Ranking Score' (min-max) on every entry.
+    Returns (entries sorted best first, relative scores in input order).
+    """
     scores = [
         row["analysis"].get("Final Score", 0.0) or 0.0 for row in raw
     ]
     scaler = MinMaxScaler()
     normed = scaler.fit_transform([[s] for s in scores])
 
+    relative = []
     for idx, row in enumerate(raw):
         pct = round(float(normed[idx][0]) * 100, 2)
         row["analysis"]["Relative Ranking Score"] = pct
+        relative.append(pct)
 
     ranked = sorted(
         raw,
         key=lambda r: r["analysis"]["Relative Ranking Score"],
         reverse=True,
     )
-
-    # ── 2) write artifacts ────────────────────────────────────────────
-    out_json = os.path.join(PROCESSED_DATA_FOLDER, f"{job_id}_ranked.json")
-    out_csv  = os.path.join(PROCESSED_DATA_FOLDER, f"{job_id}_ranked.csv")
-
-    with open(out_json, "w") as f:
-        json.dump(ranked, f, indent=4)
-
-    pd.DataFrame(
-        [{"filename": r["filename"], **r["analysis"]} for r in ranked]
-    ).to_csv(out_csv, index=False)
-
-    print(f"✅ Ranked output saved:\n   • {out_json}\n   • {out_csv}")
-
-    # ── 3) push to Supabase ───────────────────────────────────────────
-    _upsert_rankings(ranked, job_id)
+    return ranked, relative
 
 
 # ─── helper: insert / update Supabase rows ─────────────────────────────
-def _upsert_rankings(ranked_list: list, job_id: str) -> None:
+def _upsert_rankings(ranked_list: list, job_id: str, resume_id_map: dict = None) -> list:
     records = []
+    if supabase is None:
+        return records
     for idx, cand in enumerate(ranked_list, start=1):
         file_name = cand["filename"]
 
-        # ↳ find resume_id from resume_uploads
-        resp = (
-            supabase.table("resume_uploads")
-            .select("resume_id")
-            .eq("file_name", file_name)
-            .eq("job_id", job_id)
-            .single()
-            .execute()
-        )
-        resume_id = (resp.data or {}).get("resume_id")
+        if resume_id_map is not None:
+            resume_id = resume_id_map.get(os.path.basename(file_name).strip().lower())
+        else:
+            # ↳ find resume_id from resume_uploads
+            with metrics.db_call("resume_uploads", "select"):
+                resp = (
+                    supabase.table("resume_uploads")
+                    .select("resume_id")
+                    .eq("file_name", file_name)
+                    .eq("job_id", job_id)
+                    .single()
+                    .execute()
+                )
+            resume_id = (resp.data or {}).get("resume_id")
         if not resume_id:
             print(f"⚠️  No resume_uploads row for {file_name}; skipping.")
             continue
@@ -112,15 +134,18 @@ def _upsert_rankings(ranked_list: list, job_id: str) -> None:
 
     if not records:
         print("⚠️  No valid records to insert.")
-        return
+        return records
 
     # Delete existing rankings for this job_id
-    supabase.table("resume_rankings").delete().eq("job_id", job_id).execute()
+    with metrics.db_call("resume_rankings", "delete"):
+        supabase.table("resume_rankings").delete().eq("job_id", job_id).execute()
     print(f"✅ Deleted existing rankings for job {job_id}")
 
     # Insert new rankings
-    supabase.table("resume_rankings").insert(records).execute()
+    with metrics.db_call("resume_rankings", "insert"):
+        supabase.table("resume_rankings").insert(records).execute()
     print(f"✅ Supabase: inserted {len(records)} rows into resume_rankings")
+    return records
 
 
 # ─── CLI entry ─────────────────────────────────────────────────────────
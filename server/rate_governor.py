@@ -0,0 +1,328 @@
+# File: rate_governor.py
+# --------------------------------------------------------------------------
+# Process-wide rate governor for LLM calls.
+#   • token buckets for requests/min and tokens/min (account limits)
+#   • AIMD concurrency window: +1 slot per window of successes,
+#     ×DECREASE_FACTOR on a 429
+#   • Retry-After from a 429 pauses every caller, not just the one that hit it
+#   • free slots go to fast-lane callers first, then to the tenant with the
+#     fewest calls in flight, so one bulk job cannot starve the others
+# All LLM callers in the screening process share `governor`; the tenant and
+# lane come from caller() (set by job_scheduler for each job).
+# The account limits are the host's, not the process's: `governor` keeps its
+# rpm / tpm buckets and the 429 pause in processed_data/rate_governor.db, so
+# every serve.py worker, shard worker and screening_cli run on the host
+# draws from one budget (taken under BEGIN IMMEDIATE). The AIMD window and
+# the fast-lane / tenant order of waiting calls stay per process.
+# --------------------------------------------------------------------------
+
+import contextvars
+import email.utils
+import itertools
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+DECREASE_FACTOR = 0.5
+DEFAULT_PAUSE = 2.0             # seconds to pause on a 429 without Retry-After
+MAX_PAUSE = 120.0
+ABORT_POLL_SECONDS = 1.0       # how often a waiting call re-checks its abort callback
+PROCESSED_DATA_FOLDER = "processed_data"
+BUDGET_DB_PATH = os.path.join(PROCESSED_DATA_FOLDER, "rate_governor.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS budget (
+    name  TEXT PRIMARY KEY,
+    level REAL NOT NULL,
+    stamp REAL NOT NULL
+);
+"""
+
+_tenant = contextvars.ContextVar("llm_tenant", default=None)
+_lane = contextvars.ContextVar("llm_lane", default="bulk")
+
+
+class RateLimited(Exception):
+    """Raised by callers to report a provider 429 to the governor."""
+
+    def __init__(self, retry_after: float = None):
+        super().__init__(f"rate limited (retry after {retry_after})")
+        self.retry_after = retry_after
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.stamp = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        if self.rate:
+            self.level -= amount        # may go negative: debt is repaid by refill
+
+
+class _SharedBudget:
+    """
+    Requests/min and tokens/min buckets plus the 429 pause in one SQLite
+    file, for every process that opens it. Rows: "requests" and "tokens"
+    (level, refill stamp in wall-clock seconds), "pause" (until).
+    """
+
+    def __init__(self, path: str, rpm: int, tpm: int):
+        self.path = path
+        self.per_minute = {"requests": rpm, "tokens": tpm}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        return closing(db)
+
+    def _buckets(self, db, now: float) -> dict:
+        levels = {name: (level, stamp) for name, level, stamp in db.execute("SELECT name, level, stamp FROM budget")}
+        buckets = {}
+        for name, per_minute in self.per_minute.items():
+            bucket = buckets[name] = _TokenBucket(per_minute)
+            bucket.level, bucket.stamp = levels.get(name, (bucket.level, now))
+        buckets["pause"] = levels.get("pause", (0.0, now))[0]
+        return buckets
+
+    @staticmethod
+    def _save(db, name: str, level: float, stamp: float) -> None:
+        db.execute("INSERT OR REPLACE INTO budget (name, level, stamp) VALUES (?, ?, ?)", (name, level, stamp))
+
+    def take(self, est_tokens: int) -> float:
+        """Takes 1 request and est_tokens when the budget allows (0.0), else returns the seconds to wait."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            b = self._buckets(db, now)
+            wait = max(b["pause"] - now, b["requests"].wait_time(1, now), b["tokens"].wait_time(est_tokens, now))
+            if wait <= 0:
+                b["requests"].take(1)
+                b["tokens"].take(est_tokens)
+                for name in self.per_minute:
+                    self._save(db, name, b[name].level, b[name].stamp)
+            db.execute("COMMIT")
+        return max(0.0, wait)
+
+    def charge(self, extra_tokens: int) -> None:
+        """Tokens used beyond the estimate taken at admission."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            bucket = self._buckets(db, now)["tokens"]
+            bucket.wait_time(0, now)                # refill up to now
+            bucket.take(extra_tokens)
+            self._save(db, "tokens", bucket.level, bucket.stamp)
+            db.execute("COMMIT")
+
+    def pause(self, seconds: float) -> None:
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO budget (name, level, stamp) VALUES ('pause', ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET level = MAX(level, excluded.level), stamp = excluded.stamp",
+                (now + seconds, now),
+            )
+
+    def paused_for(self) -> float:
+        with self._connect() as db:
+            row = db.execute("SELECT level FROM budget WHERE name = 'pause'").fetchone()
+        return max(0.0, row[0] - time.time()) if row else 0.0
+
+
+class RateGovernor:
+    def __init__(self, rpm: int = 0, tpm: int = 0, max_concurrency: int = 8,
+                 min_concurrency: int = 1, initial_concurrency: int = 2, budget_path: str = None):
+        """budget_path: share the rpm / tpm buckets and 429 pauses with other processes through this file."""
+        self.requests = _TokenBucket(rpm)
+        self.tokens = _TokenBucket(tpm)
+        self.budget = _SharedBudget(budget_path, rpm, tpm) if budget_path else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(max(self.min_concurrency, min(initial_concurrency, self.max_concurrency)))
+        self.in_flight = 0
+        self.in_flight_by_tenant = {}
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._waiting = {}                  # ticket → (lane rank, tenant)
+        self._tickets = itertools.count()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            rpm=int(os.getenv("GROQ_RPM", "30")),
+            tpm=int(os.getenv("GROQ_TPM", "0")),
+            max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "8")),
+            budget_path=BUDGET_DB_PATH,
+        )
+
+    # ── admission ────────────────────────────────────────────────────
+    def _next_ticket(self):
+        """Waiter that gets the next slot: fast lane, then least-served tenant, then FIFO."""
+        return min(
+            self._waiting,
+            key=lambda t: (self._waiting[t][0], self.in_flight_by_tenant.get(self._waiting[t][1], 0), t),
+        )
+
+    def acquire(self, est_tokens: int, abort=None) -> None:
+        """abort: optional callable polled while waiting; raise from it to give up the wait."""
+        tenant = _tenant.get()
+        with self._cond:
+            ticket = next(self._tickets)
+            self._waiting[ticket] = (0 if _lane.get() == "fast" else 1, tenant)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self.paused_until - now
+                    if wait <= 0 and (self.in_flight >= int(self.limit) or self._next_ticket() != ticket):
+                        wait = None                          # woken by release() / admission
+                    elif wait <= 0:
+                        wait = self._take(est_tokens, now)
+                        if wait <= 0:
+                            self.in_flight += 1
+                            self.in_flight_by_tenant[tenant] = self.in_flight_by_tenant.get(tenant, 0) + 1
+                            return
+                    if abort is not None:
+                        abort()
+                        wait = ABORT_POLL_SECONDS if wait is None else min(wait, ABORT_POLL_SECONDS)
+                    self._cond.wait(wait)
+            finally:
+                del self._waiting[ticket]
+                self._cond.notify_all()
+
+    def _take(self, est_tokens: int, now: float) -> float:
+        """0.0 once 1 request and est_tokens are taken from the budget, else the seconds to wait."""
+        if self.budget is not None:
+            return self.budget.take(est_tokens)
+        wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(est_tokens, now))
+        if wait <= 0:
+            self.requests.take(1)
+            self.tokens.take(est_tokens)
+        return wait
+
+    def release(self, outcome: str, est_tokens: int = 0, used_tokens: int = None,
+                retry_after: float = None) -> None:
+        """outcome: 'ok' | 'rate_limited' | 'error'."""
+        tenant = _tenant.get()
+        with self._cond:
+            self.in_flight -= 1
+            left = self.in_flight_by_tenant.get(tenant, 1) - 1
+            if left > 0:
+                self.in_flight_by_tenant[tenant] = left
+            else:
+                self.in_flight_by_tenant.pop(tenant, None)
+            now = time.monotonic()
+            if used_tokens is not None and used_tokens > est_tokens:
+                if self.budget is not None:
+                    self.budget.charge(used_tokens - est_tokens)
+                else:
+                    self.tokens.take(used_tokens - est_tokens)
+
+            if outcome == "ok":
+                # additive increase: roughly +1 slot per full window of successes
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            elif outcome == "rate_limited":
+                pause = min(MAX_PAUSE, retry_after if retry_after is not None else DEFAULT_PAUSE)
+                self.paused_until = max(self.paused_until, now + pause)
+                if self.budget is not None:
+                    self.budget.pause(pause)        # every process sharing the budget waits too
+                # one multiplicative cut per congestion event, not per failed caller
+                if now - self.last_decrease > max(1.0, pause):
+                    self.limit = max(self.min_concurrency, self.limit * DECREASE_FACTOR)
+                    self.last_decrease = now
+                    print(f"🐢 LLM rate limited → concurrency {self.limit:.1f}, pausing {pause:.1f}s")
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, est_tokens: int, abort=None):
+        """
+        with governor.slot(n) as s:
+            resp = client...create(...)
+            s["used_tokens"] = resp.usage.total_tokens
+        Raise RateLimited inside the block to report a 429. s["waited"] is
+        the time spent queued for admission.
+        """
+        t0 = time.monotonic()
+        self.acquire(est_tokens, abort)
+        info = {"used_tokens": None, "waited": time.monotonic() - t0}
+        try:
+            yield info
+        except RateLimited as e:
+            self.release("rate_limited", est_tokens, retry_after=e.retry_after)
+            raise
+        except Exception:
+            self.release("error", est_tokens)
+            raise
+        else:
+            self.release("ok", est_tokens, used_tokens=info["used_tokens"])
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "paused_for_s": round(max(0.0, self.paused_until - time.monotonic(),
+                                          self.budget.paused_for() if self.budget is not None else 0.0), 2),
+                "waiting": len(self._waiting),
+            }
+
+
+@contextmanager
+def caller(tenant: str, lane: str = "bulk"):
+    """Tags LLM calls made in this context (and copies of it) with a tenant and lane."""
+    t1, t2 = _tenant.set(tenant), _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(t2)
+        _tenant.reset(t1)
+
+
+# ─── helpers ───────────────────────────────────────────────────────────
+def estimate_tokens(text: str, max_output_tokens: int = 0) -> int:
+    return len(text) // 4 + max_output_tokens
+
+
+def parse_retry_after(headers) -> float:
+    """Retry-After as seconds or an HTTP date; None when absent or unparsable."""
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def backoff(attempt: int, base: float = 0.5, cap: float = 20.0) -> float:
+    """Full-jitter exponential backoff for non-429 failures."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+governor = RateGovernor.from_env()
@@ -0,0 +1,230 @@
+# File: resume_compression.py
+# --------------------------------------------------------------------------
+# JD-aware resume compression ahead of LLM analysis.
+#   1. split the extracted text into sections (by heading lines) and
+#      ~CHUNK_CHARS chunks inside each section
+#   2. score every chunk with BM25 against the job description, plus a
+#      small prior for the sections the analysis prompt asks about
+#   3. pack the best chunks into a fixed token budget and re-emit them in
+#      document order, under their section headings
+# The contact/header block is always kept. Savings are reported per job.
+# --------------------------------------------------------------------------
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+
+from fulltext_index import tokenize
+from rate_governor import estimate_tokens
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "450"))
+LEGACY_CHARS = 2000             # what analyze_resume_mistral used to send
+CHUNK_CHARS = 320
+HEADER_CHARS = 300
+BM25_K1 = 1.2
+BM25_B = 0.75
+PRIOR_WEIGHT = 0.35
+GAP = "…"
+
+SECTION_PRIORS = {
+    "experience": 1.0,
+    "projects": 1.0,
+    "skills": 0.8,
+    "certifications": 0.6,
+    "summary": 0.5,
+    "education": 0.4,
+    "other": 0.2,
+}
+_HEADINGS = {
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "work history", "career history", "internship", "internships"),
+    "projects": ("projects", "project", "academic projects", "personal projects", "key projects"),
+    "skills": ("skills", "technical skills", "key skills", "core competencies", "technologies",
+               "tech stack", "tools"),
+    "certifications": ("certifications", "certification", "certificates", "courses",
+                       "certifications & courses", "licenses"),
+    "summary": ("summary", "profile", "professional summary", "objective", "career objective",
+                "about me"),
+    "education": ("education", "academic background", "qualifications", "academics"),
+    "other": ("achievements", "awards", "publications", "languages", "interests", "hobbies",
+              "activities", "volunteering", "references", "declaration", "personal details"),
+}
+_HEADING_LOOKUP = {h: kind for kind, names in _HEADINGS.items() for h in names}
+_SPACES_RE = re.compile(r"[ \t ]+")
+
+
+# ─── sectioning ────────────────────────────────────────────────────────
+def _heading_kind(line: str):
+    key = line.strip().strip(":-–|•").strip().lower()
+    if not key or len(key) > 40:
+        return None
+    return _HEADING_LOOKUP.get(key)
+
+
+def _normalise(text: str) -> list:
+    """Non-empty lines with runs of spaces collapsed (pdfminer output is padded)."""
+    lines = (_SPACES_RE.sub(" ", ln).strip() for ln in text.replace("\r", "").split("\n"))
+    return [ln for ln in lines if ln]
+
+
+def split_sections(text: str) -> list:
+    """[(kind, heading_line | None, [lines])] in document order; the first is 'header'."""
+    sections = [("header", None, [])]
+    for line in _normalise(text):
+        kind = _heading_kind(line)
+        if kind:
+            sections.append((kind, line, []))
+        else:
+            sections[-1][2].append(line)
+    return [s for s in sections if s[2] or s[1]]
+
+
+def _chunk(lines: list, limit: int = CHUNK_CHARS) -> list:
+    chunks, cur, size = [], [], 0
+    for line in lines:
+        if cur and size + len(line) > limit:
+            chunks.append("\n".join(cur))
+            cur, size = [], 0
+        cur.append(line)
+        size += len(line) + 1
+    if cur:
+        chunks.append("\n".join(cur))
+    return chunks
+
+
+# ─── scoring ───────────────────────────────────────────────────────────
+@lru_cache(maxsize=32)
+def _jd_terms(job_description: str) -> tuple:
+    return tuple(Counter(tokenize(job_description)).items())
+
+
+def _bm25(chunk_tokens: list, query: tuple) -> list:
+    n = len(chunk_tokens)
+    avg = sum(len(t) for t in chunk_tokens) / n or 1.0
+    tfs = [Counter(t) for t in chunk_tokens]
+    df = Counter(term for tf in tfs for term in tf)
+    scores = []
+    for toks, tf in zip(chunk_tokens, tfs):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(toks) / avg)
+        s = 0.0
+        for term, qtf in query:
+            f = tf.get(term)
+            if f:
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                s += qtf * idf * f * (BM25_K1 + 1) / (f + norm)
+        scores.append(s)
+    return scores
+
+
+# ─── public API ────────────────────────────────────────────────────────
+def compress(resume_text: str, job_description: str, budget: int = TOKEN_BUDGET):
+    """
+    Returns (packed_text, stats). stats carries original / legacy / sent
+    token estimates so callers can report savings.
+    """
+    original = estimate_tokens(resume_text)
+    stats = {
+        "original_tokens": original,
+        "legacy_tokens": estimate_tokens(resume_text[:LEGACY_CHARS]),
+        "chunks_total": 0,
+        "chunks_kept": 0,
+    }
+
+    sections = split_sections(resume_text)
+    chunks = []                                  # (section_no, kind, text)
+    for no, (kind, _, lines) in enumerate(sections):
+        for part in _chunk(lines):
+            chunks.append((no, kind, part))
+    stats["chunks_total"] = len(chunks)
+
+    compact = "\n".join(
+        "\n".join(([heading] if heading else []) + lines) for _, heading, lines in sections
+    )
+    if estimate_tokens(compact) <= budget or not chunks:
+        stats.update(sent_tokens=estimate_tokens(compact), chunks_kept=len(chunks))
+        return compact, stats
+
+    bm25 = _bm25([tokenize(c[2]) for c in chunks], _jd_terms(job_description))
+    top = max(bm25) or 1.0
+    scores = [b / top + PRIOR_WEIGHT * SECTION_PRIORS.get(kind, 0.2)
+              for b, (_, kind, _) in zip(bm25, chunks)]
+
+    keep, used = set(), 0
+    if chunks[0][1] == "header":                # name + contact line, always sent
+        used = estimate_tokens(chunks[0][2][:HEADER_CHARS])
+        keep.add(0)
+    for i in sorted(range(len(chunks)), key=scores.__getitem__, reverse=True):
+        if i in keep:
+            continue
+        heading = sections[chunks[i][0]][1]
+        new_section = heading and not any(chunks[j][0] == chunks[i][0] for j in keep)
+        cost = estimate_tokens(chunks[i][2]) + (estimate_tokens(heading) + 1 if new_section else 0)
+        if used + cost <= budget:
+            keep.add(i)
+            used += cost
+
+    out, last_section, last_i = [], None, -1
+    for i in sorted(keep):
+        no, _, text = chunks[i]
+        if i == 0 and chunks[0][1] == "header":
+            text = text[:HEADER_CHARS]
+        if no != last_section and sections[no][1]:
+            out.append(sections[no][1])
+        elif i != last_i + 1:
+            out.append(GAP)
+        out.append(text)
+        last_section, last_i = no, i
+
+    packed = "\n".join(out)
+    stats.update(sent_tokens=estimate_tokens(packed), chunks_kept=len(keep))
+    return packed, stats
+
+
+class CompressionReport:
+    """Thread-safe per-job accumulator of compression stats."""
+
+    def __init__(self, job_id: str, budget: int = TOKEN_BUDGET):
+        self.job_id = job_id
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._totals = Counter()
+        self._per_resume = []
+
+    def add(self, filename: str, stats: dict) -> None:
+        with self._lock:
+            self._totals.update({k: v for k, v in stats.items() if isinstance(v, int)})
+            self._totals["resumes"] += 1
+            self._per_resume.append({"filename": filename, **stats})
+
+    def summary(self) -> dict:
+        with self._lock:
+            t = dict(self._totals)
+        return {
+            "job_id": self.job_id,
+            "token_budget": self.budget,
+            "resumes": t.get("resumes", 0),
+            "original_tokens": t.get("original_tokens", 0),
+            "legacy_tokens": t.get("legacy_tokens", 0),
+            "sent_tokens": t.get("sent_tokens", 0),
+            "saved_vs_full": t.get("original_tokens", 0) - t.get("sent_tokens", 0),
+            "saved_vs_legacy": t.get("legacy_tokens", 0) - t.get("sent_tokens", 0),
+            "chunks_total": t.get("chunks_total", 0),
+            "chunks_kept": t.get("chunks_kept", 0),
+        }
+
+    def save(self, folder: str) -> str:
+        summary = self.summary()
+        path = os.path.join(folder, f"{self.job_id}_compression.json")
+        with open(path, "w") as f:
+            json.dump({**summary, "resumes_detail": self._per_resume}, f)
+        print(
+            f"🗜️ Compression for job {self.job_id}: sent {summary['sent_tokens']} tokens "
+            f"(full text {summary['original_tokens']}, legacy truncation {summary['legacy_tokens']}) "
+            f"→ saved {summary['saved_vs_full']} vs full, {summary['saved_vs_legacy']} vs legacy"
+        )
+        return path
@@ -0,0 +1,475 @@
+# File: routes/chunked_upload.py
+# --------------------------------------------------------------------------
+# Resumable, chunked upload of a resume ZIP:
+#   POST /uploads/                       total_size[, sha256] → upload_id
+#   PUT  /uploads/{id}/chunks?offset=N   raw chunk bytes (X-Chunk-SHA256)
+#   GET  /uploads/{id}                   received / missing byte ranges
+#   POST /uploads/{id}/complete          (api_service) verify → screening job
+# The upload_id becomes the job_id. Chunks are written off the event loop
+# into a pre-sized uploads/<id>.part and recorded in
+# uploads/chunked_uploads.db, so after a dropped connection (or a restart)
+# the client only re-sends the missing ranges.
+#
+# Early ingestion: whenever the contiguous prefix of the file grows, a
+# background thread walks the ZIP local file headers it covers, extracts
+# every fully received PDF/DOCX member into resumes/<id>/ and reads its
+# text; the job later skips text extraction for those files. Members with
+# a data descriptor (streamed ZIPs), ZIP64 sizes or encryption stop early
+# ingestion — the normal extraction after /complete still handles them.
+# --------------------------------------------------------------------------
+
+import hashlib
+import os
+import posixpath
+import socket
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Form, Header, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from auth import current_user_id
+from process_resumes import read_resume_file
+
+router = APIRouter()
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+UPLOAD_FOLDER = "uploads"
+RESUME_FOLDER = "resumes"
+DB_PATH = os.path.join(UPLOAD_FOLDER, "chunked_uploads.db")
+CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_MB", "8")) * 1024 * 1024          # suggested to clients
+MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_MB", "32")) * 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_GB", "4")) * 1024 ** 3
+UPLOAD_TTL = 24 * 3600          # unfinished uploads and cached texts are purged after this
+EARLY_INGEST_WORKERS = int(os.getenv("EARLY_INGEST_WORKERS", "2"))
+SCAN_LEASE_SECONDS = 120
+FINALIZE_WAIT_SECONDS = 300
+MISSING_RANGES_SHOWN = 50
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")   # sig … crc, csize, usize, name len, extra len
+_LOCAL_SIG = 0x04034B50
+_END_SIGS = (0x02014B50, 0x06054B50, 0x06064B50)  # central directory / end records
+_FLAG_ENCRYPTED, _FLAG_DESCRIPTOR, _FLAG_UTF8 = 0x1, 0x8, 0x800
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_id   TEXT PRIMARY KEY,
+    user_id     TEXT,
+    total_size  INTEGER NOT NULL,
+    sha256      TEXT,
+    state       TEXT NOT NULL,          -- receiving | finalizing | complete
+    created_at  REAL NOT NULL,
+    scan_offset INTEGER NOT NULL DEFAULT 0,
+    early_state TEXT NOT NULL DEFAULT 'scanning',   -- scanning | done | stopped
+    early_note  TEXT,
+    scan_owner  TEXT,
+    scan_lease  REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    upload_id TEXT NOT NULL,
+    offset    INTEGER NOT NULL,
+    length    INTEGER NOT NULL,
+    sha256    TEXT NOT NULL,
+    PRIMARY KEY (upload_id, offset)
+);
+CREATE TABLE IF NOT EXISTS early_texts (
+    upload_id TEXT NOT NULL,
+    member    TEXT NOT NULL,
+    text      TEXT NOT NULL,
+    PRIMARY KEY (upload_id, member)
+);
+"""
+
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+_early_pool = ThreadPoolExecutor(max_workers=EARLY_INGEST_WORKERS, thread_name_prefix="early-ingest")
+_active = {}                    # upload_id → {"again": bool} while a scan is queued/running here
+_active_lock = threading.Lock()
+
+
+def _connect():
+    db = sqlite3.connect(DB_PATH, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return closing(db)
+
+
+def _part_path(upload_id: str) -> str:
+    return os.path.join(UPLOAD_FOLDER, f"{upload_id}.part")
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ─── bookkeeping ───────────────────────────────────────────────────────
+def _get_upload(upload_id: str, user_id: str) -> dict:
+    with _connect() as db:
+        db.row_factory = sqlite3.Row
+        row = db.execute("SELECT * FROM uploads WHERE upload_id = ?", (upload_id,)).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if row["user_id"] != user_id:
+        raise HTTPException(status_code=403, detail="Not your upload")
+    return dict(row)
+
+
+def _ranges(upload_id: str) -> list:
+    """Received byte ranges [start, end), merged and sorted."""
+    with _connect() as db:
+        rows = db.execute(
+            "SELECT offset, offset + length FROM chunks WHERE upload_id = ? ORDER BY offset", (upload_id,)
+        ).fetchall()
+    merged = []
+    for start, end in rows:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _contiguous(ranges: list) -> int:
+    return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+
+def _missing(ranges: list, total: int) -> list:
+    gaps, pos = [], 0
+    for start, end in ranges:
+        if start > pos:
+            gaps.append([pos, start])
+        pos = max(pos, end)
+    if pos < total:
+        gaps.append([pos, total])
+    return gaps
+
+
+def _status(up: dict) -> dict:
+    ranges = _ranges(up["upload_id"])
+    missing = _missing(ranges, up["total_size"])
+    with _connect() as db:
+        early = db.execute(
+            "SELECT COUNT(*) FROM early_texts WHERE upload_id = ?", (up["upload_id"],)
+        ).fetchone()[0]
+    return {
+        "upload_id": up["upload_id"],
+        "state": up["state"],
+        "total_size": up["total_size"],
+        "received_bytes": sum(end - start for start, end in ranges),
+        "contiguous_bytes": _contiguous(ranges),
+        "missing": missing[:MISSING_RANGES_SHOWN],
+        "missing_ranges": len(missing),
+        "early_ingested": early,
+        "early_ingestion": up["early_state"] + (f" ({up['early_note']})" if up["early_note"] else ""),
+    }
+
+
+def _purge_expired():
+    cutoff = time.time() - UPLOAD_TTL
+    with _connect() as db:
+        ids = [r[0] for r in db.execute("SELECT upload_id FROM uploads WHERE created_at < ?", (cutoff,))]
+        for table in ("chunks", "early_texts", "uploads"):
+            db.executemany(f"DELETE FROM {table} WHERE upload_id = ?", [(i,) for i in ids])
+        db.commit()
+    for upload_id in ids:
+        if os.path.exists(_part_path(upload_id)):
+            os.remove(_part_path(upload_id))
+    if ids:
+        print(f"🧹 Purged {len(ids)} expired chunked uploads")
+
+
+def _write_chunk(upload_id: str, offset: int, data: bytes, checksum: Optional[str]) -> None:
+    digest = hashlib.sha256(data).hexdigest()
+    if checksum and checksum.lower() != digest:
+        raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+    with open(_part_path(upload_id), "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+    with _connect() as db:
+        db.execute(
+            "INSERT OR REPLACE INTO chunks (upload_id, offset, length, sha256) VALUES (?, ?, ?, ?)",
+            (upload_id, offset, len(data), digest),
+        )
+        db.commit()
+
+
+# ─── early ingestion ───────────────────────────────────────────────────
+def _kick_early_ingest(upload_id: str) -> None:
+    """Schedules a scan of newly received data; coalesces while one is pending here."""
+    with _active_lock:
+        if upload_id in _active:
+            _active[upload_id]["again"] = True
+            return
+        state = _active[upload_id] = {"again": False}
+    _early_pool.submit(_ingest_loop, upload_id, state)
+
+
+def _ingest_loop(upload_id: str, state: dict) -> None:
+    try:
+        while True:
+            state["again"] = False
+            _ingest_available(upload_id)
+            with _active_lock:
+                if not state["again"]:
+                    del _active[upload_id]
+                    return
+    except Exception as e:
+        print(f"⚠️ Early ingestion for {upload_id} failed: {e}")
+        with _active_lock:
+            _active.pop(upload_id, None)
+
+
+def _claim_scan(db, upload_id: str) -> bool:
+    """One scanner per upload across processes (lease in the uploads row)."""
+    now = time.time()
+    cur = db.execute(
+        "UPDATE uploads SET scan_owner = ?, scan_lease = ? WHERE upload_id = ? AND state = 'receiving' "
+        "AND early_state = 'scanning' AND (scan_owner IS NULL OR scan_lease < ? OR scan_owner = ?)",
+        (_owner(), now + SCAN_LEASE_SECONDS, upload_id, now, _owner()),
+    )
+    db.commit()
+    return cur.rowcount == 1
+
+
+def _stop_scan(db, upload_id: str, early_state: str, note: str = None) -> None:
+    db.execute("UPDATE uploads SET early_state = ?, early_note = ? WHERE upload_id = ?",
+               (early_state, note, upload_id))
+    db.commit()
+    print(f"📦 Early ingestion for {upload_id}: {early_state}" + (f" ({note})" if note else ""))
+
+
+def _ingest_available(upload_id: str) -> None:
+    """Extracts + reads every member whose bytes lie inside the contiguous prefix."""
+    with _connect() as db:
+        if not _claim_scan(db, upload_id):
+            return
+        try:
+            contiguous = _contiguous(_ranges(upload_id))
+            offset = db.execute("SELECT scan_offset FROM uploads WHERE upload_id = ?", (upload_id,)).fetchone()[0]
+            with open(_part_path(upload_id), "rb") as f:
+                while offset + _LOCAL_HEADER.size <= contiguous:
+                    if db.execute("SELECT state FROM uploads WHERE upload_id = ?",
+                                  (upload_id,)).fetchone()[0] != "receiving":
+                        return
+                    f.seek(offset)
+                    sig, _, flags, method, _, _, crc, csize, usize, nlen, xlen = _LOCAL_HEADER.unpack(
+                        f.read(_LOCAL_HEADER.size))
+                    if sig != _LOCAL_SIG:
+                        if sig in _END_SIGS:
+                            _stop_scan(db, upload_id, "done")
+                        else:
+                            _stop_scan(db, upload_id, "stopped", f"unexpected record at byte {offset}")
+                        return
+                    if flags & _FLAG_ENCRYPTED:
+                        _stop_scan(db, upload_id, "stopped", "encrypted member")
+                        return
+                    if flags & _FLAG_DESCRIPTOR:
+                        _stop_scan(db, upload_id, "stopped", "streamed ZIP, sizes follow the data")
+                        return
+                    if 0xFFFFFFFF in (csize, usize):
+                        _stop_scan(db, upload_id, "stopped", "ZIP64 member")
+                        return
+                    data_start = offset + _LOCAL_HEADER.size + nlen + xlen
+                    if data_start + csize > contiguous:
+                        break
+                    raw_name = f.read(nlen)
+                    name = raw_name.decode("utf-8" if flags & _FLAG_UTF8 else "cp437")
+                    f.seek(data_start)
+                    _ingest_member(db, upload_id, name, method, crc, f.read(csize))
+                    offset = data_start + csize
+                    db.execute(
+                        "UPDATE uploads SET scan_offset = ?, scan_lease = ? WHERE upload_id = ?",
+                        (offset, time.time() + SCAN_LEASE_SECONDS, upload_id),
+                    )
+                    db.commit()
+        finally:
+            db.execute("UPDATE uploads SET scan_owner = NULL, scan_lease = NULL WHERE upload_id = ?", (upload_id,))
+            db.commit()
+
+
+def _ingest_member(db, upload_id: str, name: str, method: int, crc: int, raw: bytes) -> None:
+    member = posixpath.normpath(name)
+    if name.endswith("/") or not member.lower().endswith((".pdf", ".docx")):
+        return                                   # folders, nested ZIPs, other files: final pass
+    if member.startswith(("/", "../")) or member == "..":
+        metrics.UPLOAD_EARLY_MEMBERS.labels("skipped").inc()
+        return
+    if method == zipfile.ZIP_STORED:
+        data = raw
+    elif method == zipfile.ZIP_DEFLATED:
+        data = zlib.decompress(raw, -15)
+    else:
+        metrics.UPLOAD_EARLY_MEMBERS.labels("skipped").inc()
+        return
+    if zlib.crc32(data) != crc:
+        metrics.UPLOAD_EARLY_MEMBERS.labels("corrupt").inc()
+        return
+
+    path = os.path.join(RESUME_FOLDER, upload_id, *member.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as out:
+        out.write(data)
+    try:
+        text = read_resume_file(path)
+    except Exception as e:
+        print(f"⚠️ Early read of {member} failed, left to the job: {e}")
+        metrics.UPLOAD_EARLY_MEMBERS.labels("failed").inc()
+        return
+    db.execute("INSERT OR REPLACE INTO early_texts (upload_id, member, text) VALUES (?, ?, ?)",
+               (upload_id, member, text))
+    metrics.UPLOAD_EARLY_MEMBERS.labels("ingested").inc()
+
+
+class EarlyTexts:
+    """read_resumes() prefetched mapping backed by the texts read during upload."""
+
+    def __init__(self, upload_id: str):
+        self.upload_id = upload_id
+
+    def get(self, member: str, default=None):
+        with _connect() as db:
+            row = db.execute("SELECT text FROM early_texts WHERE upload_id = ? AND member = ?",
+                             (self.upload_id, member)).fetchone()
+        return row[0] if row else default
+
+    def __len__(self):
+        with _connect() as db:
+            return db.execute("SELECT COUNT(*) FROM early_texts WHERE upload_id = ?",
+                              (self.upload_id,)).fetchone()[0]
+
+
+# ─── finalize (called by api_service's /uploads/{id}/complete) ─────────
+def _set_state(upload_id: str, state: str, expected: str) -> bool:
+    with _connect() as db:
+        cur = db.execute("UPDATE uploads SET state = ? WHERE upload_id = ? AND state = ?",
+                         (state, upload_id, expected))
+        db.commit()
+    return cur.rowcount == 1
+
+
+def _wait_for_scanner(upload_id: str) -> None:
+    deadline = time.time() + FINALIZE_WAIT_SECONDS
+    while time.time() < deadline:
+        with _connect() as db:
+            owner, lease = db.execute("SELECT scan_owner, scan_lease FROM uploads WHERE upload_id = ?",
+                                      (upload_id,)).fetchone()
+        if owner is None or lease < time.time():
+            return
+        time.sleep(0.2)
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def finalize_upload(upload_id: str, user_id: str, sha256: Optional[str] = None):
+    """
+    Verifies a fully received upload and turns it into uploads/<id>.zip.
+    Returns (zip_path, EarlyTexts). Blocking; run it in a thread.
+    """
+    up = _get_upload(upload_id, user_id)
+    if not _set_state(upload_id, "finalizing", "receiving"):
+        raise HTTPException(status_code=409, detail=f"Upload is {up['state']}")
+    try:
+        missing = _missing(_ranges(upload_id), up["total_size"])
+        if missing:
+            raise HTTPException(status_code=409, detail={
+                "message": "Upload incomplete", "missing": missing[:MISSING_RANGES_SHOWN],
+            })
+        _wait_for_scanner(upload_id)
+
+        part = _part_path(upload_id)
+        expected = sha256 or up["sha256"]
+        if expected and expected.lower() != _file_sha256(part):
+            raise HTTPException(status_code=422, detail="File checksum mismatch")
+        if not zipfile.is_zipfile(part):
+            raise HTTPException(status_code=400, detail="Uploaded file is not a ZIP archive")
+    except HTTPException:
+        _set_state(upload_id, "receiving", "finalizing")
+        raise
+
+    zip_path = os.path.join(UPLOAD_FOLDER, f"{upload_id}.zip")
+    os.replace(part, zip_path)
+    _set_state(upload_id, "complete", "finalizing")
+    texts = EarlyTexts(upload_id)
+    print(f"📦 Upload {upload_id} complete: {up['total_size']} bytes, {len(texts)} resumes read early")
+    return zip_path, texts
+
+
+# ─── API endpoints ─────────────────────────────────────────────────────
+@router.post("/uploads/")
+async def create_upload(
+    total_size: int = Form(...),
+    sha256: Optional[str] = Form(None),
+    user_id: str = Depends(current_user_id),
+):
+    if not 0 < total_size <= MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=400, detail=f"total_size must be 1..{MAX_UPLOAD_BYTES} bytes")
+    upload_id = str(uuid.uuid4())
+
+    def _create():
+        _purge_expired()
+        with open(_part_path(upload_id), "wb") as f:
+            f.truncate(total_size)
+        with _connect() as db:
+            db.execute(
+                "INSERT INTO uploads (upload_id, user_id, total_size, sha256, state, created_at) "
+                "VALUES (?, ?, ?, ?, 'receiving', ?)",
+                (upload_id, user_id, total_size, sha256, time.time()),
+            )
+            db.commit()
+
+    await run_in_threadpool(_create)
+    return {"upload_id": upload_id, "chunk_size": CHUNK_BYTES, "max_chunk_size": MAX_CHUNK_BYTES}
+
+
+@router.put("/uploads/{upload_id}/chunks")
+async def put_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    x_chunk_sha256: Optional[str] = Header(None),
+    user_id: str = Depends(current_user_id),
+):
+    """Idempotent: re-sending a chunk at the same offset overwrites it."""
+    up = await run_in_threadpool(_get_upload, upload_id, user_id)
+    if up["state"] != "receiving":
+        raise HTTPException(status_code=409, detail=f"Upload is {up['state']}")
+
+    data = bytearray()
+    async for piece in request.stream():
+        data += piece
+        if len(data) > MAX_CHUNK_BYTES:
+            raise HTTPException(status_code=413, detail=f"Chunks are limited to {MAX_CHUNK_BYTES} bytes")
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty chunk")
+    if offset + len(data) > up["total_size"]:
+        raise HTTPException(status_code=400, detail="Chunk extends past total_size")
+
+    await run_in_threadpool(_write_chunk, upload_id, offset, bytes(data), x_chunk_sha256)
+    _kick_early_ingest(upload_id)
+    ranges = await run_in_threadpool(_ranges, upload_id)
+    return {
+        "offset": offset,
+        "length": len(data),
+        "received_bytes": sum(end - start for start, end in ranges),
+        "contiguous_bytes": _contiguous(ranges),
+    }
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str, user_id: str = Depends(current_user_id)):
+    up = await run_in_threadpool(_get_upload, upload_id, user_id)
+    return await run_in_threadpool(_status, up)
@@ -1,14 +1,126 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
 from supabase import create_client
 import os
 from dotenv import load_dotenv
 
+import search_index
+import skill_index
+import fulltext_index
+import artifact_store
+import job_analytics
+import clustering
+from auth import current_user_id
+from storage_utils import job_owner
+
 load_dotenv()
 
 router = APIRouter()
 
 supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
 
+# index-backed routes are plain def: the encoder, FAISS and SQLite calls block,
+# so FastAPI runs them in its threadpool instead of on the event loop
+
+@router.get("/search-candidates")
+def search_candidates(
+    q: str,
+    top_k: int = Query(20, ge=1, le=200),
+    job_id: str | None = None,
+    status: str | None = None,
+    min_score: float | None = None,
+    max_score: float | None = None,
+    user_id: str = Depends(current_user_id),
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    try:
+        from process_resumes import embed_model
+        query_vec = embed_model.encode([q], normalize_embeddings=True)[0]
+        hits = search_index.search(
+            user_id, query_vec, top_k=top_k, job_id=job_id, status=status,
+            min_score=min_score, max_score=max_score,
+        )
+        return {"query": q, "results": hits}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/fulltext-search")
+def fulltext_search(
+    q: str,
+    job_id: str | None = None,
+    top_k: int = Query(20, ge=1, le=200),
+    user_id: str = Depends(current_user_id),
+):
+    """BM25 over the full extracted text; quote a phrase to require it verbatim."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    try:
+        return {"query": q, "results": fulltext_index.search(user_id, q, job_id=job_id, top_k=top_k)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/skill-query")
+def skill_query(
+    q: str,
+    job_id: str | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    user_id: str = Depends(current_user_id),
+):
+    """Boolean skill search, e.g. q=Python AND (AWS OR GCP) NOT Java."""
+    try:
+        return skill_index.query(user_id, q, job_id=job_id, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/skills")
+def list_skills(prefix: str = "", user_id: str = Depends(current_user_id)):
+    return {"skills": skill_index.dictionary(user_id, prefix)}
+
+@router.get("/job-analytics")
+def get_job_analytics(job_id: str, user_id: str = Depends(current_user_id)):
+    """Materialized score histograms, top skills, certifications and status funnel of one job."""
+    hit = job_analytics.get(job_id)
+    if hit is None or hit[0] is None:
+        # jobs ranked before analytics existed (or stored without an owner):
+        # materialize once from the artifact store, under the job's owner
+        if job_owner(job_id) != user_id:
+            raise HTTPException(status_code=404, detail="No results for this job")
+        results = artifact_store.load_results(job_id, ranked=True)
+        if not results:
+            raise HTTPException(status_code=404, detail="No results for this job")
+        rows = supabase.table("resume_rankings").select("resume_id, status, total_score") \
+            .eq("job_id", job_id).execute().data
+        job_analytics.materialize(
+            job_id, results, [(r["resume_id"], r["status"] or job_analytics.DEFAULT_STATUS, r["total_score"])
+                              for r in rows],
+            user_id=user_id,
+        )
+        hit = job_analytics.get(job_id)
+    owner, payload = hit
+    if owner != user_id:
+        raise HTTPException(status_code=404, detail="No results for this job")
+    return payload
+
+@router.get("/job-clusters")
+def get_job_clusters(
+    job_id: str,
+    cluster: int = None,
+    limit: int = Query(100, ge=1, le=1000),
+    user_id: str = Depends(current_user_id),
+):
+    """Applicant groups of one job with their skill labels; ?cluster= lists that group's candidates."""
+    hit = clustering.get(job_id)
+    if hit is None:
+        raise HTTPException(status_code=404, detail="No clusters for this job")
+    owner, payload = hit
+    if owner and owner != user_id:
+        raise HTTPException(status_code=404, detail="No clusters for this job")
+    if cluster is None:
+        return payload
+    return {"job_id": job_id, "cluster": cluster, "candidates": clustering.members(job_id, cluster, limit)}
+
 @router.get("/compare-candidates")
 async def compare_candidates(resume_ids: list[str] = Query(...)):
     try:
@@ -37,47 +149,3 @@ async def get_resume_history(resume_id: str):
         return {"history": history.data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/export")
-async def export_results(job_id: str, format: str = "csv"):
-    try:
-        rankings = supabase.table("resume_rankings").select("*").eq("job_id", job_id).order("rank").execute().data
-        results = []
-
-        for rank in rankings:
-            rid = rank["resume_id"]
-            analysis = supabase.table("resume_analysis").select("*").eq("resume_id", rid).execute().data
-            upload = supabase.table("resume_uploads").select("*").eq("resume_id", rid).execute().data
-            rank["analysis"] = analysis[0] if analysis else {}
-            rank["upload"] = upload[0] if upload else {}
-            results.append(rank)
-
-        if not results:
-            raise HTTPException(status_code=404, detail="No rankings found for this job")
-
-        if format == "csv":
-            import csv
-            from fastapi.responses import StreamingResponse
-            from io import StringIO
-
-            csv_file = StringIO()
-            fieldnames = ["resume_id", "job_id", "total_score", "rank"]
-            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in results:
-                writer.writerow({
-                    "resume_id": row["resume_id"],
-                    "job_id": row["job_id"],
-                    "total_score": row["total_score"],
-                    "rank": row["rank"]
-                })
-            csv_file.seek(0)
-            from fastapi.responses import StreamingResponse
-
-            headers = {    "Content-Disposition": f"attachment; filename=screening_{job_id}.csv"}
-            return StreamingResponse(csv_file, media_type="text/csv", headers=headers)
-
-        else:
-            return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,229 @@
+# File: screening_cli.py
+# --------------------------------------------------------------------------
+# Batch screening without the web stack (no JWT, no upload endpoint):
+#
+#   cd server
+#   python -m screening_cli screen --zip resumes.zip --jd jd.txt \
+#          --workers 8 --out screening_out/
+#
+# extract ZIP → read resumes (--workers extraction processes) → analyse with
+# the same engine as a web job (rate governor + packed LLM requests, or
+# --scoring-mode offline) → rank → write
+#   <out>/ranked.json      full analyses, best first
+#   <out>/ranked.csv       one row per candidate
+#   <out>/ranked.parquet   same rows (needs pyarrow or fastparquet)
+#   <out>/timing.json      wall time per stage, throughput, skipped resumes
+# By default nothing is written to Supabase or the recruiter search
+# indexes, and SUPABASE_URL / SUPABASE_KEY may be unset. --persist
+# --user-id U stores the job like a web upload (resume_uploads + Storage,
+# artifact store, search indexes, clusters, resume_rankings).
+# --------------------------------------------------------------------------
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import pandas as pd
+
+import job_control
+import metrics
+import storage_utils
+import tracing
+from process_resumes import (
+    cluster_resumes, count_zip_resumes, embed_model, extract_zip, index_resumes_for_search,
+    persist_job_results, process_resumes_in_batches, read_resumes,
+)
+from rank_candidates import compute_relative_ranking, rank_results
+from rate_governor import caller, governor
+import search_index
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+CLI_USER = "screening-cli"          # tenant for the rate governor when --user-id is not given
+FORMATS = ("json", "csv", "parquet")
+
+
+class _Timings:
+    """Wall time per stage; stages are still reported to metrics.stage()."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        print(f"⏳ {name}…")
+        with metrics.stage(name):
+            yield
+        self.stages[name] = round(time.perf_counter() - t0, 3)
+        print(f"⏱️ {name}: {self.stages[name]:.2f}s")
+
+
+def _rows(ranked: list) -> list:
+    """Flat table rows for CSV / Parquet."""
+    rows = []
+    for rank, r in enumerate(ranked, start=1):
+        a = r["analysis"]
+        rows.append({
+            "rank": rank,
+            "filename": r["filename"],
+            "candidate_name": r.get("candidate_name"),
+            "relative_ranking_score": a.get("Relative Ranking Score"),
+            "final_score": a.get("Final Score"),
+            "overall_match_score": a.get("Overall Match Score"),
+            "experience_relevance_score": a.get("Experience Relevance Score"),
+            "projects_relevance_score": a.get("Projects Relevance Score"),
+            "key_skills": "; ".join(map(str, a.get("Key Skills", []))),
+            "soft_skills": "; ".join(map(str, a.get("Soft Skills", []))),
+            "certifications": "; ".join(map(str, a.get("Certifications & Courses", []))),
+            "scoring_mode": a.get("Scoring Mode", "llm"),
+            "overall_analysis": a.get("Overall Analysis", ""),
+        })
+    return rows
+
+
+def write_outputs(ranked: list, out_dir: str, formats) -> dict:
+    """{format: path} of the files written."""
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    if "json" in formats:
+        written["json"] = os.path.join(out_dir, "ranked.json")
+        with open(written["json"], "w", encoding="utf-8") as f:
+            json.dump(ranked, f, ensure_ascii=False, indent=2)
+    frame = pd.DataFrame(_rows(ranked))
+    if "csv" in formats:
+        written["csv"] = os.path.join(out_dir, "ranked.csv")
+        frame.to_csv(written["csv"], index=False)
+    if "parquet" in formats:
+        path = os.path.join(out_dir, "ranked.parquet")
+        try:
+            frame.to_parquet(path, index=False)
+            written["parquet"] = path
+        except ImportError as e:
+            print(f"⚠️ Parquet output skipped: {e}")
+    return written
+
+
+# ─── screen ────────────────────────────────────────────────────────────
+def screen(zip_path, job_description, out_dir, workers=1, weights=None, scoring_mode="llm",
+           formats=FORMATS, persist=False, user_id=None, job_id=None) -> dict:
+    """Runs one screening job locally; returns the timing summary (also in timing.json)."""
+    weights = weights or {"experience": 1, "projects": 1}
+    job_id = job_id or str(uuid.uuid4())
+    tenant = user_id or CLI_USER
+    timings = _Timings()
+    started = time.perf_counter()
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(tracing.span("screening_job", job_id=job_id, user_id=tenant,
+                                         scoring_mode=scoring_mode, persist=persist))
+        work = stack.enter_context(tempfile.TemporaryDirectory(prefix="screening_"))
+        if not persist:
+            stack.enter_context(storage_utils.local_only())
+        stack.enter_context(job_control.running(job_id))
+        stack.enter_context(caller(tenant, "bulk"))
+        stack.enter_context(metrics.job_context(count_zip_resumes(zip_path)))
+
+        folder = os.path.join(work, "resumes")
+        with timings.stage("extract_zip"):
+            extract_zip(zip_path, folder)
+        with timings.stage("read_resumes"):
+            resumes = read_resumes(folder, workers=workers)
+        if not resumes:
+            print("❌ No resumes found.")
+        with timings.stage("analysis"):
+            results, resume_id_map = process_resumes_in_batches(
+                resumes, job_description, weights, job_id, user_id, scoring_mode=scoring_mode
+            ) if resumes else ([], {})
+
+        if persist and results:
+            with timings.stage("indexing"):
+                vectors = search_index.embed_resumes(embed_model, [r["text"] for r in resumes])
+                index_resumes_for_search(resumes, results, resume_id_map, job_id, user_id, vectors)
+            with timings.stage("clustering"):
+                cluster_resumes(resumes, results, resume_id_map, job_id, user_id, vectors)
+            persist_job_results(job_id, results, resume_id_map)
+            with timings.stage("ranking"):
+                ranked = compute_relative_ranking(job_id, results, user_id, resume_id_map)
+        else:
+            with timings.stage("ranking"):
+                ranked = rank_results(results)[0] if results else []
+
+        with timings.stage("write_outputs"):
+            written = write_outputs(ranked, out_dir, formats)
+        control = job_control.info(job_id)
+
+    total = time.perf_counter() - started
+    summary = {
+        "job_id": job_id,
+        "persisted": persist,
+        "scoring_mode": scoring_mode,
+        "workers": workers,
+        "resumes_read": len(resumes),
+        "resumes_ranked": len(ranked),
+        "failed_resumes": control["failed_resumes"] if control else [],
+        "total_s": round(total, 3),
+        "resumes_per_s": round(len(ranked) / total, 2) if total else None,
+        "stages_s": timings.stages,
+        "llm": governor.snapshot(),
+        "outputs": written,
+    }
+    with open(os.path.join(out_dir, "timing.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"✅ Ranked {len(ranked)} resumes in {total:.1f}s → {out_dir}")
+    return summary
+
+
+# ─── CLI entry ─────────────────────────────────────────────────────────
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m screening_cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("screen", help="screen one ZIP of resumes against one job description")
+    p.add_argument("--zip", required=True, help="ZIP of PDF / DOCX resumes (nested ZIPs allowed)")
+    p.add_argument("--jd", required=True, help="text file with the job description")
+    p.add_argument("--out", required=True, help="output directory")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                   help="text extraction processes (LLM concurrency follows GROQ_MAX_CONCURRENCY)")
+    p.add_argument("--weight-experience", type=float, default=1)
+    p.add_argument("--weight-projects", type=float, default=1)
+    p.add_argument("--scoring-mode", choices=("llm", "offline"), default="llm")
+    p.add_argument("--formats", default=",".join(FORMATS), help="comma-separated: json,csv,parquet")
+    p.add_argument("--persist", action="store_true",
+                   help="also write to Supabase, the artifact store and the search indexes")
+    p.add_argument("--user-id", help="recruiter the job belongs to (required with --persist)")
+    p.add_argument("--job-id", help="job_id to use (default: a new UUID)")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+    if args.persist and not args.user_id:
+        parser.error("--persist needs --user-id")
+    if args.scoring_mode == "llm" and not os.getenv("OPENAI_API_KEY"):
+        parser.error("--scoring-mode llm needs OPENAI_API_KEY (or use --scoring-mode offline)")
+    if args.persist and not storage_utils.writes_enabled():
+        parser.error("--persist needs SUPABASE_URL and SUPABASE_KEY")
+    with open(args.jd, encoding="utf-8") as f:
+        job_description = f.read().strip()
+
+    tracing.setup(os.getenv("OTEL_SERVICE_NAME", "screening-cli"))
+    try:
+        screen(
+            args.zip, job_description, args.out, workers=max(1, args.workers),
+            weights={"experience": args.weight_experience, "projects": args.weight_projects},
+            scoring_mode=args.scoring_mode, formats=formats, persist=args.persist,
+            user_id=args.user_id, job_id=args.job_id,
+        )
+    except KeyboardInterrupt:
+        print("🛑 Interrupted.")
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# File: search_index.py
+# --------------------------------------------------------------------------
+# Persistent semantic index over resume text, sharded per recruiter.
+#   indexes/<user_id>/vectors.faiss  → HNSW graph (inner product, L2-normed)
+#   indexes/<user_id>/meta.db        → SQLite rows keyed by the FAISS id
+# Vectors are appended as jobs finish, so a shard never has to be rebuilt.
+# Several processes (serve.py workers during a restart, screening_cli
+# --persist) may share a shard: writers hold meta.db's write lock while
+# they extend and save the FAISS file, and every process re-reads that file
+# when meta.db shows another process's commit (PRAGMA data_version).
+# --------------------------------------------------------------------------
+
+import os
+import sqlite3
+import threading
+
+import faiss
+import numpy as np
+
+from index_paths import tenant_folder
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+EMBED_DIM = 384                 # all-MiniLM-L6-v2
+HNSW_M = 32                     # graph degree
+EXACT_SEARCH_LIMIT = 4096       # filtered sets this small are scored exactly
+CHUNK_CHARS = 1000              # resume text is embedded in windows of this size
+DB_LOCK_TIMEOUT = 60            # seconds a writer waits for another process's write
+
+
+# ─── embedding helper ──────────────────────────────────────────────────
+def embed_resumes(model, texts: list) -> np.ndarray:
+    """
+    Encodes each resume as the mean of its chunk embeddings, so skills that
+    only appear deep in the experience section still move the vector.
+    """
+    chunks, owners = [], []
+    for i, text in enumerate(texts):
+        text = " ".join(text.split())
+        parts = [text[j : j + CHUNK_CHARS] for j in range(0, len(text), CHUNK_CHARS)] or [""]
+        chunks.extend(parts)
+        owners.extend([i] * len(parts))
+
+    vecs = model.encode(chunks, batch_size=64, normalize_embeddings=True)
+    vecs = np.asarray(vecs, dtype="float32")
+
+    out = np.zeros((len(texts), vecs.shape[1]), dtype="float32")
+    np.add.at(out, np.asarray(owners), vecs)
+    faiss.normalize_L2(out)
+    return out
+
+
+# ─── shard: one recruiter's index + metadata ───────────────────────────
+class _Shard:
+    def __init__(self, user_id: str):
+        self.folder = tenant_folder(user_id)
+        self.index_path = os.path.join(self.folder, "vectors.faiss")
+        self.lock = threading.RLock()
+
+        self.db = sqlite3.connect(
+            os.path.join(self.folder, "meta.db"), check_same_thread=False, timeout=DB_LOCK_TIMEOUT
+        )
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS candidates (
+                vec_id         INTEGER PRIMARY KEY AUTOINCREMENT,
+                resume_id      TEXT UNIQUE,
+                job_id         TEXT,
+                filename       TEXT,
+                candidate_name TEXT,
+                status         TEXT,
+                score          REAL
+            )
+            """
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS ix_job ON candidates(job_id)")
+        self.db.commit()
+        self.version = None
+        self.refresh()
+
+    def _data_version(self) -> int:
+        return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        """Re-reads vectors.faiss when another process committed to meta.db since the last read."""
+        version = self._data_version()
+        if version == self.version:
+            return
+        if os.path.exists(self.index_path):
+            self.index = faiss.read_index(self.index_path)
+        else:
+            self.index = faiss.IndexIDMap2(
+                faiss.IndexHNSWFlat(EMBED_DIM, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            )
+        self.version = version
+
+    def save(self):
+        tmp = self.index_path + ".tmp"
+        faiss.write_index(self.index, tmp)
+        os.replace(tmp, self.index_path)
+
+
+_shards = {}
+_shards_lock = threading.Lock()
+
+
+def _get_shard(user_id: str) -> _Shard:
+    with _shards_lock:
+        shard = _shards.get(user_id)
+        if shard is None:
+            shard = _shards[user_id] = _Shard(user_id)
+        return shard
+
+
+# ─── write path ────────────────────────────────────────────────────────
+def add_resumes(user_id: str, job_id: str, docs: list, vectors: np.ndarray) -> int:
+    """
+    docs: [{"resume_id", "filename", "candidate_name", "score"}, ...]
+    vectors: float32 (len(docs), EMBED_DIM), already L2-normalized.
+    Returns the number of vectors appended to the recruiter's shard.
+    """
+    if not docs:
+        return 0
+
+    shard = _get_shard(user_id)
+    with shard.lock:
+        shard.db.execute("BEGIN IMMEDIATE")     # one writer per shard across processes
+        try:
+            shard.refresh()
+            ids = _add_locked(shard, job_id, docs, vectors)
+            shard.db.commit()
+        except BaseException:
+            shard.db.rollback()
+            shard.version = None                # in-memory FAISS may hold rolled-back vectors
+            raise
+
+    print(f"🔎 Indexed {len(ids)} resumes for recruiter {user_id} (job {job_id})")
+    return len(ids)
+
+
+def _add_locked(shard: _Shard, job_id: str, docs: list, vectors: np.ndarray) -> list:
+    ids, keep = [], []
+    for i, d in enumerate(docs):
+        cur = shard.db.execute(
+            """
+            INSERT OR IGNORE INTO candidates
+                (resume_id, job_id, filename, candidate_name, status, score)
+            VALUES (?, ?, ?, ?, 'unreviewed', ?)
+            """,
+            (d["resume_id"], job_id, d["filename"],
+             d.get("candidate_name"), float(d.get("score") or 0)),
+        )
+        if cur.rowcount:
+            ids.append(cur.lastrowid)
+            keep.append(i)
+
+    if ids:
+        # saved before the commit: a reader that sees the new rows finds their vectors
+        vecs = np.ascontiguousarray(vectors[keep], dtype="float32")
+        shard.index.add_with_ids(vecs, np.asarray(ids, dtype="int64"))
+        shard.save()
+    return ids
+
+
+def update_status(user_id: str, job_id: str, resume_id: str, status: str) -> None:
+    """Status of one candidate in one job (a resume can be screened for several jobs)."""
+    shard = _get_shard(user_id)
+    with shard.lock:
+        shard.db.execute(
+            "UPDATE candidates SET status = ? WHERE job_id = ? AND resume_id = ?", (status, job_id, resume_id)
+        )
+        shard.db.commit()
+
+
+# ─── read path ─────────────────────────────────────────────────────────
+def search(
+    user_id: str,
+    query_vector: np.ndarray,
+    top_k: int = 20,
+    job_id: str = None,
+    status: str = None,
+    min_score: float = None,
+    max_score: float = None,
+) -> list:
+    """Top-K cosine search inside one recruiter's shard with metadata filters."""
+    shard = _get_shard(user_id)
+    q = np.asarray(query_vector, dtype="float32").reshape(1, -1)
+    faiss.normalize_L2(q)
+
+    where, args = [], []
+    if job_id:
+        where.append("job_id = ?")
+        args.append(job_id)
+    if status:
+        where.append("status = ?")
+        args.append(status)
+    if min_score is not None:
+        where.append("score >= ?")
+        args.append(min_score)
+    if max_score is not None:
+        where.append("score <= ?")
+        args.append(max_score)
+
+    with shard.lock:
+        shard.refresh()
+        if shard.index.ntotal == 0:
+            return []
+
+        if where:
+            allowed = np.fromiter(
+                (r[0] for r in shard.db.execute(
+                    f"SELECT vec_id FROM candidates WHERE {' AND '.join(where)}", args
+                )),
+                dtype="int64",
+            )
+            if allowed.size == 0:
+                return []
+            if allowed.size <= EXACT_SEARCH_LIMIT:
+                # small candidate set → exact scoring beats a filtered graph walk
+                vecs = shard.index.reconstruct_batch(allowed)
+                sims = vecs @ q[0]
+                order = np.argsort(-sims)[:top_k]
+                hits = list(zip(allowed[order].tolist(), sims[order].tolist()))
+            else:
+                params = faiss.SearchParametersHNSW(
+                    sel=faiss.IDSelectorBatch(allowed), efSearch=max(64, 2 * top_k)
+                )
+                D, I = shard.index.search(q, top_k, params=params)
+                hits = [(i, s) for i, s in zip(I[0].tolist(), D[0].tolist()) if i != -1]
+        else:
+            params = faiss.SearchParametersHNSW(efSearch=max(64, 2 * top_k))
+            D, I = shard.index.search(q, top_k, params=params)
+            hits = [(i, s) for i, s in zip(I[0].tolist(), D[0].tolist()) if i != -1]
+
+        if not hits:
+            return []
+
+        placeholders = ",".join("?" * len(hits))
+        rows = shard.db.execute(
+            f"""
+            SELECT vec_id, resume_id, job_id, filename, candidate_name, status, score
+            FROM candidates WHERE vec_id IN ({placeholders})
+            """,
+            [h[0] for h in hits],
+        ).fetchall()
+
+    meta = {r[0]: r for r in rows}
+    results = []
+    for vec_id, sim in hits:
+        r = meta.get(vec_id)
+        if not r:
+            continue
+        results.append({
+            "resume_id":      r[1],
+            "job_id":         r[2],
+            "filename":       r[3],
+            "candidate_name": r[4],
+            "status":         r[5],
+            "score":          r[6],
+            "similarity":     round(float(sim), 4),
+        })
+    return results
@@ -0,0 +1,329 @@
+# File: serve.py
+# --------------------------------------------------------------------------
+# Preload-and-fork server for api_service:app and student/main.py:app.
+# uvicorn --workers N imports the app N times, so every worker loads its
+# own sentence-transformer, FAISS / ONNX state and clients. Here a master
+#   1. binds the listening socket once
+#   2. imports the app with the GC disabled, then gc.freeze()s everything
+#      it loaded, so workers' collections never touch (and copy) those pages
+#   3. forks the workers; each one re-creates the network clients it
+#      inherited (Supabase, OpenAI / Groq) and serves the shared socket
+#
+#   cd server
+#   python serve.py api_service:app --workers 4 --port 8000
+#   cd server/student
+#   python ../serve.py main:app --workers 4 --port 8001
+#
+# Signals to the master:
+#   SIGHUP   rolling restart: a new worker is forked and ready before each
+#            old one is told to stop (same code, fresh worker memory)
+#   SIGUSR2  reload: start a new master on the same socket (new code); once
+#            its workers are ready it stops this one
+#   SIGTERM / SIGINT  graceful stop: workers finish in-flight requests,
+#            then running screening jobs (SERVE_JOB_DRAIN_SECONDS)
+# Prometheus metrics are aggregated across workers through
+# PROMETHEUS_MULTIPROC_DIR (set here before the app is imported).
+# api_service's workers share the job queue, cancel tokens, leaderboards
+# and the GROQ_RPM budget through SQLite files in processed_data/, so any
+# worker runs, cancels or reports any job; the student app keeps its state
+# in Supabase. A stopping worker claims no new jobs and finishes its
+# running ones (SERVE_JOB_DRAIN_SECONDS), still cancellable and on
+# /leaderboard through the other workers; the search indexes (FAISS, BM25,
+# skills) take their SQLite write lock and reload other processes' commits.
+# POSIX only (fork); on Windows use uvicorn directly.
+# --------------------------------------------------------------------------
+
+import argparse
+import gc
+import os
+import select
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "2"))
+GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))      # in-flight requests on stop
+JOB_DRAIN_SECONDS = float(os.getenv("SERVE_JOB_DRAIN_SECONDS", "600"))   # running screening jobs on stop
+READY_TIMEOUT = 120             # seconds a new worker / master gets to start serving
+CRASH_BACKOFF = 1.0             # pause before replacing a worker that died young
+LISTEN_FD_ENV = "SERVE_LISTEN_FD"
+OLD_MASTER_ENV = "SERVE_OLD_MASTER"
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_flags = {"stop": False, "roll": False, "reload": False}
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(ln.split()[1]) for ln in f if ln.startswith("VmRSS")) / 1024
+    except (OSError, StopIteration):
+        return 0.0
+
+
+# ─── socket ────────────────────────────────────────────────────────────
+def _listen(host: str, port: int, backlog: int) -> socket.socket:
+    inherited = os.getenv(LISTEN_FD_ENV)
+    if inherited:
+        sock = socket.socket(fileno=int(inherited))
+        print(f"🔌 Listening socket inherited from the previous master (fd {inherited})")
+    else:
+        sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+# ─── worker side ───────────────────────────────────────────────────────
+def _client_rebuilders() -> list:
+    """(client class, rebuild(old) → new) for the SDKs the app has imported."""
+    out = []
+    if "supabase" in sys.modules:
+        from supabase import Client, create_client
+        out.append((Client, lambda c: create_client(str(c.supabase_url), c.supabase_key)))
+    for module, name in (("openai", "OpenAI"), ("groq", "Groq")):
+        klass = getattr(sys.modules.get(module), name, None)
+        if klass is not None:
+            out.append((klass, lambda c, k=klass: k(
+                api_key=c.api_key, base_url=str(c.base_url), max_retries=c.max_retries, timeout=c.timeout,
+            )))
+    return out
+
+
+def reconnect_clients(roots: list) -> int:
+    """
+    Replaces module-level SDK clients of the app's own modules with fresh
+    ones, so no connection pool / TLS state is shared with the master or
+    other workers. Aliases (from x import supabase) get the same new client.
+    """
+    rebuilders = _client_rebuilders()
+    if not rebuilders:
+        return 0
+    replaced = {}                   # id(old) → (old, new); old kept alive so ids stay unique
+    for module in list(sys.modules.values()):
+        path = os.path.abspath(getattr(module, "__file__", None) or "")
+        if "site-packages" in path or not any(path.startswith(r) for r in roots):
+            continue
+        for attr, value in list(vars(module).items()):
+            for klass, rebuild in rebuilders:
+                if isinstance(value, klass):
+                    if id(value) not in replaced:
+                        replaced[id(value)] = (value, rebuild(value))
+                    setattr(module, attr, replaced[id(value)][1])
+                    break
+    return len(replaced)
+
+
+def _drain_jobs() -> None:
+    scheduler = getattr(sys.modules.get("job_scheduler"), "scheduler", None)
+    if scheduler is not None and not scheduler.wait_idle(JOB_DRAIN_SECONDS):
+        print(f"⚠️ Worker {os.getpid()} stopped with screening jobs still running")
+
+
+def _run_worker(app, sock: socket.socket, ready_fd: int, args) -> None:
+    import uvicorn
+
+    for sig in (signal.SIGHUP, signal.SIGUSR2, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    gc.enable()
+    clients = reconnect_clients([os.path.abspath(args.app_dir), SERVER_DIR])
+
+    class _Server(uvicorn.Server):
+        async def startup(self, sockets=None):
+            await super().startup(sockets=sockets)
+            try:
+                os.write(ready_fd, b"1")
+                os.close(ready_fd)
+            except OSError:
+                pass
+
+    config = uvicorn.Config(
+        app, log_level=args.log_level, timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        proxy_headers=args.proxy_headers, forwarded_allow_ips=args.forwarded_allow_ips,
+    )
+    print(f"👷 Worker {os.getpid()} up ({clients} client(s) re-created)")
+    _Server(config).run(sockets=[sock])
+    _drain_jobs()
+
+
+# ─── master side ───────────────────────────────────────────────────────
+class Master:
+    def __init__(self, app, sock: socket.socket, args):
+        self.app, self.sock, self.args = app, sock, args
+        self.workers = {}           # pid → started_at
+        self.retiring = set()       # pids told to stop
+
+    def spawn(self):
+        """(pid, fd readable once the worker serves)."""
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            code = 0
+            try:
+                _run_worker(self.app, self.sock, w, self.args)
+            except BaseException as e:
+                print(f"🚨 Worker {os.getpid()} crashed: {e}")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        os.close(w)
+        self.workers[pid] = time.monotonic()
+        return pid, r
+
+    @staticmethod
+    def wait_ready(fds: list, timeout: float = READY_TIMEOUT) -> bool:
+        deadline, pending, failed = time.monotonic() + timeout, list(fds), False
+        while pending and time.monotonic() < deadline:
+            ready, _, _ = select.select(pending, [], [], max(0.0, deadline - time.monotonic()))
+            for fd in ready:
+                failed |= not os.read(fd, 1)        # EOF: the worker died before serving
+                pending.remove(fd)
+        for fd in fds:
+            os.close(fd)
+        return not pending and not failed
+
+    def retire(self, pid: int):
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def reap(self) -> list:
+        """Pids of workers that died unexpectedly."""
+        crashed = []
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue            # e.g. a re-exec'd master
+            _mark_dead(pid)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            else:
+                print(f"⚠️ Worker {pid} exited (status {status}), replacing it")
+                crashed.append(time.monotonic() - started)
+        return crashed
+
+    def rolling_restart(self):
+        print(f"🔄 Rolling restart of {len(self.workers)} worker(s)")
+        for old in [p for p in self.workers if p not in self.retiring]:
+            _, fd = self.spawn()
+            if not self.wait_ready([fd]):
+                print("🚨 Replacement worker not ready; rolling restart stopped")
+                return
+            self.retire(old)
+
+    def reload(self):
+        """Starts a new master (re-imports the code) on the inherited socket."""
+        env = dict(os.environ, **{LISTEN_FD_ENV: str(self.sock.fileno()), OLD_MASTER_ENV: str(os.getpid())})
+        subprocess.Popen(sys.orig_argv, env=env, pass_fds=(self.sock.fileno(),))
+        print("♻️ New master started; this one stops once its workers are ready")
+
+    def stop(self):
+        print(f"🛑 Stopping {len(self.workers)} worker(s)")
+        for pid in list(self.workers):
+            self.retire(pid)
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + JOB_DRAIN_SECONDS + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.2)
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            _mark_dead(pid)
+
+    def run(self):
+        fds = [self.spawn()[1] for _ in range(max(1, self.args.workers))]
+        if self.wait_ready(fds):
+            print(f"✅ {self.args.workers} worker(s) serving {self.args.app} "
+                  f"on {self.args.host}:{self.args.port} (master {os.getpid()}, {_rss_mb():.0f} MB RSS)")
+            old_master = os.environ.pop(OLD_MASTER_ENV, None)
+            if old_master:
+                os.kill(int(old_master), signal.SIGTERM)
+        while not _flags["stop"]:
+            for lifetime in self.reap():
+                if lifetime < CRASH_BACKOFF:
+                    time.sleep(CRASH_BACKOFF)
+                os.close(self.spawn()[1])
+            if _flags["roll"]:
+                _flags["roll"] = False
+                self.rolling_restart()
+            if _flags["reload"]:
+                _flags["reload"] = False
+                self.reload()
+            time.sleep(0.2)
+        self.stop()
+
+
+def _mark_dead(pid: int):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
+
+
+def _set_flag(name):
+    def handler(signum, frame):
+        _flags[name] = True
+    return handler
+
+
+# ─── entry ─────────────────────────────────────────────────────────────
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python serve.py")
+    p.add_argument("app", help="module:attribute, e.g. api_service:app or main:app (student)")
+    p.add_argument("--app-dir", default=".", help="directory the app module is imported from")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    p.add_argument("--backlog", type=int, default=2048)
+    p.add_argument("--log-level", default="info")
+    p.add_argument("--proxy-headers", action="store_true")
+    p.add_argument("--forwarded-allow-ips", default="127.0.0.1")
+    args = p.parse_args(argv)
+
+    sys.path.insert(0, os.path.abspath(args.app_dir))
+    sock = _listen(args.host, args.port, args.backlog)
+
+    # one metrics directory per port, shared by all workers of this server
+    prom_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"prometheus-{args.port}")
+    )
+    if not os.getenv(LISTEN_FD_ENV):
+        shutil.rmtree(prom_dir, ignore_errors=True)
+    os.makedirs(prom_dir, exist_ok=True)
+
+    from uvicorn.importer import import_from_string
+
+    gc.disable()
+    t0 = time.perf_counter()
+    app = import_from_string(args.app)
+    gc.collect()
+    gc.freeze()                     # loaded objects move to the permanent generation
+    gc.enable()                     # frozen objects are never scanned again, here or in workers
+    print(f"📦 Preloaded {args.app} in {time.perf_counter() - t0:.1f}s ({_rss_mb():.0f} MB RSS)")
+    os.environ.pop(LISTEN_FD_ENV, None)
+
+    signal.signal(signal.SIGTERM, _set_flag("stop"))
+    signal.signal(signal.SIGINT, _set_flag("stop"))
+    signal.signal(signal.SIGHUP, _set_flag("roll"))
+    signal.signal(signal.SIGUSR2, _set_flag("reload"))
+    Master(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
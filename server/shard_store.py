@@ -0,0 +1,263 @@
+# File: shard_store.py
+# --------------------------------------------------------------------------
+# Shared work queue for sharded (map/reduce) screening jobs.
+#   screening_shards: (job_id, shard_no) → state, payload JSON, result JSON,
+#                     worker, lease_until, attempts
+# Workers claim one queued shard at a time and renew its lease every
+# HEARTBEAT_SECONDS while they work on it (lease_heartbeat()); a running
+# shard whose lease ran out (crashed or stuck worker) can be claimed
+# again, up to MAX_ATTEMPTS. complete() / fail() only count for the
+# worker that still holds the lease, so a late result never overwrites
+# the shard's new owner.
+# Backends:
+#   • SQLite file (default, processed_data/shards.db) — every process on
+#     one node; claims are serialised with BEGIN IMMEDIATE
+#   • Postgres (SHARD_STORE_DSN=postgresql://…) — workers on any node;
+#     claims use SELECT … FOR UPDATE SKIP LOCKED. Needs psycopg.
+# --------------------------------------------------------------------------
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+PROCESSED_DATA_FOLDER = "processed_data"
+SHARD_STORE_DSN = os.getenv("SHARD_STORE_DSN", "")
+LEASE_SECONDS = int(os.getenv("SHARD_LEASE_SECONDS", "900"))
+HEARTBEAT_SECONDS = LEASE_SECONDS / 3
+MAX_ATTEMPTS = 3
+
+_COLUMNS = """
+    job_id      TEXT NOT NULL,
+    shard_no    INTEGER NOT NULL,
+    state       TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    worker      TEXT,
+    lease_until DOUBLE PRECISION,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    updated_at  DOUBLE PRECISION,
+    PRIMARY KEY (job_id, shard_no)
+"""
+# claimable: queued, or running with an expired lease; oldest first
+_CLAIMABLE = "(state = 'queued' OR (state = 'running' AND lease_until < {p})) AND attempts < {p}"
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _ShardStore:
+    """SQL shared by both backends; subclasses provide _conn() and claim()."""
+
+    P = "?"
+
+    def _exec(self, sql: str, params=(), fetch=False):
+        """Fetched rows, or the number of rows changed."""
+        with self._conn() as (db, cur):
+            cur.execute(sql.replace("{p}", self.P), params)
+            rows = cur.fetchall() if fetch else cur.rowcount
+            db.commit()
+        return rows
+
+    def enqueue(self, job_id: str, payloads: list) -> None:
+        now = time.time()
+        with self._conn() as (db, cur):
+            cur.executemany(
+                "INSERT INTO screening_shards (job_id, shard_no, state, payload, updated_at) "
+                "VALUES ({p}, {p}, 'queued', {p}, {p})".replace("{p}", self.P),
+                [(job_id, n, json.dumps(p), now) for n, p in enumerate(payloads)],
+            )
+            db.commit()
+
+    def renew(self, job_id: str, shard_no: int, worker: str) -> bool:
+        """Extends the lease; False when worker no longer holds it."""
+        return self._exec(
+            "UPDATE screening_shards SET lease_until = {p} "
+            "WHERE job_id = {p} AND shard_no = {p} AND state = 'running' AND worker = {p}",
+            (time.time() + LEASE_SECONDS, job_id, shard_no, worker),
+        ) == 1
+
+    def complete(self, job_id: str, shard_no: int, result: dict, worker: str) -> bool:
+        """False (result dropped) when the lease ran out and the shard went to another worker."""
+        return self._exec(
+            "UPDATE screening_shards SET state = 'done', result = {p}, lease_until = NULL, updated_at = {p} "
+            "WHERE job_id = {p} AND shard_no = {p} AND state = 'running' AND worker = {p}",
+            (json.dumps(result), time.time(), job_id, shard_no, worker),
+        ) == 1
+
+    def fail(self, job_id: str, shard_no: int, error: str, worker: str) -> bool:
+        """Back to the queue for another attempt, or 'failed' once attempts are used up."""
+        return self._exec(
+            "UPDATE screening_shards SET state = CASE WHEN attempts < {p} THEN 'queued' ELSE 'failed' END, "
+            "error = {p}, lease_until = NULL, updated_at = {p} "
+            "WHERE job_id = {p} AND shard_no = {p} AND state = 'running' AND worker = {p}",
+            (MAX_ATTEMPTS, error[:2000], time.time(), job_id, shard_no, worker),
+        ) == 1
+
+    def counts(self, job_id: str) -> dict:
+        rows = self._exec(
+            "SELECT state, COUNT(*) FROM screening_shards WHERE job_id = {p} GROUP BY state", (job_id,), fetch=True
+        )
+        return {state: n for state, n in rows}
+
+    def results(self, job_id: str) -> list:
+        """[(shard_no, state, result dict | None, error)] in shard order."""
+        rows = self._exec(
+            "SELECT shard_no, state, result, error FROM screening_shards WHERE job_id = {p} ORDER BY shard_no",
+            (job_id,), fetch=True,
+        )
+        return [(n, state, json.loads(r) if r else None, err) for n, state, r, err in rows]
+
+    def done_since(self, job_id: str, seen: set) -> list:
+        """[(shard_no, result dict)] of finished shards not in seen."""
+        rows = self._exec(
+            "SELECT shard_no FROM screening_shards WHERE job_id = {p} AND state = 'done'", (job_id,), fetch=True
+        )
+        out = []
+        for (shard_no,) in rows:
+            if shard_no in seen:
+                continue
+            (res,) = self._exec(
+                "SELECT result FROM screening_shards WHERE job_id = {p} AND shard_no = {p}",
+                (job_id, shard_no), fetch=True,
+            )[0]
+            out.append((shard_no, json.loads(res)))
+        return out
+
+    def delete(self, job_id: str) -> None:
+        self._exec("DELETE FROM screening_shards WHERE job_id = {p}", (job_id,))
+
+
+class SQLiteShardStore(_ShardStore):
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(PROCESSED_DATA_FOLDER, "shards.db")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._conn() as (db, cur):
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute(f"CREATE TABLE IF NOT EXISTS screening_shards ({_COLUMNS})")
+            db.commit()
+
+    def _conn(self):
+        return _SQLiteConn(self.path)
+
+    def claim(self, worker: str, job_id: str = None):
+        """(job_id, shard_no, payload) or None; job_id restricts the claim to one job."""
+        now = time.time()
+        with self._conn() as (db, cur):
+            cur.execute("BEGIN IMMEDIATE")
+            row = cur.execute(
+                "SELECT job_id, shard_no, payload FROM screening_shards WHERE "
+                + _CLAIMABLE.replace("{p}", "?") + (" AND job_id = ?" if job_id else "")
+                + " ORDER BY updated_at, shard_no LIMIT 1",
+                (now, MAX_ATTEMPTS) + ((job_id,) if job_id else ()),
+            ).fetchone()
+            if row:
+                cur.execute(
+                    "UPDATE screening_shards SET state = 'running', worker = ?, lease_until = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE job_id = ? AND shard_no = ?",
+                    (worker, now + LEASE_SECONDS, now, row[0], row[1]),
+                )
+            db.commit()
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+
+class _SQLiteConn:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+
+    def __enter__(self):
+        return self.db, self.db.cursor()
+
+    def __exit__(self, *exc):
+        if exc[0] is not None and self.db.in_transaction:
+            self.db.rollback()
+        self.db.close()
+
+
+class PostgresShardStore(_ShardStore):
+    P = "%s"
+
+    def __init__(self, dsn: str):
+        try:
+            import psycopg
+        except ImportError as e:
+            raise RuntimeError("SHARD_STORE_DSN points at Postgres but psycopg is not installed") from e
+        self._psycopg = psycopg
+        self.dsn = dsn
+        with self._conn() as (db, cur):
+            cur.execute(f"CREATE TABLE IF NOT EXISTS screening_shards ({_COLUMNS})")
+            db.commit()
+
+    def _conn(self):
+        return _PostgresConn(self._psycopg.connect(self.dsn))
+
+    def claim(self, worker: str, job_id: str = None):
+        now = time.time()
+        with self._conn() as (db, cur):
+            cur.execute(
+                "UPDATE screening_shards s SET state = 'running', worker = %s, lease_until = %s, "
+                "attempts = s.attempts + 1, updated_at = %s "
+                "FROM (SELECT job_id, shard_no FROM screening_shards WHERE "
+                + _CLAIMABLE.replace("{p}", "%s") + (" AND job_id = %s" if job_id else "")
+                + " ORDER BY updated_at, shard_no LIMIT 1 FOR UPDATE SKIP LOCKED) c "
+                "WHERE s.job_id = c.job_id AND s.shard_no = c.shard_no "
+                "RETURNING s.job_id, s.shard_no, s.payload",
+                (worker, now + LEASE_SECONDS, now, now, MAX_ATTEMPTS) + ((job_id,) if job_id else ()),
+            )
+            row = cur.fetchone()
+            db.commit()
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+
+class _PostgresConn:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db, self.db.cursor()
+
+    def __exit__(self, *exc):
+        if exc[0] is not None:
+            self.db.rollback()
+        self.db.close()
+
+
+@contextmanager
+def lease_heartbeat(store: _ShardStore, job_id: str, shard_no: int, worker: str):
+    """Renews worker's lease on the shard every HEARTBEAT_SECONDS while the block runs."""
+    stop = threading.Event()
+
+    def _beat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                if not store.renew(job_id, shard_no, worker):
+                    print(f"⚠️ {worker} lost its lease on shard {shard_no} of job {job_id}")
+                    return
+            except Exception as e:
+                print(f"⚠️ Lease renewal of shard {shard_no} of job {job_id} failed: {e}")
+
+    t = threading.Thread(target=_beat, daemon=True, name=f"lease-{job_id}-{shard_no}")
+    t.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        t.join()
+
+
+def open_store(dsn: str = None) -> _ShardStore:
+    dsn = SHARD_STORE_DSN if dsn is None else dsn
+    if dsn.startswith(("postgres://", "postgresql://")):
+        return PostgresShardStore(dsn)
+    return SQLiteShardStore(dsn or None)
+
+
+def is_shared(store: _ShardStore) -> bool:
+    """True when workers on other nodes can see this store."""
+    return isinstance(store, PostgresShardStore)
@@ -0,0 +1,314 @@
+# File: sharded_job.py
+# --------------------------------------------------------------------------
+# Map/reduce execution of one large screening job.
+#   coordinator (background_process, EXECUTION_MODE=sharded):
+#     extract ZIP → split resume files into SHARD_SIZE shard ZIPs →
+#     enqueue them in shard_store → start LOCAL_SHARD_WORKERS local worker
+#     processes and work on shards itself → reduce
+#   worker (python -m sharded_job worker [--job ID] [--dsn DSN]):
+#     claim shard → extract + analyse it → store per-shard results, the
+#     extracted text and its Final Score array
+#   reduce: merge shard results in shard order and update the recruiter's
+#     search indexes from one process (their files are single-writer); the
+#     Final Score arrays are normalised together (global min/max) by
+#     compute_relative_ranking. A shard that failed MAX_ATTEMPTS times
+#     loses its resumes: each is recorded in job_control's failed resumes
+#     and the job ends "partial" ("failed" when no shard finished).
+# While the map phase runs, the coordinator embeds each finished shard and
+# appends it to the job's applicant clusters; indexing reuses those vectors.
+# With a Postgres SHARD_STORE_DSN, shard ZIPs also go to Supabase Storage
+# so workers on other nodes can fetch them. Each payload carries the job's
+# trace context (tracing.inject), so shard spans land in the job's trace.
+# --------------------------------------------------------------------------
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import traceback
+import zipfile
+
+import numpy as np
+
+import job_control
+import leaderboard
+import metrics
+import search_index
+import shard_store
+import tracing
+from process_resumes import (
+    cluster_resumes, count_zip_resumes, embed_model, extract_zip, index_resumes_for_search,
+    persist_job_results, process_resumes_in_batches, read_resumes, supabase,
+)
+from rate_governor import caller
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "single")      # single | sharded
+SHARD_SIZE = int(os.getenv("SHARD_SIZE", "200"))
+LOCAL_SHARD_WORKERS = int(os.getenv("LOCAL_SHARD_WORKERS", "2"))
+POLL_SECONDS = 2.0
+IDLE_POLL_SECONDS = 5.0
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def should_shard(n_resumes: int) -> bool:
+    return EXECUTION_MODE == "sharded" and n_resumes > SHARD_SIZE
+
+
+# ─── coordinator ───────────────────────────────────────────────────────
+def _resume_files(folder: str) -> list:
+    files = []
+    for root, _, names in os.walk(folder):
+        files += [os.path.join(root, n) for n in names if n.lower().endswith((".pdf", ".docx"))]
+    return sorted(files)
+
+
+def _write_shards(job_id, files, base, shard_folder, shared):
+    """
+    Shard ZIPs (stored, PDFs are compressed already); uploaded when workers
+    are remote. [(path, storage_path, resume file names)].
+    """
+    os.makedirs(shard_folder, exist_ok=True)
+    shards = []
+    for no, start in enumerate(range(0, len(files), SHARD_SIZE)):
+        path = os.path.join(shard_folder, f"shard_{no}.zip")
+        members = files[start:start + SHARD_SIZE]
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+            for f in members:
+                zf.write(f, os.path.relpath(f, base))
+        storage_path = None
+        if shared:
+            storage_path = f"{job_id}/shards/shard_{no}.zip"
+            with open(path, "rb") as fh, metrics.storage_call("upload_shard"):
+                supabase.storage.from_("resumes").upload(
+                    path=storage_path, file=fh.read(),
+                    file_options={"content-type": "application/zip"},
+                )
+        shards.append((path, storage_path, [os.path.basename(f) for f in members]))
+    return shards
+
+
+def _spawn_local_workers(n: int, job_id: str) -> list:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SERVER_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "sharded_job", "worker", "--job", job_id, "--exit-when-idle"],
+            cwd=os.getcwd(), env=env,
+        )
+        for _ in range(n)
+    ]
+
+
+def run_sharded_job(zip_path, job_description, weightages, resume_output_folder, job_id, user_id,
+                    scoring_mode="llm"):
+    """Same contract as process_all_resumes: returns (results, resume_id_map)."""
+    n = count_zip_resumes(zip_path)
+    with metrics.job_context(n):
+        store = shard_store.open_store()
+        with metrics.stage("extract_zip"):
+            staging = os.path.join(resume_output_folder, "_all")
+            extract_zip(zip_path, staging)
+            files = _resume_files(staging)
+        if not files:
+            print("❌ No resumes found.")
+            return [], {}
+
+        trace = tracing.inject()            # shard spans join this job's trace
+        with metrics.stage("shard"):
+            shards = _write_shards(job_id, files, staging, os.path.join(resume_output_folder, "_shards"),
+                                   shard_store.is_shared(store))
+            store.enqueue(job_id, [
+                {
+                    "shard_zip": os.path.abspath(path),
+                    "storage_path": storage_path,
+                    "work_folder": os.path.abspath(resume_output_folder),
+                    "job_description": job_description,
+                    "weights": weightages,
+                    "user_id": user_id,
+                    "scoring_mode": scoring_mode,
+                    "job_resumes": len(files),
+                    "trace": trace,
+                }
+                for path, storage_path, _ in shards
+            ])
+        print(f"🧩 Job {job_id}: {len(files)} resumes in {len(shards)} shards of ≤{SHARD_SIZE}")
+        leaderboard.begin(job_id, len(files), user_id)
+
+        procs = _spawn_local_workers(min(LOCAL_SHARD_WORKERS, len(shards) - 1), job_id)
+        try:
+            with metrics.stage("map"):
+                vectors = _work_until_done(store, job_id, user_id)
+        except job_control.JobCancelled:
+            # unclaimed shards disappear; this job's local workers stop now
+            store.delete(job_id)
+            for p in procs:
+                p.kill()
+            raise
+        finally:
+            for p in procs:
+                try:
+                    p.wait(timeout=60)
+                except subprocess.TimeoutExpired:
+                    p.kill()
+
+        job_control.checkpoint()
+        with metrics.stage("reduce"):
+            results, resume_id_map, texts, done = reduce_job(store, job_id, [names for _, _, names in shards])
+            vectors = np.concatenate([vectors[n] for n in done]) if all(n in vectors for n in done) else None
+            persist_job_results(job_id, results, resume_id_map)
+        with metrics.stage("indexing"):
+            index_resumes_for_search(texts, results, resume_id_map, job_id, user_id, vectors)
+        store.delete(job_id)
+        return results, resume_id_map
+
+
+def _work_until_done(store, job_id, user_id):
+    """
+    The coordinator processes shards too, then waits for the ones others
+    hold; every finished shard (any worker) feeds the provisional leaderboard
+    and the job's clusters. Returns {shard_no: embeddings of its texts}.
+    """
+    vectors = {}
+
+    def _collect():
+        for shard_no, res in store.done_since(job_id, vectors.keys()):
+            for entry in res["results"]:
+                clean_name = os.path.basename(entry["filename"]).strip().lower()
+                leaderboard.record(job_id, entry, res["resume_id_map"].get(clean_name))
+            vectors[shard_no] = search_index.embed_resumes(embed_model, [t["text"] for t in res["texts"]])
+            cluster_resumes(res["texts"], res["results"], res["resume_id_map"], job_id, user_id,
+                            vectors[shard_no])
+
+    while True:
+        job_control.checkpoint()
+        worked = run_one(store, job_id)
+        _collect()
+        if worked:
+            continue
+        counts = store.counts(job_id)
+        if not counts.get("queued") and not counts.get("running"):
+            _collect()          # shards that finished after the last look
+            return vectors
+        time.sleep(POLL_SECONDS)
+
+
+def reduce_job(store, job_id, shard_files):
+    """
+    (results, resume_id_map, [{filename, text}], [shard_no]) merged over the
+    finished shards, in shard order. The resumes of a shard that failed for
+    good are recorded as failed (job_control.record_failure) and the job is
+    marked partial; RuntimeError when no shard finished.
+    """
+    results, resume_id_map, texts, lo, hi = [], {}, [], None, None
+    rows = store.results(job_id)
+    for shard_no, state, res, error in rows:
+        if state != "done":
+            print(f"🚨 Shard {shard_no} of job {job_id} {state}: {error}")
+            lost = RuntimeError(f"shard {shard_no} {state} after {shard_store.MAX_ATTEMPTS} attempts: {error}")
+            for filename in shard_files[shard_no]:
+                job_control.record_failure(filename, lost)
+            continue
+        results += res["results"]
+        resume_id_map.update(res["resume_id_map"])
+        texts += res["texts"]
+        if res["scores"]:
+            lo = res["min"] if lo is None else min(lo, res["min"])
+            hi = res["max"] if hi is None else max(hi, res["max"])
+    done = [n for n, state, _, _ in rows if state == "done"]
+    print(f"🧮 Reduce {job_id}: {len(done)}/{len(rows)} shards, {len(results)} resumes, "
+          f"global Final Score range [{lo}, {hi}]")
+    if not done:
+        raise RuntimeError(f"all {len(rows)} shards of job {job_id} failed")
+    if len(done) < len(rows):
+        job_control.mark_partial(f"{len(rows) - len(done)} of {len(rows)} shards failed; "
+                                 f"their resumes are listed in failed_resumes")
+    return results, resume_id_map, texts, done
+
+
+# ─── worker ────────────────────────────────────────────────────────────
+def _shard_zip(payload) -> str:
+    path = payload["shard_zip"]
+    if os.path.exists(path) or not payload.get("storage_path"):
+        return path
+    path = os.path.join("uploaded_zips", "shards", payload["storage_path"].replace("/", "_"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with metrics.storage_call("download_shard"):
+        data = supabase.storage.from_("resumes").download(payload["storage_path"])
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def process_shard(job_id: str, shard_no: int, payload: dict) -> dict:
+    user_id = payload["user_id"]
+    folder = os.path.join(payload["work_folder"], f"shard_{shard_no}")
+    if not os.path.isdir(payload["work_folder"]):
+        folder = os.path.join("resumes", job_id, f"shard_{shard_no}")
+    with tracing.attached(payload.get("trace")), \
+            tracing.span("shard", job_id=job_id, shard_no=shard_no, user_id=user_id,
+                         worker=shard_store.worker_name()), \
+            metrics.job_context(payload["job_resumes"]), caller(user_id, "bulk"):
+        with metrics.stage("extract_zip"):
+            extract_zip(_shard_zip(payload), folder)
+        with metrics.stage("read_resumes"):
+            resumes = read_resumes(folder)
+        with metrics.stage("analysis"):
+            results, resume_id_map = process_resumes_in_batches(
+                resumes, payload["job_description"], payload["weights"], job_id, user_id,
+                scoring_mode=payload["scoring_mode"], report_id=f"{job_id}_shard{shard_no}",
+            )
+    scores = [r["analysis"].get("Final Score", 0.0) or 0.0 for r in results]
+    return {
+        "results": results,
+        "resume_id_map": resume_id_map,
+        "texts": [{"filename": r["filename"], "text": r["text"]} for r in resumes],
+        "scores": scores,
+        "min": min(scores) if scores else None,
+        "max": max(scores) if scores else None,
+    }
+
+
+def run_one(store, job_id: str = None) -> bool:
+    """Claims and processes one shard; False when nothing was claimable."""
+    worker = shard_store.worker_name()
+    claimed = store.claim(worker, job_id)
+    if not claimed:
+        return False
+    job, shard_no, payload = claimed
+    print(f"🔧 {worker} took shard {shard_no} of job {job}")
+    try:
+        with shard_store.lease_heartbeat(store, job, shard_no, worker):
+            result = process_shard(job, shard_no, payload)
+        if not store.complete(job, shard_no, result, worker):
+            print(f"⚠️ Shard {shard_no} of job {job} went to another worker meanwhile; result dropped")
+    except job_control.JobCancelled:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        store.fail(job, shard_no, f"{type(e).__name__}: {e}", worker)
+    return True
+
+
+def worker_loop(store, job_id: str = None, exit_when_idle: bool = False) -> None:
+    while True:
+        if run_one(store, job_id):
+            continue
+        if exit_when_idle:
+            return
+        time.sleep(IDLE_POLL_SECONDS)
+
+
+# ─── CLI entry ─────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded screening worker")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("worker", help="claim and process shards")
+    w.add_argument("--job", help="only take shards of this job")
+    w.add_argument("--dsn", help="shard store DSN (default: SHARD_STORE_DSN or local SQLite)")
+    w.add_argument("--exit-when-idle", action="store_true")
+    args = parser.parse_args()
+
+    tracing.setup(os.getenv("OTEL_SERVICE_NAME", "screening-shard-worker"))
+    worker_loop(shard_store.open_store(args.dsn), args.job, args.exit_when_idle)
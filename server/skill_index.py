@@ -0,0 +1,352 @@
+# File: skill_index.py
+# --------------------------------------------------------------------------
+# Normalized skill dictionary + inverted index over analysed candidates.
+#   indexes/<user_id>/skills.db
+#     skills    → skill_id ↔ canonical name (the dictionary)
+#     docs      → dense doc_id per resume_id (bit position in every bitmap)
+#     postings  → (field, skill_id) → zlib-compressed bitmap of doc_ids
+#     jobs      → job_id → bitmap of its doc_ids (query scope)
+# Boolean queries ("Python AND (AWS OR GCP) NOT Java") are evaluated as
+# integer bitmap AND / OR / ANDNOT, never by scanning analysis rows.
+# The bitmaps are cached in memory; a writer takes the database write lock
+# and reloads them first when another process (serve.py worker,
+# screening_cli) has committed, so bitmaps are merged, never overwritten.
+# --------------------------------------------------------------------------
+
+import os
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+from index_paths import tenant_folder
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+DB_LOCK_TIMEOUT = 60            # seconds a writer waits for another process's write
+
+# analysis key → posting field (query prefix, e.g. cert:"aws solutions architect")
+FIELDS = {
+    "Key Skills":               "skill",
+    "Soft Skills":              "soft",
+    "Certifications & Courses": "cert",
+}
+
+SKILL_ALIASES = {
+    "js": "javascript", "node": "node.js", "nodejs": "node.js", "node js": "node.js",
+    "ts": "typescript", "py": "python", "python3": "python",
+    "reactjs": "react", "react.js": "react", "vuejs": "vue", "vue.js": "vue",
+    "golang": "go", "c sharp": "c#", "cpp": "c++",
+    "k8s": "kubernetes", "kube": "kubernetes",
+    "amazon web services": "aws", "google cloud": "gcp",
+    "google cloud platform": "gcp", "microsoft azure": "azure",
+    "postgres": "postgresql", "mongo": "mongodb", "ms sql": "sql server",
+    "ml": "machine learning", "dl": "deep learning", "ai": "artificial intelligence",
+    "nlp": "natural language processing", "cv": "computer vision",
+    "tf": "tensorflow", "sklearn": "scikit-learn", "scikit learn": "scikit-learn",
+    "ci cd": "ci/cd", "cicd": "ci/cd", "rest api": "rest", "restful apis": "rest",
+    "rest apis": "rest", "restful": "rest",
+}
+
+
+# ─── normalization ─────────────────────────────────────────────────────
+def normalize_skill(raw: str) -> str:
+    """'  ReactJS ' → 'react', 'Python 3.11' → 'python', 'K8s.' → 'kubernetes'."""
+    s = str(raw).lower().strip()
+    s = re.sub(r"\s+", " ", s)
+    s = s.strip(" .,;:-•*\"'")
+    s = re.sub(r"\s+v?\d+(\.\d+)*\+?$", "", s)          # trailing version numbers
+    return SKILL_ALIASES.get(s) or SKILL_ALIASES.get(s.replace("-", " "), s)
+
+
+def split_skills(values) -> list:
+    """Flattens 'Python (Pandas, NumPy); SQL' style entries into canonical names."""
+    out = []
+    for v in values or []:
+        if not isinstance(v, str):
+            continue
+        inner = re.findall(r"\(([^)]*)\)", v)
+        head = re.sub(r"\([^)]*\)", " ", v)
+        for part in re.split(r"[,;|]", head) + [p for i in inner for p in re.split(r"[,;|]", i)]:
+            name = normalize_skill(part)
+            if name and len(name) <= 80:
+                out.append(name)
+    return list(dict.fromkeys(out))
+
+
+# ─── bitmap helpers ────────────────────────────────────────────────────
+def _pack(bitmap: int) -> bytes:
+    raw = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    return zlib.compress(raw)
+
+
+def _unpack(blob: bytes) -> int:
+    return int.from_bytes(zlib.decompress(blob), "little") if blob else 0
+
+
+def _members(bitmap: int) -> np.ndarray:
+    if not bitmap:
+        return np.empty(0, dtype="int64")
+    raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype="uint8")
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+
+
+# ─── tenant index ──────────────────────────────────────────────────────
+class _TenantIndex:
+    def __init__(self, user_id: str):
+        folder = tenant_folder(user_id)
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(
+            os.path.join(folder, "skills.db"), check_same_thread=False, timeout=DB_LOCK_TIMEOUT
+        )
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS skills   (skill_id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+            CREATE TABLE IF NOT EXISTS docs     (doc_id INTEGER PRIMARY KEY, resume_id TEXT UNIQUE, job_id TEXT);
+            CREATE TABLE IF NOT EXISTS postings (field TEXT, skill_id INTEGER, bitmap BLOB,
+                                                 PRIMARY KEY (field, skill_id));
+            CREATE TABLE IF NOT EXISTS jobs     (job_id TEXT PRIMARY KEY, bitmap BLOB);
+            """
+        )
+        self.db.commit()
+        self._load()
+
+    def _data_version(self) -> int:
+        return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load(self):
+        self.version = self._data_version()
+        self.skills = dict(self.db.execute("SELECT name, skill_id FROM skills"))
+        self.postings = {
+            (f, sid): _unpack(b) for f, sid, b in self.db.execute("SELECT field, skill_id, bitmap FROM postings")
+        }
+        self.jobs = {j: _unpack(b) for j, b in self.db.execute("SELECT job_id, bitmap FROM jobs")}
+        self.universe = 0
+        for bm in self.jobs.values():
+            self.universe |= bm
+
+    def refresh(self):
+        """Reloads the cached dictionary and bitmaps after another process's commit."""
+        if self._data_version() != self.version:
+            self._load()
+
+    def _skill_id(self, name: str) -> int:
+        sid = self.skills.get(name)
+        if sid is None:
+            sid = self.db.execute("INSERT INTO skills (name) VALUES (?)", (name,)).lastrowid
+            self.skills[name] = sid
+        return sid
+
+    def add(self, job_id: str, entries: list) -> int:
+        """entries: [(resume_id, analysis_dict), ...]"""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")      # one writer across processes
+            try:
+                self.refresh()
+                added = self._add_locked(job_id, entries)
+                self.db.commit()
+            except BaseException:
+                self.db.rollback()
+                self._load()                        # drop skill ids / bits of the rolled-back batch
+                raise
+        return added
+
+    def _add_locked(self, job_id: str, entries: list) -> int:
+        touched, added = set(), 0
+        job_bm = self.jobs.get(job_id, 0)
+        for resume_id, analysis in entries:
+            row = self.db.execute("SELECT doc_id FROM docs WHERE resume_id = ?", (resume_id,)).fetchone()
+            if row:
+                continue
+            doc_id = self.db.execute(
+                "INSERT INTO docs (resume_id, job_id) VALUES (?, ?)", (resume_id, job_id)
+            ).lastrowid
+            bit = 1 << doc_id
+            job_bm |= bit
+            for key, field in FIELDS.items():
+                for name in split_skills(analysis.get(key, [])):
+                    k = (field, self._skill_id(name))
+                    self.postings[k] = self.postings.get(k, 0) | bit
+                    touched.add(k)
+            added += 1
+
+        self.jobs[job_id] = job_bm
+        self.universe |= job_bm
+        self.db.executemany(
+            "INSERT OR REPLACE INTO postings (field, skill_id, bitmap) VALUES (?, ?, ?)",
+            [(f, sid, _pack(self.postings[(f, sid)])) for f, sid in touched],
+        )
+        self.db.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, bitmap) VALUES (?, ?)", (job_id, _pack(job_bm))
+        )
+        return added
+
+    def term_bitmap(self, field: str, name: str) -> int:
+        sid = self.skills.get(name)
+        if sid is None:
+            return 0
+        if field:
+            return self.postings.get((field, sid), 0)
+        bm = 0
+        for f in FIELDS.values():
+            bm |= self.postings.get((f, sid), 0)
+        return bm
+
+    def resolve(self, doc_ids: list) -> list:
+        if not doc_ids:
+            return []
+        placeholders = ",".join("?" * len(doc_ids))
+        rows = self.db.execute(
+            f"SELECT doc_id, resume_id, job_id FROM docs WHERE doc_id IN ({placeholders})", doc_ids
+        ).fetchall()
+        order = {d: i for i, d in enumerate(doc_ids)}
+        rows.sort(key=lambda r: order[r[0]])
+        return [{"resume_id": r[1], "job_id": r[2]} for r in rows]
+
+
+_tenants = {}
+_tenants_lock = threading.Lock()
+
+
+def _get_tenant(user_id: str) -> _TenantIndex:
+    with _tenants_lock:
+        t = _tenants.get(user_id)
+        if t is None:
+            t = _tenants[user_id] = _TenantIndex(user_id)
+        return t
+
+
+# ─── boolean query parser ──────────────────────────────────────────────
+_TOKEN_RE = re.compile(r'\s*(\(|\)|&&|\|\||!|[a-z]+:"[^"]*"|"[^"]*"|[^\s()"]+)', re.I)
+_OPS = {"and": "AND", "&&": "AND", "or": "OR", "||": "OR", "not": "NOT", "!": "NOT"}
+
+
+def _tokenize(query: str) -> list:
+    """Operators, parens and terms; adjacent bare words form one multi-word skill."""
+    tokens = []
+    for raw in _TOKEN_RE.findall(query):
+        op = _OPS.get(raw.lower())
+        if raw in "()":
+            tokens.append((raw, None))
+        elif op:
+            tokens.append((op, None))
+        else:
+            quoted = raw.endswith('"')
+            word = raw.replace('"', "")
+            if not quoted and tokens and tokens[-1][0] == "TERM" and not tokens[-1][2]:
+                tokens[-1] = ("TERM", tokens[-1][1] + " " + word, False)
+            else:
+                tokens.append(("TERM", word, quoted))
+    return [(t[0], t[1]) for t in tokens]
+
+
+class _Parser:
+    """
+    expr  := and (OR and)*
+    and   := unary ((AND | NOT) unary)*      — 'A NOT B' reads as A AND NOT B
+    unary := NOT unary | '(' expr ')' | TERM
+    """
+
+    def __init__(self, tokens, index: _TenantIndex, universe: int):
+        self.tokens, self.pos = tokens, 0
+        self.index, self.universe = index, universe
+        self.terms = []
+
+    def _peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _take(self):
+        tok = self.tokens[self.pos]
+        self.pos += 1
+        return tok
+
+    def parse(self) -> int:
+        if not self.tokens:
+            raise ValueError("Empty skill query")
+        bm = self._expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token near position {self.pos + 1}")
+        return bm
+
+    def _expr(self) -> int:
+        bm = self._and()
+        while self._peek() == "OR":
+            self._take()
+            bm |= self._and()
+        return bm
+
+    def _and(self) -> int:
+        bm = self._unary()
+        while self._peek() in ("AND", "NOT"):
+            if self._take()[0] == "NOT":
+                bm &= ~self._unary()
+            else:
+                bm &= self._unary()
+        return bm & self.universe
+
+    def _unary(self) -> int:
+        kind = self._peek()
+        if kind == "NOT":
+            self._take()
+            return self.universe & ~self._unary()
+        if kind == "(":
+            self._take()
+            bm = self._expr()
+            if self._peek() != ")":
+                raise ValueError("Missing closing parenthesis")
+            self._take()
+            return bm
+        if kind == "TERM":
+            field, text = None, self._take()[1]
+            prefix, _, rest = text.partition(":")
+            if rest and prefix.lower() in FIELDS.values():
+                field, text = prefix.lower(), rest
+            name = normalize_skill(text)
+            self.terms.append(f"{field}:{name}" if field else name)
+            return self.index.term_bitmap(field, name) & self.universe
+        raise ValueError("Expected a skill, NOT or '('")
+
+
+# ─── public API ────────────────────────────────────────────────────────
+def index_analyses(user_id: str, job_id: str, entries: list) -> int:
+    """Adds [(resume_id, analysis_dict), ...] for one job to the tenant index."""
+    if not user_id or not entries:
+        return 0
+    added = _get_tenant(user_id).add(job_id, entries)
+    print(f"🏷️ Skill index: +{added} candidates for recruiter {user_id} (job {job_id})")
+    return added
+
+
+def query(user_id: str, expression: str, job_id: str = None, limit: int = 500) -> dict:
+    """Evaluates a boolean skill expression across one job or the whole tenant."""
+    index = _get_tenant(user_id)
+    with index.lock:
+        index.refresh()
+        universe = index.jobs.get(job_id, 0) if job_id else index.universe
+        parser = _Parser(_tokenize(expression), index, universe)
+        bitmap = parser.parse()
+        doc_ids = _members(bitmap)
+        matches = index.resolve([int(d) for d in doc_ids[:limit]])
+    return {"terms": parser.terms, "total": int(doc_ids.size), "matches": matches}
+
+
+def dictionary(user_id: str, prefix: str = "", limit: int = 50) -> list:
+    index = _get_tenant(user_id)
+    p = normalize_skill(prefix) if prefix else ""
+    with index.lock:
+        index.refresh()
+        names = sorted(n for n in index.skills if n.startswith(p))
+    return names[:limit]
+
+
+def vocabulary(user_id: str) -> dict:
+    """{field: {canonical skill names seen for this recruiter}}."""
+    index = _get_tenant(user_id)
+    with index.lock:
+        index.refresh()
+        names = {sid: n for n, sid in index.skills.items()}
+        out = {f: set() for f in FIELDS.values()}
+        for field, sid in index.postings:
+            out[field].add(names[sid])
+    return out
@@ -1,12 +1,40 @@
 # File: storage_utils.py
 import os, uuid, mimetypes
+import contextvars
+from contextlib import contextmanager
 from supabase import create_client
 from dotenv import load_dotenv
+import metrics
 
 load_dotenv()
 SUPABASE_URL  = os.getenv("SUPABASE_URL")
 SUPABASE_KEY  = os.getenv("SUPABASE_KEY")
-supabase      = create_client(SUPABASE_URL, SUPABASE_KEY)
+# without credentials (offline CLI runs) nothing is written to Supabase
+supabase      = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+
+_writes = contextvars.ContextVar("storage_writes", default=True)
+
+
+@contextmanager
+def local_only():
+    """Pipeline code run inside skips every Supabase DB / Storage write (screening_cli)."""
+    reset = _writes.set(False)
+    try:
+        yield
+    finally:
+        _writes.reset(reset)
+
+
+def writes_enabled() -> bool:
+    return supabase is not None and _writes.get()
+
+
+def job_owner(job_id: str):
+    """user_id of the recruiter who created the job, None when unknown."""
+    if supabase is None:
+        return None
+    rows = supabase.table("job_descriptions").select("user_id").eq("job_id", job_id).limit(1).execute().data
+    return rows[0]["user_id"] if rows else None
 
 
 def upload_resume_info_to_db(
@@ -17,8 +45,17 @@ def upload_resume_info_to_db(
     candidate_name: str = "Unknown",          # ← NEW
 ):
     """Uploads file bytes → Supabase Storage and inserts metadata into
-       `resume_uploads` (now including candidate_name)."""
-    resume_id = str(uuid.uuid4())
+       `resume_uploads` (now including candidate_name).
+       Returns None without writing anything under local_only()."""
+    return upload_resume_for_jobs(file_name, file_path, [job_id], user_id, candidate_name).get(job_id)
+
+
+def upload_resume_for_jobs(file_name, file_path, job_ids, user_id, candidate_name="Unknown") -> dict:
+    """One Storage object (under the first job) and one `resume_uploads` row
+       per job_id, so every job keeps its own resume_id / analysis rows.
+       Returns {job_id: resume_id} for the rows that were inserted."""
+    if not writes_enabled():
+        return {}
 
     # read bytes
     try:
@@ -26,7 +63,7 @@ def upload_resume_info_to_db(
             file_content = f.read()
     except Exception as e:
         print(f"🚨 Could not open {file_path}: {e}")
-        return None
+        return {}
 
     # mime-type
     content_type, _ = mimetypes.guess_type(file_path)
@@ -34,35 +71,39 @@ def upload_resume_info_to_db(
         content_type = "application/octet-stream"
 
     # Storage upload
-    storage_path = f"{job_id}/{file_name}"
+    storage_path = f"{job_ids[0]}/{file_name}"
     try:
-        supabase.storage.from_("resumes").upload(
-            path=storage_path,
-            file=file_content,
-            file_options={"content-type": content_type},
-        )
+        with metrics.storage_call("upload_resume"):
+            supabase.storage.from_("resumes").upload(
+                path=storage_path,
+                file=file_content,
+                file_options={"content-type": content_type},
+            )
     except Exception as e:
         print(f"🚨 Upload failed: {e}")
-        return None
+        return {}
 
     # DB insert  (← candidate_name column added)
     public_url = f"{SUPABASE_URL}/storage/v1/object/public/resumes/{storage_path}"
+    rows = [
+        {
+            "resume_id":     str(uuid.uuid4()),
+            "user_id":       user_id,
+            "job_id":        job_id,
+            "file_name":     file_name,
+            "file_path":     public_url,
+            "candidate_name": candidate_name,
+        }
+        for job_id in job_ids
+    ]
     try:
-        supabase.table("resume_uploads").insert(
-            {
-                "resume_id":     resume_id,
-                "user_id":       user_id,
-                "job_id":        job_id,
-                "file_name":     file_name,
-                "file_path":     public_url,
-                "candidate_name": candidate_name,
-            }
-        ).execute()
+        with metrics.db_call("resume_uploads", "insert"):
+            supabase.table("resume_uploads").insert(rows).execute()
         print(f"📥 Saved metadata in DB for {file_name}")
-        return resume_id
+        return {row["job_id"]: row["resume_id"] for row in rows}
     except Exception as e:
         print(f"🚨 DB insert failed: {e}")
-        return None
+        return {}
     finally:
         try:
             os.remove(file_path)
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from api.dependencies import get_supabase, get_groq_service, get_whisper_service, get_report_service
 from utils.supabase_utils import upload_file, download_file
 from utils.pdf_utils import extract_text_from_pdf
+from utils import tracing
 from models.schemas import Question, NextQuestionResponse, FinalReportResponse, UserSummaryResponse
 import os
 from datetime import datetime
@@ -42,6 +43,7 @@ async def test_supabase(supabase=Depends(get_supabase)):
 
 @router.post("/upload-resume/{mock_user_id}")
 async def upload_resume(mock_user_id: str, file: UploadFile = File(...), supabase=Depends(get_supabase)):
+    tracing.set_attributes(mock_user_id=mock_user_id)
     try:
         try:
             uuid.UUID(mock_user_id)
@@ -92,6 +94,7 @@ async def upload_resume(mock_user_id: str, file: UploadFile = File(...), supabas
 
 @router.post("/generate-questions/{mock_user_id}/{resume_id}")
 async def generate_questions(mock_user_id: str, resume_id: str, supabase=Depends(get_supabase), groq_service=Depends(get_groq_service)):
+    tracing.set_attributes(mock_user_id=mock_user_id, resume_id=resume_id)
     try:
         try:
             uuid.UUID(mock_user_id)
@@ -124,6 +127,7 @@ async def generate_questions(mock_user_id: str, resume_id: str, supabase=Depends
             "resume_id": resume_id
         }).execute()
         session_id = session_response.data[0]["id"]
+        tracing.set_attributes(session_id=session_id)
 
         for idx, question in enumerate(questions, start=1):
             supabase.table("mock_interview_questions").insert({
@@ -142,6 +146,7 @@ async def generate_questions(mock_user_id: str, resume_id: str, supabase=Depends
 
 @router.get("/next-question/{session_id}/{question_number}", response_model=NextQuestionResponse)
 async def get_next_question(session_id: str, question_number: int, supabase=Depends(get_supabase)):
+    tracing.set_attributes(session_id=session_id, question_number=question_number)
     try:
         try:
             uuid.UUID(session_id)
@@ -179,6 +184,7 @@ async def submit_answer(
     groq_service=Depends(get_groq_service),
     whisper_service=Depends(get_whisper_service)
 ):
+    tracing.set_attributes(session_id=session_id, question_number=question_number)
     # Build audio path
     audio_path = f"answers/{session_id}/{question_number}/audio.webm"
     max_retries = 2
@@ -254,6 +260,7 @@ async def submit_answer(
 
 @router.get("/final-report/{session_id}", response_model=FinalReportResponse)
 async def get_final_report(session_id: str, report_service=Depends(get_report_service)):
+    tracing.set_attributes(session_id=session_id)
     try:
         try:
             uuid.UUID(session_id)
@@ -271,6 +278,7 @@ async def get_final_report(session_id: str, report_service=Depends(get_report_se
 
 @router.get("/user-summary/{mock_user_id}", response_model=UserSummaryResponse)
 async def get_user_summary(mock_user_id: str, report_service=Depends(get_report_service)):
+    tracing.set_attributes(mock_user_id=mock_user_id)
     try:
         try:
             uuid.UUID(mock_user_id)
@@ -8,6 +8,7 @@ import tempfile
 import cv2
 
 from utils.supabase_utils import download_file
+from utils import tracing
 
 logging.basicConfig(
     level=logging.INFO,
@@ -34,6 +35,7 @@ async def analyze_stress(
     supabase=Depends(get_supabase),
     whisper_service=Depends(get_whisper_service),
 ):
+    tracing.set_attributes(session_id=session_id, question_number=question_number)
     # Short buffer so frontend finishes upload (safe for concurrency)
     await asyncio.sleep(5)
 
@@ -113,6 +115,7 @@ async def analyze_stress(
 
 @router.get("/average-stress/{session_id}")
 async def average_stress(session_id: str, supabase=Depends(get_supabase)):
+    tracing.set_attributes(session_id=session_id)
     # Validate UUID
     try:
         uuid.UUID(session_id)
@@ -1,5 +1,6 @@
 from groq import Groq
 from config.settings import settings
+from utils.metrics import llm_call
 import re
 
 class GroqService:
@@ -40,14 +41,16 @@ Format each section with the following headings and numbered questions:
 
 Ensure each question starts with a number, followed by a period and a space (e.g., "1. "), and do not include any additional text outside of the specified format.
 """
-        completion = self.client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": "You are a helpful AI assistant that generates interview questions based on resumes."},
-                {"role": "user", "content": prompt}
-            ],
-            model="llama3-8b-8192",
-            max_tokens=500
-        )
+        with llm_call("generate_questions", "llama3-8b-8192") as call:
+            completion = self.client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": "You are a helpful AI assistant that generates interview questions based on resumes."},
+                    {"role": "user", "content": prompt}
+                ],
+                model="llama3-8b-8192",
+                max_tokens=500
+            )
+            call["usage"] = completion.usage
         response_text = completion.choices[0].message.content
 
         # Parse the response to extract questions
@@ -98,14 +101,16 @@ Score: [number]
 Feedback: [your feedback]
 """
         try:
-            completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant that evaluates interview answers."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama3-8b-8192",
-                max_tokens=150
-            )
+            with llm_call("evaluate_answer", "llama3-8b-8192") as call:
+                completion = self.client.chat.completions.create(
+                    messages=[
+                        {"role": "system", "content": "You are a helpful AI assistant that evaluates interview answers."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    model="llama3-8b-8192",
+                    max_tokens=150
+                )
+                call["usage"] = completion.usage
             response_text = completion.choices[0].message.content.strip()
 
             # Parse the response
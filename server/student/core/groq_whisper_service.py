@@ -1,4 +1,5 @@
 from groq import Groq
+from utils.metrics import llm_call
 from config.settings import settings
 import os
 
@@ -17,7 +18,7 @@ class GroqWhisperService:
             str: Transcribed text.
         """
         try:
-            with open(audio_file_path, "rb") as audio_file:
+            with open(audio_file_path, "rb") as audio_file, llm_call("transcribe", "whisper-large-v3-turbo"):
                 transcription = self.client.audio.transcriptions.create(
                     file=audio_file,
                     model="whisper-large-v3-turbo",
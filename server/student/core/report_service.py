@@ -2,6 +2,7 @@ from models.schemas import QuestionReport, FinalReportResponse, UserSummaryRespo
 from typing import List, Dict
 from datetime import datetime
 import logging
+from utils.metrics import llm_call
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -151,15 +152,17 @@ Focus on stress management or answer quality based on their performance.
             recommendation = "Recommendation could not be generated due to an error."
             try:
                 # Attempt summary generation with Grok
-                summary_completion = self.groq_service.client.chat.completions.create(
-                    messages=[
-                        {"role": "system", "content": "You are a helpful AI assistant that summarizes interview performance."},
-                        {"role": "user", "content": summary_prompt}
-                    ],
-                    model="llama3-8b-8192",
-                    max_tokens=150,
-                    temperature=0.7
-                )
+                with llm_call("report_summary", "llama3-8b-8192") as call:
+                    summary_completion = self.groq_service.client.chat.completions.create(
+                        messages=[
+                            {"role": "system", "content": "You are a helpful AI assistant that summarizes interview performance."},
+                            {"role": "user", "content": summary_prompt}
+                        ],
+                        model="llama3-8b-8192",
+                        max_tokens=150,
+                        temperature=0.7
+                    )
+                    call["usage"] = summary_completion.usage
                 overall_summary = summary_completion.choices[0].message.content.strip()
                 logger.info(f"Generated summary: {overall_summary}")
             except Exception as e:
@@ -168,15 +171,17 @@ Focus on stress management or answer quality based on their performance.
 
             try:
                 # Attempt recommendation generation with Grok
-                recommendation_completion = self.groq_service.client.chat.completions.create(
-                    messages=[
-                        {"role": "system", "content": "You are a helpful AI assistant that provides interview recommendations."},
-                        {"role": "user", "content": recommendation_prompt}
-                    ],
-                    model="llama3-8b-8192",
-                    max_tokens=150,
-                    temperature=0.7
-                )
+                with llm_call("report_recommendation", "llama3-8b-8192") as call:
+                    recommendation_completion = self.groq_service.client.chat.completions.create(
+                        messages=[
+                            {"role": "system", "content": "You are a helpful AI assistant that provides interview recommendations."},
+                            {"role": "user", "content": recommendation_prompt}
+                        ],
+                        model="llama3-8b-8192",
+                        max_tokens=150,
+                        temperature=0.7
+                    )
+                    call["usage"] = recommendation_completion.usage
                 recommendation = recommendation_completion.choices[0].message.content.strip()
                 logger.info(f"Generated recommendation: {recommendation}")
             except Exception as e:
@@ -1,4 +1,5 @@
 from groq import Groq
+from utils.metrics import llm_call
 import os
 
 class WhisperService:
@@ -7,7 +8,7 @@ class WhisperService:
 
     def transcribe_audio(self, audio_path: str) -> str:
         try:
-            with open(audio_path, "rb") as audio_file:
+            with open(audio_path, "rb") as audio_file, llm_call("transcribe", "whisper-large-v3-turbo"):
                 transcription = self.client.audio.transcriptions.create(
                     file=audio_file,
                     model="whisper-large-v3-turbo",
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import interview, stress, admin
+from utils import metrics, tracing
 
 app = FastAPI()
 
@@ -20,6 +21,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics.install(app)
+tracing.setup()
+tracing.install(app)
+
 # Add routers
 app.include_router(interview.router)
 app.include_router(stress.router)
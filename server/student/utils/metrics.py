@@ -0,0 +1,105 @@
+import os
+import time
+from contextlib import contextmanager
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+from utils import tracing
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+EXTRACTION_SECONDS = Histogram(
+    "interview_extraction_seconds", "Resume PDF text extraction time",
+    ["stage"], buckets=LATENCY_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "llm_request_seconds", "Latency of a single Groq request",
+    ["stage", "model"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens reported by Groq",
+    ["stage", "model", "kind"],
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total", "Groq requests that raised",
+    ["stage", "model"],
+)
+STORAGE_SECONDS = Histogram(
+    "supabase_storage_seconds", "Supabase Storage round trip",
+    ["stage", "bucket"], buckets=LATENCY_BUCKETS,
+)
+HTTP_SECONDS = Histogram(
+    "http_request_seconds", "FastAPI request latency per route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels, span: str = None, **attributes):
+    """Observes the block's duration; with span= it is also traced under that name."""
+    t0 = time.perf_counter()
+    try:
+        if span:
+            with tracing.span(span, **attributes):
+                yield
+        else:
+            yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - t0)
+
+
+@contextmanager
+def llm_call(stage: str, model: str):
+    """Times and traces a Groq call; set `.usage` on the yielded dict to record tokens."""
+    info = {"usage": None}
+    t0 = time.perf_counter()
+    with tracing.span(f"llm {stage}", **{"gen_ai.system": "groq", "gen_ai.request.model": model}) as span:
+        try:
+            yield info
+        except Exception:
+            LLM_ERRORS.labels(stage, model).inc()
+            raise
+        finally:
+            LLM_SECONDS.labels(stage, model).observe(time.perf_counter() - t0)
+            usage = info["usage"]
+            if usage is not None:
+                prompt = getattr(usage, "prompt_tokens", 0) or 0
+                completion = getattr(usage, "completion_tokens", 0) or 0
+                LLM_TOKENS.labels(stage, model, "prompt").inc(prompt)
+                LLM_TOKENS.labels(stage, model, "completion").inc(completion)
+                if span is not None:
+                    span.set_attributes({"gen_ai.usage.input_tokens": prompt,
+                                         "gen_ai.usage.output_tokens": completion})
+
+
+def install(app) -> None:
+    """Adds per-route latency middleware and a GET /metrics endpoint."""
+
+    @app.middleware("http")
+    async def _record_latency(request: Request, call_next):
+        t0 = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_SECONDS.labels(request.method, path, str(status)).observe(time.perf_counter() - t0)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return Response(exposition(), media_type=CONTENT_TYPE_LATEST)
+
+
+def exposition() -> bytes:
+    """All workers' metrics when served by serve.py (PROMETHEUS_MULTIPROC_DIR), else this process's."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
@@ -1,10 +1,12 @@
 import fitz  # PyMuPDF
+from utils.metrics import timed, EXTRACTION_SECONDS
 
 def extract_text_from_pdf(pdf_content: bytes) -> str:
     """Extract text from a PDF file."""
-    pdf_reader = fitz.open(stream=pdf_content, filetype="pdf")
-    text = ""
-    for page in pdf_reader:
-        text += page.get_text("text") + "\n"
-    pdf_reader.close()
+    with timed(EXTRACTION_SECONDS, "resume_pdf", span="extract pdf", bytes=len(pdf_content)):
+        pdf_reader = fitz.open(stream=pdf_content, filetype="pdf")
+        text = ""
+        for page in pdf_reader:
+            text += page.get_text("text") + "\n"
+        pdf_reader.close()
     return text.strip()
\ No newline at end of file
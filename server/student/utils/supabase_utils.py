@@ -1,13 +1,16 @@
 from supabase import create_client
 from config.settings import settings
+from utils.metrics import timed, STORAGE_SECONDS
 
 # Initialize Supabase client
 supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
 def upload_file(bucket: str, file_path: str, file_content: bytes):
     """Upload a file to Supabase storage."""
-    return supabase.storage.from_(bucket).upload(file_path, file_content)
+    with timed(STORAGE_SECONDS, "upload", bucket, span="supabase.storage upload", bucket=bucket, path=file_path):
+        return supabase.storage.from_(bucket).upload(file_path, file_content)
 
 def download_file(bucket: str, file_path: str):
     """Download a file from Supabase storage."""
-    return supabase.storage.from_(bucket).download(file_path)
\ No newline at end of file
+    with timed(STORAGE_SECONDS, "download", bucket, span="supabase.storage download", bucket=bucket, path=file_path):
+        return supabase.storage.from_(bucket).download(file_path)
\ No newline at end of file
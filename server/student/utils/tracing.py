@@ -0,0 +1,174 @@
+# OpenTelemetry tracing for the interview app.
+# A deliberate copy of server/tracing.py: this app is deployed on its own
+# (server/student, its own requirements.txt, imports from utils/) and does
+# not import the screening service's modules. Only the defaults below differ
+# (service "interview-api", tracer "interview", TRACING_FILE traces.jsonl);
+# change both files together.
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # tracing is optional
+    trace = None
+
+# none (default) | console | file (JSON lines in TRACING_FILE) | otlp
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "interview-api")
+TRACER_NAME = "interview"
+
+_setup_lock = threading.Lock()
+_configured = False
+
+
+def _file_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        """One compact JSON object per span, appended (one write per batch)."""
+
+        def __init__(self):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            data = "".join(json.dumps(json.loads(s.to_json()), separators=(",", ":")) + "\n" for s in spans)
+            # one O_APPEND write per batch: lines from several serve.py workers never interleave
+            with self._lock:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data.encode("utf-8"))
+                finally:
+                    os.close(fd)
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    return JsonLinesSpanExporter()
+
+
+def _exporter(kind: str):
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    if kind == "file":
+        return _file_exporter(TRACING_FILE)
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"TRACING_EXPORTER must be none, console, file or otlp, not {kind!r}")
+
+
+def setup(service_name: str = SERVICE_NAME, exporter: str = TRACING_EXPORTER) -> bool:
+    """Installs the tracer provider once per process; False when tracing stays off."""
+    global _configured
+    if exporter == "none":
+        return False
+    if trace is None:
+        print(f"TRACING_EXPORTER={exporter} but opentelemetry is not installed; tracing off")
+        return False
+    with _setup_lock:
+        if _configured:
+            return True
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+            span_exporter = _exporter(exporter)
+        except ImportError as e:  # only opentelemetry-api installed, or no OTLP exporter
+            print(f"Tracing exporter {exporter} unavailable ({e}); tracing off")
+            return False
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        processor = SimpleSpanProcessor if exporter == "console" else BatchSpanProcessor
+        provider.add_span_processor(processor(span_exporter))
+        trace.set_tracer_provider(provider)
+        try:
+            # Supabase (postgrest, storage) and the OpenAI-compatible Groq client speak httpx
+            from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+            HTTPXClientInstrumentor().instrument()
+        except ImportError:
+            pass
+        _configured = True
+    return True
+
+
+def _clean(attrs: dict) -> dict:
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attrs.items() if v is not None}
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """A child span of the current one (exceptions are recorded on it); yields the span or None."""
+    if trace is None:
+        yield None
+        return
+    with trace.get_tracer(TRACER_NAME).start_as_current_span(name, attributes=_clean(attributes)) as s:
+        yield s
+
+
+def set_attributes(**attributes) -> None:
+    """Adds attributes (session_id, question_number, ...) to the current span."""
+    if trace is not None:
+        trace.get_current_span().set_attributes(_clean(attributes))
+
+
+def inject() -> dict:
+    """W3C trace context of the current span, for work handed to another thread or process."""
+    carrier = {}
+    if trace is not None:
+        propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attached(carrier):
+    """Makes the trace in carrier (from inject()) current."""
+    if trace is None or not carrier:
+        yield
+        return
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+def _trace_header(s, response) -> None:
+    ctx = s.get_span_context()
+    if ctx.is_valid:
+        response.headers["X-Trace-Id"] = format(ctx.trace_id, "032x")
+
+
+def install(app) -> None:
+    """Server span per request (continuing an incoming traceparent) + X-Trace-Id header."""
+    if trace is None:
+        return
+
+    @app.middleware("http")
+    async def _trace_request(request, call_next):
+        upstream = trace.get_current_span()
+        if upstream.get_span_context().is_valid:  # FastAPI's native telemetry already opened one
+            response = await call_next(request)
+            _trace_header(upstream, response)
+            return response
+
+        tracer = trace.get_tracer(TRACER_NAME)
+        with attached(dict(request.headers)), tracer.start_as_current_span(
+            f"{request.method} {request.url.path}", kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": request.method, "url.path": request.url.path},
+        ) as s:
+            response = await call_next(request)
+            route = getattr(request.scope.get("route"), "path", None)
+            if route:
+                s.update_name(f"{request.method} {route}")
+                s.set_attribute("http.route", route)
+            s.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 500:
+                s.set_status(Status(StatusCode.ERROR))
+            _trace_header(s, response)
+            return response
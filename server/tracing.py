@@ -0,0 +1,204 @@
+# File: tracing.py
+# --------------------------------------------------------------------------
+# OpenTelemetry tracing for the screening service.
+#   request span (install)          "POST /upload-resumes/" …
+#     └ job span (background job)   job_id, user_id, resumes
+#         └ stage spans             metrics.stage()   extract_zip, analysis …
+#             ├ extract <fmt>       metrics.extraction()
+#             ├ llm <call>          process_resumes._llm_chat (rate-limit wait incl.)
+#             ├ supabase.db / .storage   metrics.db_call() / storage_call()
+#             └ HTTP spans of every httpx request (Supabase, Groq) when
+#               opentelemetry-instrumentation-httpx is installed
+# Spans hang off contextvars, so the job scheduler's threads and the
+# analysis pool (contextvars.copy_context) inherit the request's trace;
+# sharded workers get it through the shard payload (inject / attached).
+#
+# TRACING_EXPORTER: none (default) | console | file (TRACING_FILE, JSON
+# lines, for offline use) | otlp (OTEL_EXPORTER_OTLP_* env, needs
+# opentelemetry-exporter-otlp-proto-http). Without the opentelemetry
+# packages every helper here is a no-op.
+# --------------------------------------------------------------------------
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:                 # tracing is optional
+    trace = None
+
+# ─── CONSTANTS ─────────────────────────────────────────────────────────
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", os.path.join("processed_data", "traces.jsonl"))
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "screening-api")
+TRACER_NAME = "screening"
+
+_setup_lock = threading.Lock()
+_configured = False
+
+
+# ─── exporters ─────────────────────────────────────────────────────────
+def _file_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        """One compact JSON object per span, appended (one write per batch)."""
+
+        def __init__(self):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            data = "".join(json.dumps(json.loads(s.to_json()), separators=(",", ":")) + "\n" for s in spans)
+            with self._lock:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data.encode("utf-8"))
+                finally:
+                    os.close(fd)
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    return JsonLinesSpanExporter()
+
+
+def _exporter(kind: str):
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    if kind == "file":
+        return _file_exporter(TRACING_FILE)
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"TRACING_EXPORTER must be none, console, file or otlp, not {kind!r}")
+
+
+def setup(service_name: str = SERVICE_NAME, exporter: str = TRACING_EXPORTER) -> bool:
+    """Installs the tracer provider once per process; False when tracing stays off."""
+    global _configured
+    if exporter == "none":
+        return False
+    if trace is None:
+        print(f"⚠️ TRACING_EXPORTER={exporter} but opentelemetry is not installed; tracing off")
+        return False
+    with _setup_lock:
+        if _configured:
+            return True
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+            span_exporter = _exporter(exporter)
+        except ImportError as e:            # only opentelemetry-api installed, or no OTLP exporter
+            print(f"⚠️ Tracing exporter {exporter} unavailable ({e}); tracing off")
+            return False
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        processor = SimpleSpanProcessor if exporter == "console" else BatchSpanProcessor
+        provider.add_span_processor(processor(span_exporter))
+        trace.set_tracer_provider(provider)
+        try:
+            from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+            HTTPXClientInstrumentor().instrument()
+        except ImportError:
+            pass                    # Supabase / Groq calls keep their explicit spans only
+        _configured = True
+    print(f"🔭 Tracing on ({exporter}, service {service_name})")
+    return True
+
+
+# ─── spans ─────────────────────────────────────────────────────────────
+def _clean(attrs: dict) -> dict:
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attrs.items() if v is not None}
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """A child span of the current one (exceptions are recorded on it); yields the span or None."""
+    if trace is None:
+        yield None
+        return
+    with trace.get_tracer(TRACER_NAME).start_as_current_span(name, attributes=_clean(attributes)) as s:
+        yield s
+
+
+def set_attributes(**attributes) -> None:
+    """Adds attributes (job_id, session_id, …) to the current span."""
+    if trace is not None:
+        trace.get_current_span().set_attributes(_clean(attributes))
+
+
+def current_trace_id():
+    if trace is None:
+        return None
+    ctx = trace.get_current_span().get_span_context()
+    return format(ctx.trace_id, "032x") if ctx.is_valid else None
+
+
+# ─── propagation ───────────────────────────────────────────────────────
+def inject() -> dict:
+    """W3C trace context of the current span, for work handed to another process."""
+    carrier = {}
+    if trace is not None:
+        propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attached(carrier):
+    """Makes the trace in carrier (from inject()) current, e.g. in a shard worker."""
+    if trace is None or not carrier:
+        yield
+        return
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+# ─── FastAPI wiring ────────────────────────────────────────────────────
+def _trace_header(s, response) -> None:
+    ctx = s.get_span_context()
+    if ctx.is_valid:
+        response.headers["X-Trace-Id"] = format(ctx.trace_id, "032x")
+
+
+def install(app) -> None:
+    """
+    One server span per request (continuing an incoming traceparent) and an
+    X-Trace-Id response header. When a server span is already open (FastAPI's
+    native telemetry, an ASGI instrumentor), that span is kept and only gets
+    the header; route handlers add job_id / session_id via set_attributes().
+    """
+    if trace is None:
+        return
+
+    @app.middleware("http")
+    async def _trace_request(request, call_next):
+        upstream = trace.get_current_span()
+        if upstream.get_span_context().is_valid:
+            response = await call_next(request)
+            _trace_header(upstream, response)
+            return response
+
+        tracer = trace.get_tracer(TRACER_NAME)
+        with attached(dict(request.headers)), tracer.start_as_current_span(
+            f"{request.method} {request.url.path}", kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": request.method, "url.path": request.url.path},
+        ) as s:
+            response = await call_next(request)
+            route = getattr(request.scope.get("route"), "path", None)
+            if route:
+                s.update_name(f"{request.method} {route}")
+                s.set_attribute("http.route", route)
+            s.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 500:
+                s.set_status(Status(StatusCode.ERROR))
+            _trace_header(s, response)
+            return response